@@ -96,6 +96,7 @@ create_tarball() {
 
     # Copy files to temp directory
     cp videoplayer.py "$TEMP_DIR/"
+    cp streaming_server.py "$TEMP_DIR/"
     cp README.md "$TEMP_DIR/"
     cp LICENSE "$TEMP_DIR/"
     cp ${APP_NAME}.desktop "$TEMP_DIR/"
@@ -50,6 +50,7 @@ install -d %{buildroot}%{_datadir}/metainfo
 
 # Install main application
 install -m 755 videoplayer.py %{buildroot}%{_datadir}/%{name}/videoplayer.py
+install -m 644 streaming_server.py %{buildroot}%{_datadir}/%{name}/streaming_server.py
 
 # Create wrapper script
 cat > %{buildroot}%{_bindir}/%{name} << 'EOF'
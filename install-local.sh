@@ -48,6 +48,7 @@ install_app() {
     # Install main application
     print_info "Installing application files..."
     cp videoplayer.py "$INSTALL_DIR/"
+    cp streaming_server.py "$INSTALL_DIR/"
     chmod +x "$INSTALL_DIR/videoplayer.py"
 
     # Create wrapper script
@@ -0,0 +1,1384 @@
+#!/usr/bin/env python3
+"""
+HTTP-Streaming für Chromecast: Range-Server, Read-Ahead, Telemetrie und On-the-fly-HLS
+
+Kommt ohne GTK und pychromecast aus, damit Server und HTTP-Hilfsfunktionen
+auch ohne Desktop-Umgebung laufen und getestet werden können.
+"""
+
+import os
+import re
+import math
+import time
+import shutil
+import socket
+import threading
+import subprocess
+import uuid
+import email.utils
+import datetime
+import hashlib
+import ipaddress
+from pathlib import Path
+from urllib.parse import urlparse, quote
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class HLSSession:
+    """On-the-fly HLS für Quellen, die neu kodiert werden müssen
+
+    Die Playlist deckt sofort die gesamte Dauer ab. Segmente werden erst
+    transkodiert, wenn der Receiver sie anfordert (plus wenige im Voraus),
+    und im Cache-Verzeichnis abgelegt. Ein Seek kodiert damit nur die
+    Segmente um die neue Position herum.
+
+    Audio wird nie pro Segment kodiert, sonst beginnt jedes Segment mit
+    AAC-Priming (Knacken alle paar Sekunden): kompatibles Audio wird
+    kopiert, sonst einmal für die ganze Sitzung nach AAC kodiert und in die
+    Segmente kopiert.
+    """
+
+    CONTENT_TYPE = 'application/x-mpegURL'
+    AUDIO_WAIT = 10  # Sekunden, die ein Segment auf die Audio-Spur der Sitzung wartet
+
+    def __init__(self, session_id, input_path, duration, segment_dir, video_params,
+                 segment_duration=6, prefetch_segments=2, copy_audio=False):
+        self.session_id = session_id
+        self.input_path = Path(input_path)
+        self.duration = duration
+        self.segment_dir = Path(segment_dir)
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        self.video_params = list(video_params)
+        self.segment_duration = segment_duration
+        self.prefetch_segments = prefetch_segments
+        self.segment_count = max(1, math.ceil(duration / segment_duration - 1e-6))
+        self._segment_locks = {}
+        self._locks_guard = threading.Lock()
+        self._last_requested = 0
+        # Ein Worker für Vorab-Segmente, damit angeforderte Segmente Vorrang haben
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=1,
+                                                     thread_name_prefix="hls-prefetch")
+        self.copy_audio = copy_audio
+        self.audio_path = self.segment_dir / "audio.m4a"
+        self._audio_ready = threading.Event()  # Lauf beendet (erfolgreich oder nicht)
+        self._audio_process = None
+        self._closed = False
+        self.audio_encoded = self.audio_path.exists()
+        if copy_audio or self.audio_encoded:
+            self._audio_ready.set()
+        else:
+            threading.Thread(target=self._encode_audio, daemon=True).start()
+
+    def _encode_audio(self):
+        """Kodiert die Audio-Spur einmal am Stück (ein Priming am Dateianfang)"""
+        tmp_path = self.audio_path.with_name("audio.tmp.m4a")
+        cmd = [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error',
+            '-i', str(self.input_path),
+            '-map', '0:a:0', '-vn',
+            '-c:a', 'aac', '-b:a', '192k', '-ar', '48000', '-ac', '2',
+            '-movflags', '+faststart',
+            '-y', str(tmp_path)
+        ]
+        try:
+            self._audio_process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL,
+                                                   stderr=subprocess.PIPE, text=True)
+            _, stderr = self._audio_process.communicate()
+            if self._audio_process.returncode == 0:
+                os.replace(tmp_path, self.audio_path)
+                self.audio_encoded = True
+                print(f"✓ HLS-Audio für die Sitzung kodiert")
+            elif self._audio_process.returncode > 0:
+                print(f"✗ HLS-Audio fehlgeschlagen, kodiere pro Segment: {stderr.strip()[-300:]}")
+        except OSError as e:
+            print(f"✗ HLS-Audio fehlgeschlagen, kodiere pro Segment: {e}")
+        finally:
+            self._audio_process = None
+            self._audio_ready.set()
+            if tmp_path.exists() and not self.audio_encoded:
+                try:
+                    tmp_path.unlink()
+                except OSError:
+                    pass
+
+    def audio_params(self):
+        """Eingabe- und Audio-Parameter für ein Segment ab start (siehe _ensure_segment)"""
+        if self.copy_audio:
+            return [], ['-map', '0:a:0?', '-c:a', 'copy']
+        if self._audio_ready.wait(self.AUDIO_WAIT) and self.audio_encoded:
+            # Ausschnitt der fertig kodierten Spur - fortlaufend, ohne neues Priming
+            return ['-i', str(self.audio_path)], ['-map', '1:a:0', '-c:a', 'copy']
+        # Spur noch nicht fertig (oder fehlgeschlagen): Notlösung pro Segment
+        return [], ['-map', '0:a:0?', '-c:a', 'aac', '-b:a', '192k', '-ar', '48000', '-ac', '2']
+
+    def playlist(self):
+        """Erzeugt die VOD-Playlist über die gesamte Dauer"""
+        lines = [
+            '#EXTM3U',
+            '#EXT-X-VERSION:3',
+            f'#EXT-X-TARGETDURATION:{int(self.segment_duration + 0.999)}',
+            '#EXT-X-MEDIA-SEQUENCE:0',
+            '#EXT-X-PLAYLIST-TYPE:VOD',
+        ]
+        for index in range(self.segment_count):
+            start = index * self.segment_duration
+            length = min(self.segment_duration, self.duration - start)
+            lines.append(f'#EXTINF:{length:.3f},')
+            lines.append(self.segment_name(index))
+        lines.append('#EXT-X-ENDLIST')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def segment_name(index):
+        return f"seg_{index:05d}.ts"
+
+    @staticmethod
+    def parse_segment_name(name):
+        m = re.fullmatch(r'seg_(\d{5})\.ts', name)
+        return int(m.group(1)) if m else None
+
+    def segment_path(self, index):
+        return self.segment_dir / self.segment_name(index)
+
+    def get_segment(self, index):
+        """Gibt den Pfad eines fertigen Segments zurück und kodiert es bei Bedarf
+
+        Returns: Path oder None bei ungültigem Index bzw. Kodierfehler
+        """
+        if not 0 <= index < self.segment_count:
+            return None
+
+        self._last_requested = index
+        path = self._ensure_segment(index)
+
+        # Nächste Segmente im Hintergrund vorbereiten
+        for ahead in range(index + 1, min(index + 1 + self.prefetch_segments, self.segment_count)):
+            if not self.segment_path(ahead).exists():
+                self._prefetch_executor.submit(self._prefetch, ahead)
+        return path
+
+    def _prefetch(self, index):
+        # Nach einem Seek nicht mehr benötigte Segmente überspringen
+        if not self._last_requested <= index <= self._last_requested + self.prefetch_segments:
+            return
+        self._ensure_segment(index)
+
+    def _segment_lock(self, index):
+        with self._locks_guard:
+            return self._segment_locks.setdefault(index, threading.Lock())
+
+    def _ensure_segment(self, index):
+        path = self.segment_path(index)
+        if path.exists():
+            return path
+
+        with self._segment_lock(index):
+            # Ein paralleler Request könnte es inzwischen erzeugt haben
+            if path.exists():
+                return path
+
+            start = index * self.segment_duration
+            length = min(self.segment_duration, self.duration - start)
+            tmp_path = path.with_suffix('.tmp')
+            audio_inputs, audio_params = self.audio_params()
+            cmd = [
+                'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                '-ss', f'{start:.3f}',
+                '-i', str(self.input_path),
+            ]
+            if audio_inputs:
+                cmd += ['-ss', f'{start:.3f}'] + audio_inputs
+            cmd += [
+                '-t', f'{length:.3f}',
+                '-map', '0:v:0',
+            ]
+            cmd.extend(self.video_params)
+            cmd.extend([
+                # Jedes Segment beginnt mit einem Keyframe (nur der erste Frame)
+                '-force_key_frames', 'expr:eq(n,0)',
+            ] + audio_params + [
+                # Zeitstempel fortlaufend über alle Segmente
+                '-output_ts_offset', f'{start:.3f}',
+                '-muxdelay', '0',
+                '-f', 'mpegts',
+                '-y', str(tmp_path)
+            ])
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                if self._closed:
+                    # Sitzung wurde während des Vorab-Kodierens geschlossen
+                    return None
+                print(f"✗ HLS-Segment {index} fehlgeschlagen: {result.stderr.strip()[-300:]}")
+                if tmp_path.exists():
+                    tmp_path.unlink()
+                return None
+            os.replace(tmp_path, path)
+            print(f"✓ HLS-Segment {index + 1}/{self.segment_count} kodiert")
+            return path
+
+    def close(self, remove_segments=True):
+        """Beendet die Sitzung; remove_segments räumt das Segment-Verzeichnis weg"""
+        self._closed = True
+        self._prefetch_executor.shutdown(wait=False, cancel_futures=True)
+        process = self._audio_process
+        if process:
+            process.terminate()
+        if remove_segments:
+            shutil.rmtree(self.segment_dir, ignore_errors=True)
+
+
+class ReadAheadManager:
+    """Read-Ahead und Page-Cache-Verwaltung für sequenzielle Streams
+
+    Verfolgt pro Client und Datei die Leseposition. Bei sequenziellem Lesen
+    wird das nächste Fenster per posix_fadvise(WILLNEED) und optional per
+    Hintergrund-Lesen vorgeladen, bereits abgespielte Bereiche werden per
+    DONTNEED freigegeben, damit ein großer Stream nicht den ganzen
+    Page-Cache verdrängt.
+    """
+
+    STREAM_IDLE_TIMEOUT = 120  # Sekunden bis ein Stream-Zustand verworfen wird
+
+    def __init__(self, window_mb=8, keep_behind_mb=16, drop_behind=True,
+                 background_prefetch=True, enabled=True):
+        self.window_bytes = int(window_mb * 1024 * 1024)
+        self.keep_behind_bytes = int(keep_behind_mb * 1024 * 1024)
+        self.drop_behind = drop_behind
+        self.background_prefetch = background_prefetch
+        self.enabled = enabled and hasattr(os, 'posix_fadvise')
+        self._streams = {}  # (client, path) -> Zustand
+        self._lock = threading.Lock()
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=2,
+                                                     thread_name_prefix="readahead")
+        self.stats = {
+            'requests': 0,
+            'sequential_requests': 0,
+            'prefetch_hits': 0,
+            'prefetch_misses': 0,
+            'bytes_prefetched': 0,
+            'bytes_dropped': 0,
+        }
+
+    def on_read(self, client, f, offset, length, continued=False):
+        """Wird vor dem Senden eines Bytebereichs aufgerufen
+
+        Große Antworten melden jeden gesendeten Block, damit Fenster und
+        Drop-Behind mitwandern; Folgeblöcke (continued=True) zählen dabei
+        nicht als eigene Requests.
+        Gibt zurück, ob der Bereich bereits im vorgeladenen Fenster lag
+        (None, wenn Read-Ahead deaktiviert ist).
+        """
+        if not self.enabled or length <= 0:
+            return None
+
+        path = f.name
+        end = offset + length
+        now = time.monotonic()
+        with self._lock:
+            self._expire_streams(now)
+            state = self._streams.setdefault((client, path), {
+                'next_offset': None,
+                'prefetched_from': 0,
+                'prefetched_until': 0,
+                'dropped_until': 0,
+            })
+            state['last_seen'] = now
+
+            sequential = state['next_offset'] is not None and \
+                abs(offset - state['next_offset']) <= self.window_bytes
+            hit = state['prefetched_from'] <= offset and end <= state['prefetched_until']
+            if not continued:
+                self.stats['requests'] += 1
+                if sequential:
+                    self.stats['sequential_requests'] += 1
+                if hit:
+                    self.stats['prefetch_hits'] += 1
+                else:
+                    self.stats['prefetch_misses'] += 1
+            state['next_offset'] = end
+
+            prefetch_range = None
+            if end >= state['prefetched_until'] - self.window_bytes // 2 or not sequential:
+                start = max(end, state['prefetched_until']) if sequential else end
+                prefetch_range = (start, end + self.window_bytes)
+                state['prefetched_from'] = offset
+                state['prefetched_until'] = end + self.window_bytes
+                self.stats['bytes_prefetched'] += prefetch_range[1] - prefetch_range[0]
+
+            drop_range = None
+            drop_end = offset - self.keep_behind_bytes
+            if self.drop_behind and sequential and drop_end > state['dropped_until']:
+                drop_range = (state['dropped_until'], drop_end)
+                state['dropped_until'] = drop_end
+                self.stats['bytes_dropped'] += drop_end - drop_range[0]
+            elif not sequential:
+                # Nach einem Seek nichts hinter der neuen Position verwerfen
+                state['dropped_until'] = max(0, offset - self.keep_behind_bytes)
+
+        fd = f.fileno()
+        try:
+            if prefetch_range:
+                start, stop = prefetch_range
+                os.posix_fadvise(fd, start, stop - start, os.POSIX_FADV_WILLNEED)
+                if self.background_prefetch:
+                    self._prefetch_executor.submit(self._read_into_cache, path, start, stop)
+            if drop_range:
+                start, stop = drop_range
+                os.posix_fadvise(fd, start, stop - start, os.POSIX_FADV_DONTNEED)
+        except OSError as e:
+            print(f"ℹ posix_fadvise nicht möglich: {e}")
+        return hit
+
+    @staticmethod
+    def _read_into_cache(path, start, stop):
+        """Liest einen Bereich im Hintergrund, damit er im Page-Cache liegt
+
+        Hilft bei NFS/SMB, wo WILLNEED oft keine Wirkung hat.
+        """
+        chunk = 1024 * 1024
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            offset = start
+            while offset < stop:
+                data = os.pread(fd, min(chunk, stop - offset), offset)
+                if not data:
+                    break
+                offset += len(data)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _expire_streams(self, now):
+        expired = [key for key, state in self._streams.items()
+                   if now - state.get('last_seen', now) > self.STREAM_IDLE_TIMEOUT]
+        for key in expired:
+            del self._streams[key]
+
+    def get_stats(self):
+        """Gibt eine Kopie der Zähler zurück"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['active_streams'] = len(self._streams)
+        return stats
+
+    def close(self):
+        self._prefetch_executor.shutdown(wait=False, cancel_futures=True)
+
+
+class StreamingStats:
+    """Telemetrie des Streaming-Servers (thread-sicher)
+
+    Sammelt Zähler pro Verbindung und global: ausgelieferte Bytes,
+    Durchsatz, Histogramme für Request-Größen, Offsets und Time-to-First-Byte,
+    Client-Abbrüche und Schreib-Stalls. render_prometheus() liefert das
+    Prometheus-Textformat für /metrics.
+    """
+
+    SIZE_BUCKETS = (64 * 1024, 256 * 1024, 1024**2, 4 * 1024**2, 16 * 1024**2, 64 * 1024**2, 256 * 1024**2)
+    OFFSET_BUCKETS = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0)
+    TTFB_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+    THROUGHPUT_WINDOW = 10.0  # Sekunden für gleitenden Durchsatz
+    CLOSED_CONNECTIONS_KEPT = 20
+
+    def __init__(self, stall_threshold=1.0):
+        self.stall_threshold = stall_threshold
+        self._lock = threading.Lock()
+        self._next_connection_id = 1
+        self.connections = {}  # ID -> Zähler der offenen Verbindungen
+        self.closed_connections = deque(maxlen=self.CLOSED_CONNECTIONS_KEPT)
+        self.connections_total = 0
+        self.bytes_served = 0
+        self.requests_by_status = {}
+        self.client_resets = 0
+        self.stalls = {'network': 0, 'disk': 0, 'unknown': 0}
+        self.size_histogram = self._new_histogram(self.SIZE_BUCKETS)
+        self.offset_histogram = self._new_histogram(self.OFFSET_BUCKETS)
+        self.ttfb_histogram = self._new_histogram(self.TTFB_BUCKETS)
+        self._recent_writes = deque()  # (Zeitpunkt, Client, Bytes)
+
+    @staticmethod
+    def _new_histogram(buckets):
+        return {'buckets': buckets, 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+
+    @staticmethod
+    def _observe(histogram, value):
+        for i, bound in enumerate(histogram['buckets']):
+            if value <= bound:
+                histogram['counts'][i] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+    def connection_opened(self, client):
+        with self._lock:
+            connection_id = self._next_connection_id
+            self._next_connection_id += 1
+            self.connections_total += 1
+            self.connections[connection_id] = {
+                'id': connection_id,
+                'client': client,
+                'opened': time.time(),
+                'requests': 0,
+                'bytes': 0,
+                'stalls': 0,
+                'resets': 0,
+            }
+            return connection_id
+
+    def connection_closed(self, connection_id):
+        with self._lock:
+            connection = self.connections.pop(connection_id, None)
+            if connection:
+                connection['closed'] = time.time()
+                self.closed_connections.append(connection)
+
+    def record_status(self, connection_id, code):
+        with self._lock:
+            self.requests_by_status[code] = self.requests_by_status.get(code, 0) + 1
+            connection = self.connections.get(connection_id)
+            if connection:
+                connection['requests'] += 1
+
+    def record_ttfb(self, seconds):
+        with self._lock:
+            self._observe(self.ttfb_histogram, seconds)
+
+    def record_range(self, offset, length, file_len):
+        with self._lock:
+            self._observe(self.size_histogram, length)
+            if file_len > 0:
+                self._observe(self.offset_histogram, offset / file_len)
+
+    def record_write(self, connection_id, client, nbytes, duration, cause='unknown'):
+        """Verbucht einen Schreibvorgang; zu langsame Writes zählen als Stall"""
+        now = time.monotonic()
+        with self._lock:
+            self.bytes_served += nbytes
+            self._recent_writes.append((now, client, nbytes))
+            self._trim_recent(now)
+            connection = self.connections.get(connection_id)
+            if connection:
+                connection['bytes'] += nbytes
+            if duration > self.stall_threshold:
+                self.stalls[cause] = self.stalls.get(cause, 0) + 1
+                if connection:
+                    connection['stalls'] += 1
+
+    def record_reset(self, connection_id):
+        with self._lock:
+            self.client_resets += 1
+            connection = self.connections.get(connection_id)
+            if connection:
+                connection['resets'] += 1
+
+    def _trim_recent(self, now):
+        while self._recent_writes and now - self._recent_writes[0][0] > self.THROUGHPUT_WINDOW:
+            self._recent_writes.popleft()
+
+    def throughput(self, client=None, window=None):
+        """Durchsatz in Bytes/s über die letzten window Sekunden (max. THROUGHPUT_WINDOW)"""
+        window = min(window or self.THROUGHPUT_WINDOW, self.THROUGHPUT_WINDOW)
+        now = time.monotonic()
+        with self._lock:
+            self._trim_recent(now)
+            total = sum(n for t, c, n in self._recent_writes
+                        if now - t <= window and (client is None or c == client))
+        return total / window
+
+    def active_throughput(self, client=None, window=5.0):
+        """Durchsatz in Bytes/s während tatsächlich übertragen wurde
+
+        Bezieht sich auf die Spanne vom ersten bis zum letzten Write im
+        Fenster, damit Pausen des Receivers die Messung nicht verfälschen.
+        Returns: Bytes/s oder None bei zu wenig Daten (< 1 s Übertragung)
+        """
+        now = time.monotonic()
+        with self._lock:
+            writes = [(t, n) for t, c, n in self._recent_writes
+                      if now - t <= window and (client is None or c == client)]
+        if len(writes) < 2:
+            return None
+        span = writes[-1][0] - writes[0][0]
+        if span < 1.0:
+            return None
+        # Der erste Write liegt am Anfang der Spanne und zählt nicht mit
+        return sum(n for _, n in writes[1:]) / span
+
+    def stall_count(self, cause=None):
+        """Anzahl der Schreib-Stalls (optional nur einer Ursache)"""
+        with self._lock:
+            if cause:
+                return self.stalls.get(cause, 0)
+            return sum(self.stalls.values())
+
+    def _ttfb_average(self):
+        count = self.ttfb_histogram['count']
+        return self.ttfb_histogram['sum'] / count if count else 0.0
+
+    def snapshot(self):
+        """Kompakte Übersicht für die UI"""
+        throughput = self.throughput()
+        with self._lock:
+            return {
+                'bytes_served': self.bytes_served,
+                'throughput': throughput,
+                'active_connections': len(self.connections),
+                'connections_total': self.connections_total,
+                'ttfb_avg': self._ttfb_average(),
+                'client_resets': self.client_resets,
+                'stalls': dict(self.stalls),
+            }
+
+    def render_prometheus(self, readahead_stats=None):
+        """Gibt alle Metriken im Prometheus-Textformat zurück"""
+        throughput = self.throughput()
+        clients = {}
+        with self._lock:
+            for _, client, _ in self._recent_writes:
+                clients[client] = None
+        client_throughput = {client: self.throughput(client) for client in clients}
+
+        lines = []
+
+        def escape(value):
+            # Label-Werte: Backslash, Anführungszeichen und Zeilenumbruch maskieren
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        def metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                label_str = ''
+                if labels:
+                    label_str = '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels.items()) + '}'
+                lines.append(f"{name}{label_str} {value}")
+
+        def histogram(name, help_text, hist):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for bound, count in zip(hist['buckets'], hist['counts']):
+                lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {hist["count"]}')
+            lines.append(f"{name}_sum {hist['sum']}")
+            lines.append(f"{name}_count {hist['count']}")
+
+        with self._lock:
+            metric('castserver_bytes_served_total', 'counter', 'Ausgelieferte Bytes',
+                   [({}, self.bytes_served)])
+            metric('castserver_throughput_bytes_per_second', 'gauge',
+                   f'Durchsatz der letzten {self.THROUGHPUT_WINDOW:.0f}s',
+                   [({}, f"{throughput:.1f}")] +
+                   [({'client': c}, f"{v:.1f}") for c, v in client_throughput.items()])
+            metric('castserver_requests_total', 'counter', 'Requests nach HTTP-Status',
+                   [({'status': code}, count) for code, count in sorted(self.requests_by_status.items())])
+            metric('castserver_connections_total', 'counter', 'Angenommene Verbindungen',
+                   [({}, self.connections_total)])
+            metric('castserver_connections_active', 'gauge', 'Offene Verbindungen',
+                   [({}, len(self.connections))])
+            metric('castserver_connection_bytes', 'gauge', 'Bytes pro offener Verbindung',
+                   [({'client': c['client'], 'connection': c['id']}, c['bytes'])
+                    for c in self.connections.values()])
+            metric('castserver_client_resets_total', 'counter', 'Vom Client abgebrochene Verbindungen',
+                   [({}, self.client_resets)])
+            metric('castserver_write_stalls_total', 'counter',
+                   f'Writes länger als {self.stall_threshold}s (Ursache: network/disk/unknown)',
+                   [({'cause': cause}, count) for cause, count in sorted(self.stalls.items())])
+            histogram('castserver_request_size_bytes', 'Größe der ausgelieferten Bereiche',
+                      self.size_histogram)
+            histogram('castserver_request_offset_ratio', 'Startposition relativ zur Dateigröße',
+                      self.offset_histogram)
+            histogram('castserver_ttfb_seconds', 'Zeit bis zum ersten Byte der Antwort',
+                      self.ttfb_histogram)
+
+        if readahead_stats:
+            for key, value in sorted(readahead_stats.items()):
+                metric(f'castserver_readahead_{key}', 'gauge' if key == 'active_streams' else 'counter',
+                       f'Read-Ahead: {key}', [({}, value)])
+
+        return '\n'.join(lines) + '\n'
+
+
+# Mehr Ranges pro Request werden ignoriert (Schutz vor Range-Amplification)
+MAX_BYTE_RANGES = 16
+
+
+def parse_byte_ranges(range_header, file_len):
+    """Parst einen Range-Header nach RFC 7233
+
+    Returns:
+        None wenn der Header ungültig ist und ignoriert werden muss,
+        [] wenn keine Range erfüllbar ist (416),
+        sonst eine sortierte Liste zusammengeführter (start, end)-Tupel (inklusive).
+    """
+    unit, _, spec = range_header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition('-')
+        first, last = first.strip(), last.strip()
+        if not sep or (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:
+            # Suffix-Range: die letzten N Bytes
+            if not last:
+                return None
+            suffix_len = int(last)
+            if suffix_len > 0 and file_len > 0:
+                ranges.append((max(0, file_len - suffix_len), file_len - 1))
+            continue
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < file_len:
+            end = min(int(last), file_len - 1) if last else file_len - 1
+            ranges.append((start, end))
+
+    if len(ranges) > MAX_BYTE_RANGES:
+        return None
+
+    # Überlappende und direkt angrenzende Ranges zusammenführen
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def make_etag(stat_result):
+    """Erzeugt einen starken ETag aus Inode, Größe und Änderungszeit"""
+    return f'"{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def parse_http_date(value):
+    """Wandelt ein HTTP-Datum in einen Unix-Timestamp (int) um, None bei Fehler"""
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return int(parsed.timestamp())
+
+
+class MediaEntry:
+    """Eine über den HTTP-Server freigegebene Datei"""
+
+    def __init__(self, media_id, path, content_type=None, progressive=None):
+        self.media_id = media_id
+        self._path = path
+        self.content_type = content_type
+        # ProgressiveFile, solange die Datei noch geschrieben wird
+        self.progressive = progressive
+
+    @property
+    def path(self):
+        if self.progressive:
+            return self.progressive.path
+        return self._path
+
+    def is_growing(self):
+        return self.progressive is not None and not self.progressive.is_complete()
+
+    @property
+    def url_path(self):
+        return f"/media/{self.media_id}/{quote(Path(self.path).name)}"
+
+
+class MediaCatalog:
+    """Katalog der freigegebenen Dateien mit stabilen IDs
+
+    Die ID wird aus dem absoluten Pfad abgeleitet, dadurch bleibt die URL
+    einer Datei über die gesamte Sitzung (und über Neustarts) gleich.
+    Nur registrierte Dateien werden ausgeliefert.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def media_id_for(path):
+        abs_path = str(Path(path).resolve())
+        return hashlib.sha1(abs_path.encode()).hexdigest()[:16]
+
+    def register(self, path, content_type=None, progressive=None):
+        """Registriert eine Datei und gibt ihren Katalog-Eintrag zurück
+
+        progressive: ProgressiveFile, falls die Datei noch geschrieben wird
+        """
+        abs_path = str(Path(path).resolve())
+        media_id = self.media_id_for(abs_path)
+        with self._lock:
+            entry = self._entries.get(media_id)
+            if entry is None:
+                entry = MediaEntry(media_id, abs_path, content_type, progressive)
+                self._entries[media_id] = entry
+            else:
+                if content_type:
+                    entry.content_type = content_type
+                if progressive:
+                    entry.progressive = progressive
+        return entry
+
+    def unregister(self, media_id):
+        with self._lock:
+            self._entries.pop(media_id, None)
+
+    def lookup(self, media_id):
+        with self._lock:
+            return self._entries.get(media_id)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Request-Handler mit Range-Unterstützung und HTTP/1.1 Keep-Alive"""
+
+    # Keep-Alive: Chromecast kann mehrere Range-Requests über eine Verbindung schicken
+    protocol_version = 'HTTP/1.1'
+    # Timeout (Sekunden) für Lesen und Schreiben während einer Anfrage
+    timeout = 30
+    # Wartezeit (Sekunden) auf die nächste Anfrage einer Keep-Alive-Verbindung;
+    # eine ruhende Verbindung belegt sonst einen Worker für das volle timeout
+    idle_timeout = 5
+    # Kernel-Zero-Copy (sendfile) statt Kopieren durch Python
+    use_sendfile = True
+    # MediaCatalog mit den freigegebenen Dateien (wird vom VideoHTTPServer gesetzt)
+    catalog = None
+    # Maximale Wartezeit (Sekunden) auf noch nicht geschriebene Daten
+    growth_timeout = 60
+    # Aktive HLS-Sitzungen (ID -> HLSSession, wird vom VideoHTTPServer gesetzt)
+    hls_sessions = {}
+    # ReadAheadManager für sequenzielle Streams (optional)
+    readahead = None
+    # StreamingStats für Telemetrie und /metrics (optional)
+    stats = None
+    # Callback(path) bei Auslieferung einer Datei, z.B. für LRU des Caches
+    on_file_served = None
+    # Blockgröße für sendfile(), an ihr werden Schreib-Stalls gemessen
+    send_block_size = 1024 * 1024
+    # Jeden Request ausgeben (Debugging, VIDEOPLAYER_HTTP_DEBUG=1)
+    log_requests = bool(os.environ.get('VIDEOPLAYER_HTTP_DEBUG'))
+
+    def log_message(self, format, *args):
+        # Request-Logs nur im Debug-Modus (print pro Request kostet Zeit)
+        if self.log_requests:
+            print(f"HTTP: {format % args}")
+
+    def log_error(self, format, *args):
+        if self._idle:
+            return  # Leerlauf-Timeout einer Keep-Alive-Verbindung ist normal
+        print(f"HTTP: {format % args}")
+
+    def log_request(self, code='-', size='-'):
+        if self.stats:
+            self.stats.record_status(self._connection_id, getattr(code, 'value', code))
+        super().log_request(code, size)
+
+    def setup(self):
+        super().setup()
+        self._connection_id = None
+        self._request_started = None
+        self._readahead_hit = None
+        self._idle = False
+        if self.stats:
+            self._connection_id = self.stats.connection_opened(self.client_address[0])
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            if self.stats:
+                self.stats.connection_closed(self._connection_id)
+
+    def handle_one_request(self):
+        # Bis zur Request-Zeile gilt das kurze Leerlauf-Timeout
+        self._idle = True
+        self.connection.settimeout(self.idle_timeout)
+        super().handle_one_request()
+
+    def parse_request(self):
+        # Startzeitpunkt für Time-to-First-Byte (nach Empfang der Request-Zeile)
+        self._request_started = time.monotonic()
+        self._readahead_hit = None
+        self._idle = False
+        self.connection.settimeout(self.timeout)
+        return super().parse_request()
+
+    def handle(self):
+        """Überschreibe handle() für besseres Error-Handling"""
+        try:
+            super().handle()
+        except (ConnectionResetError, BrokenPipeError, ConnectionAbortedError) as e:
+            # Chromecast hat Verbindung getrennt (z.B. Stop gedrückt)
+            if self.stats:
+                self.stats.record_reset(self._connection_id)
+            if self.log_requests:
+                print(f"HTTP-Verbindung geschlossen: {e}")
+        except socket.timeout:
+            print("HTTP-Verbindung: Timeout")
+        except Exception as e:
+            print(f"HTTP-Server Fehler: {e}")
+            import traceback
+            traceback.print_exc()
+
+    def resolve_media_entry(self):
+        """Löst /media/<id>/<name> über den Katalog auf, None wenn unbekannt"""
+        parts = urlparse(self.path).path.split('/')
+        # ['', 'media', '<id>', '<name>']
+        if len(parts) < 3 or parts[1] != 'media' or self.catalog is None:
+            return None
+        return self.catalog.lookup(parts[2])
+
+    def do_GET(self):
+        """Behandelt GET-Anfragen mit Range- und Conditional-Request-Unterstützung"""
+        self.route_request(send_body=True)
+
+    def do_HEAD(self):
+        """Behandelt HEAD-Anfragen, ohne die Datei zum Lesen zu öffnen"""
+        self.route_request(send_body=False)
+
+    def route_request(self, send_body):
+        """Verteilt Anfragen auf Katalog-Dateien (/media/), HLS (/hls/) und /metrics"""
+        request_path = urlparse(self.path).path
+        if request_path.startswith('/hls/'):
+            self.serve_hls(send_body)
+        elif request_path == '/metrics':
+            self.serve_metrics(send_body)
+        else:
+            self.serve_file(send_body)
+
+    def end_headers(self):
+        # CORS: Der Cast-Receiver lädt HLS-Playlists und Untertitel per XHR
+        self.send_header('Access-Control-Allow-Origin', '*')
+        super().end_headers()
+        if self.stats and self._request_started is not None:
+            self.stats.record_ttfb(time.monotonic() - self._request_started)
+            self._request_started = None
+
+    def serve_metrics(self, send_body):
+        """Liefert die Server-Telemetrie im Prometheus-Textformat
+
+        Nur für Clients auf demselben Rechner - der Server lauscht im ganzen
+        LAN, die Metriken nennen aber die Adressen aller Clients.
+        """
+        if not self.stats:
+            self.send_error(404, "File not found")
+            return
+        if not self._is_local_client():
+            self.send_error(403, "Forbidden")
+            return
+        readahead_stats = self.readahead.get_stats() if self.readahead else None
+        body = self.stats.render_prometheus(readahead_stats).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _is_local_client(self):
+        try:
+            address = ipaddress.ip_address(self.client_address[0])
+        except ValueError:
+            return False
+        mapped = getattr(address, 'ipv4_mapped', None)
+        return (mapped or address).is_loopback
+
+    def serve_hls(self, send_body):
+        """Liefert /hls/<session>/index.m3u8 und die bei Bedarf kodierten Segmente"""
+        parts = urlparse(self.path).path.split('/')
+        # ['', 'hls', '<session>', '<name>']
+        session = self.hls_sessions.get(parts[2]) if len(parts) == 4 else None
+        if session is None:
+            self.send_error(404, "File not found")
+            return
+
+        name = parts[3]
+        if name == 'index.m3u8':
+            body = session.playlist().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', HLSSession.CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+            return
+
+        index = HLSSession.parse_segment_name(name)
+        segment_path = session.get_segment(index) if index is not None else None
+        if segment_path is None:
+            self.send_error(404, "Segment not found")
+            return
+        self.serve_path(str(segment_path), 'video/mp2t', send_body)
+
+    def serve_file(self, send_body):
+        """Liefert eine Datei nach RFC 7232/7233 aus
+
+        Unterstützt Einzel-, Suffix- und Mehrfach-Ranges (multipart/byteranges),
+        If-Range sowie ETag/Last-Modified-Validatoren mit 304-Antworten.
+        """
+        entry = self.resolve_media_entry()
+        if entry is None:
+            self.send_error(404, "File not found")
+            return
+        if entry.is_growing():
+            self.serve_growing_file(entry, send_body)
+            return
+        if self.on_file_served:
+            self.on_file_served(entry.path)
+        self.serve_path(entry.path, entry.content_type or self.guess_type(entry.path), send_body)
+
+    def serve_path(self, path, content_type, send_body):
+        """Liefert eine lokale Datei mit Range-/Validator-Unterstützung aus"""
+        f = None
+        try:
+            if send_body:
+                f = open(path, 'rb')
+                fs = os.fstat(f.fileno())
+            else:
+                fs = os.stat(path)
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+
+        try:
+            self._respond_with_file(f, fs, content_type, send_body)
+        finally:
+            if f:
+                f.close()
+
+    def _respond_with_file(self, f, fs, content_type, send_body):
+        file_len = fs.st_size
+        etag = make_etag(fs)
+        last_modified = self.date_time_string(fs.st_mtime)
+
+        if self._is_not_modified(etag, fs.st_mtime):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.end_headers()
+            return
+
+        ranges = None
+        range_header = self.headers.get('Range')
+        if range_header and self._if_range_matches(etag, fs.st_mtime):
+            ranges = parse_byte_ranges(range_header, file_len)
+
+        if ranges == []:
+            self.send_response(416, 'Requested Range Not Satisfiable')
+            self.send_header('Content-Range', f'bytes */{file_len}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if ranges is None:
+            self.send_response(200)
+            body_parts = [(0, file_len - 1)] if file_len else []
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(file_len))
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.send_response(206) # Partial Content
+            body_parts = ranges
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{file_len}')
+            self.send_header('Content-Length', str(end - start + 1))
+        else:
+            self.send_response(206)
+            boundary = uuid.uuid4().hex
+            part_headers = [
+                (f'\r\n--{boundary}\r\n'
+                 f'Content-Type: {content_type}\r\n'
+                 f'Content-Range: bytes {start}-{end}/{file_len}\r\n\r\n').encode('latin-1')
+                for start, end in ranges
+            ]
+            closing = f'\r\n--{boundary}--\r\n'.encode('latin-1')
+            total = (sum(len(h) for h in part_headers) + len(closing)
+                     + sum(end - start + 1 for start, end in ranges))
+            self.send_header('Content-Type', f'multipart/byteranges; boundary={boundary}')
+            self.send_header('Content-Length', str(total))
+            body_parts = None
+
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+
+        if not send_body:
+            return
+
+        try:
+            if body_parts is not None:
+                for start, end in body_parts:
+                    if self.stats:
+                        self.stats.record_range(start, end - start + 1, file_len)
+                    self._send_exact(f, start, end - start + 1)
+            else:
+                for (start, end), header in zip(ranges, part_headers):
+                    if self.stats:
+                        self.stats.record_range(start, end - start + 1, file_len)
+                    self.wfile.write(header)
+                    self._send_exact(f, start, end - start + 1)
+                self.wfile.write(closing)
+        except Exception:
+            # Antwort ist unvollständig - Verbindung darf nicht wiederverwendet werden
+            self.close_connection = True
+            raise
+
+    def serve_growing_file(self, entry, send_body):
+        """Liefert eine Datei aus, die noch geschrieben wird (progressives fMP4)
+
+        Range-Requests warten, bis der Startpunkt geschrieben ist, und erhalten
+        den bereits vorhandenen Teil mit unbekannter Gesamtlänge (bytes a-b/*).
+        Anfragen ohne Range folgen der Datei per Chunked-Encoding bis zum Ende.
+        """
+        progressive = entry.progressive
+        content_type = entry.content_type or 'video/mp4'
+        range_header = self.headers.get('Range')
+
+        start = None
+        requested_end = None
+        if range_header:
+            m = re.fullmatch(r'\s*bytes\s*=\s*(\d+)-(\d*)\s*', range_header)
+            if not m:
+                # Suffix- und Mehrfach-Ranges erst nach Ende der Konvertierung
+                self.send_response(503)
+                self.send_header('Retry-After', '2')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            start = int(m.group(1))
+            if m.group(2) and int(m.group(2)) >= start:
+                requested_end = int(m.group(2))
+
+        if not progressive.wait_for(start or 0, self.growth_timeout):
+            if progressive.is_complete() and not progressive.failed:
+                # Während des Wartens fertig geworden, aber Range liegt hinter dem Ende
+                self.serve_file(send_body)
+                return
+            self.send_response(503)
+            self.send_header('Retry-After', '2')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if progressive.is_complete():
+            self.serve_file(send_body)
+            return
+
+        try:
+            f = open(progressive.path, 'rb')
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+
+        with f:
+            if start is not None:
+                available = progressive.available_bytes()
+                end = available - 1
+                if requested_end is not None:
+                    end = min(end, requested_end)
+                self.send_response(206)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Range', f'bytes {start}-{end}/*')
+                self.send_header('Content-Length', str(end - start + 1))
+                self.send_header('Accept-Ranges', 'bytes')
+                self.end_headers()
+                if send_body:
+                    try:
+                        self._send_exact(f, start, end - start + 1)
+                    except Exception:
+                        self.close_connection = True
+                        raise
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.send_header('Accept-Ranges', 'bytes')
+            self.end_headers()
+            if not send_body:
+                return
+
+            try:
+                offset = 0
+                while True:
+                    available = progressive.available_bytes()
+                    if available > offset:
+                        length = available - offset
+                        self.wfile.write(f'{length:x}\r\n'.encode('latin-1'))
+                        self._send_exact(f, offset, length)
+                        self.wfile.write(b'\r\n')
+                        offset = available
+                        continue
+                    if progressive.is_complete():
+                        if progressive.failed:
+                            raise OSError("Konvertierung fehlgeschlagen")
+                        # Rest nach dem Umbenennen der fertigen Datei
+                        if progressive.available_bytes() > offset:
+                            continue
+                        break
+                    if (not progressive.wait_for(offset, self.growth_timeout)
+                            and not progressive.is_complete()):
+                        raise TimeoutError("Konvertierung liefert keine Daten mehr")
+                self.wfile.write(b'0\r\n\r\n')
+            except Exception:
+                self.close_connection = True
+                raise
+
+    def _send_exact(self, f, offset, length):
+        sent = self.send_file_range(f, offset, length)
+        if sent != length:
+            # Datei wurde während der Übertragung gekürzt
+            raise OSError(f"Nur {sent} von {length} Bytes gesendet")
+
+    def _is_not_modified(self, etag, mtime):
+        """Wertet If-None-Match bzw. If-Modified-Since aus (RFC 7232)"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            if if_none_match.strip() == '*':
+                return True
+            # Schwacher Vergleich: W/-Präfix ignorieren
+            candidates = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return etag in candidates
+
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            since = parse_http_date(if_modified_since)
+            if since is not None:
+                return int(mtime) <= since
+        return False
+
+    def _if_range_matches(self, etag, mtime):
+        """Prüft If-Range: nur bei unverändertem Validator gilt der Range-Header"""
+        if_range = self.headers.get('If-Range')
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"'):
+            # Starker Vergleich
+            return if_range == etag
+        if if_range.startswith('W/'):
+            return False
+        since = parse_http_date(if_range)
+        return since is not None and since == int(mtime)
+
+    def copyfile(self, source, outputfile):
+        """Sendet den Rest der Datei (Nicht-Range-Requests) per sendfile() wenn möglich"""
+        if outputfile is self.wfile and hasattr(source, 'fileno'):
+            offset = source.tell()
+            length = os.fstat(source.fileno()).st_size - offset
+            self.send_file_range(source, offset, length)
+        else:
+            super().copyfile(source, outputfile)
+
+    def send_file_range(self, f, offset, length):
+        """Sendet genau `length` Bytes ab `offset` an den Client
+
+        Nutzt Kernel-Zero-Copy (sendfile), die Python-Kopierschleife bleibt
+        nur als Fallback, z.B. für Dateisysteme ohne sendfile-Unterstützung.
+        Returns: Anzahl gesendeter Bytes
+        """
+        self.wfile.flush()
+        if self.use_sendfile and hasattr(os, 'sendfile'):
+            f.seek(offset)
+            try:
+                return self._sendfile_blocks(f, offset, length)
+            except (OSError, ValueError) as e:
+                # Verbindungsabbrüche und Timeouts nicht mit einem Fallback maskieren
+                if isinstance(e, (ConnectionError, TimeoutError)):
+                    raise
+                if f.tell() != offset:
+                    # sendfile hat bereits Daten geschrieben - Antwort ist nicht mehr konsistent
+                    raise
+                print(f"sendfile nicht möglich, nutze Kopierschleife: {e}")
+        return self._copy_file_range(f, offset, length)
+
+    def _sendfile_blocks(self, f, offset, length):
+        """sendfile() in Blöcken, damit blockierende Writes messbar sind"""
+        total_sent = 0
+        while total_sent < length:
+            block = min(self.send_block_size, length - total_sent)
+            self._advance_readahead(f, offset + total_sent, block, total_sent > 0)
+            # Vor dem Senden prüfen - danach liegt der Block ohnehin im Page-Cache
+            cause = self._stall_cause(f, offset + total_sent, block) if self.stats else None
+            started = time.monotonic()
+            sent = self.connection.sendfile(f, offset + total_sent, block)
+            self._record_write(sent, time.monotonic() - started, cause)
+            if not sent:
+                break
+            total_sent += sent
+        return total_sent
+
+    def _advance_readahead(self, f, offset, length, continued):
+        """Meldet den nächsten Block an den Read-Ahead, damit das Fenster mitläuft"""
+        if self.readahead:
+            self._readahead_hit = self.readahead.on_read(
+                self.client_address[0], f, offset, length, continued=continued)
+
+    @staticmethod
+    def _is_cached(f, offset, length):
+        """Liegt der Block im Page-Cache? Prüft erste und letzte Seite per RWF_NOWAIT
+
+        Returns: True/False, None wenn der Kernel die Abfrage nicht unterstützt
+        """
+        if not hasattr(os, 'RWF_NOWAIT'):
+            return None
+        probe = bytearray(1)
+        try:
+            for position in (offset, offset + length - 1):
+                if os.preadv(f.fileno(), [probe], position, os.RWF_NOWAIT) != 1:
+                    return False
+        except BlockingIOError:
+            return False
+        except OSError:
+            return None
+        return True
+
+    def _stall_cause(self, f, offset, length):
+        """Ursache, falls das Senden dieses Blocks blockiert: disk oder network"""
+        cached = self._is_cached(f, offset, length)
+        if cached is None:
+            # Ersatzweise: lag der Block im vorgeladenen Fenster?
+            cached = self._readahead_hit
+        if cached is None:
+            return 'unknown'
+        return 'network' if cached else 'disk'
+
+    def _record_write(self, nbytes, duration, cause='unknown'):
+        if not self.stats:
+            return
+        self.stats.record_write(self._connection_id, self.client_address[0], nbytes, duration, cause)
+
+    def _copy_file_range(self, f, offset, length):
+        """Fallback: kopiert den Bytebereich in 64-KB-Blöcken durch Python"""
+        f.seek(offset)
+        chunk_size = 65536 # 64KB
+        bytes_to_send = length
+        while bytes_to_send > 0:
+            sent = length - bytes_to_send
+            if sent % self.send_block_size == 0:
+                # Read-Ahead im gleichen Takt wie bei sendfile() weiterschieben
+                self._advance_readahead(f, offset + sent,
+                                        min(self.send_block_size, bytes_to_send), sent > 0)
+            read_started = time.monotonic()
+            data = f.read(min(chunk_size, bytes_to_send))
+            read_duration = time.monotonic() - read_started
+            if not data:
+                break
+            write_started = time.monotonic()
+            self.wfile.write(data)
+            write_duration = time.monotonic() - write_started
+            # Hier lassen sich Lese- und Schreibzeit direkt unterscheiden
+            self._record_write(len(data), read_duration + write_duration,
+                               'disk' if read_duration > write_duration else 'network')
+            bytes_to_send -= len(data)
+        return length - bytes_to_send
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTP-Server, der Verbindungen parallel in einem begrenzten Thread-Pool bedient
+
+    Ein langsamer Range-Request (z.B. der moov-Abruf am Dateiende) blockiert so
+    nicht mehr die übrigen Anfragen des Chromecast. Die Warteschlange ist
+    begrenzt: sind alle Worker belegt und max_queued Verbindungen eingereiht,
+    wird jede weitere mit 503 abgewiesen. server_close() verwirft eingereihte
+    Verbindungen und wartet bis zu close_timeout Sekunden auf laufende
+    Antworten, danach werden deren Sockets geschlossen.
+    """
+
+    request_queue_size = 32
+    close_timeout = 5.0
+
+    def __init__(self, server_address, handler_class, max_workers=16, max_queued=32):
+        super().__init__(server_address, handler_class)
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="http-worker")
+        self._connections = {}  # Socket -> Future (eingereiht oder in Arbeit)
+        self._connections_changed = threading.Condition()
+
+    def process_request(self, request, client_address):
+        """Übergibt die Verbindung an einen Worker statt sie selbst zu bedienen"""
+        with self._connections_changed:
+            if len(self._connections) >= self.max_workers + self.max_queued:
+                future = None
+            else:
+                try:
+                    future = self._executor.submit(self._process_request_worker,
+                                                   request, client_address)
+                except RuntimeError:
+                    # Executor wurde bereits beendet (Server fährt herunter)
+                    self.shutdown_request(request)
+                    return
+                self._connections[request] = future
+        if future is None:
+            self._reject(request)
+            return
+        future.add_done_callback(lambda f: self._connection_done(request, f))
+
+    def _reject(self, request):
+        """Überlastet: sofort 503 statt unbegrenzt einzureihen"""
+        print("⚠ HTTP-Server ausgelastet, Verbindung abgewiesen")
+        try:
+            request.settimeout(1.0)
+            request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 1\r\n"
+                            b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _connection_done(self, request, future):
+        with self._connections_changed:
+            self._connections.pop(request, None)
+            self._connections_changed.notify_all()
+        if future.cancelled():
+            # Eingereiht, aber nie bedient (server_close)
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        deadline = time.monotonic() + self.close_timeout
+        with self._connections_changed:
+            while self._connections:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._connections_changed.wait(remaining)
+            running = list(self._connections)
+        for request in running:
+            # Lange Antworten (z.B. ein ganzer Film) beenden, damit die Worker frei werden
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
@@ -0,0 +1,329 @@
+"""Konformitätstests für den Range-Server (RFC 7232/7233)
+
+Die HTTP-Tests laufen gegen einen echten Server auf 127.0.0.1, einmal mit
+sendfile() und einmal mit der Python-Kopierschleife.
+"""
+
+import http.client
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from streaming_server import (  # noqa: E402
+    MAX_BYTE_RANGES, MediaCatalog, PooledHTTPServer, RangeRequestHandler,
+    make_etag, parse_byte_ranges, parse_http_date,
+)
+
+
+# --- parse_byte_ranges ---
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-99', [(0, 99)]),
+    ('bytes=900-', [(900, 999)]),
+    ('bytes=-100', [(900, 999)]),
+    ('bytes=-5000', [(0, 999)]),
+    ('bytes=990-5000', [(990, 999)]),
+    ('bytes=0-9, 20-29', [(0, 9), (20, 29)]),
+    ('bytes=20-29,0-9', [(0, 9), (20, 29)]),
+    ('bytes=0-9,5-19', [(0, 19)]),
+    ('bytes=0-9,10-19', [(0, 19)]),
+    ('BYTES=0-0', [(0, 0)]),
+])
+def test_parse_byte_ranges_satisfiable(header, expected):
+    assert parse_byte_ranges(header, 1000) == expected
+
+
+@pytest.mark.parametrize('header', [
+    'items=0-9',
+    'bytes=',
+    'bytes=abc',
+    'bytes=9-0',
+    'bytes=-',
+    'bytes=0-9;10-19',
+])
+def test_parse_byte_ranges_invalid_is_ignored(header):
+    assert parse_byte_ranges(header, 1000) is None
+
+
+def test_parse_byte_ranges_unsatisfiable():
+    assert parse_byte_ranges('bytes=1000-', 1000) == []
+    assert parse_byte_ranges('bytes=-0', 1000) == []
+    assert parse_byte_ranges('bytes=0-', 0) == []
+
+
+def test_parse_byte_ranges_limits_range_count():
+    header = 'bytes=' + ','.join(f'{i * 10}-{i * 10}' for i in range(MAX_BYTE_RANGES + 1))
+    assert parse_byte_ranges(header, 10000) is None
+
+
+# --- Validatoren ---
+
+def test_make_etag_changes_with_size_and_mtime():
+    base = SimpleNamespace(st_ino=1, st_size=100, st_mtime_ns=5)
+    etag = make_etag(base)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert make_etag(SimpleNamespace(st_ino=1, st_size=101, st_mtime_ns=5)) != etag
+    assert make_etag(SimpleNamespace(st_ino=1, st_size=100, st_mtime_ns=6)) != etag
+    assert make_etag(SimpleNamespace(st_ino=1, st_size=100, st_mtime_ns=5)) == etag
+
+
+def test_parse_http_date():
+    assert parse_http_date('Sun, 06 Nov 1994 08:49:37 GMT') == 784111777
+    assert parse_http_date('Sunday, 06-Nov-94 08:49:37 GMT') == 784111777
+    assert parse_http_date('kein Datum') is None
+    assert parse_http_date('') is None
+
+
+# --- HTTP über einen echten Socket ---
+
+DATA = os.urandom(256 * 1024 + 17)
+SIZE = len(DATA)
+
+
+@pytest.fixture(scope='module')
+def media(tmp_path_factory):
+    path = tmp_path_factory.mktemp('media') / 'conformance.mp4'
+    path.write_bytes(DATA)
+    catalog = MediaCatalog()
+    return catalog, catalog.register(path)
+
+
+@pytest.fixture(scope='module', params=[True, False], ids=['sendfile', 'copy'])
+def server(request, media):
+    catalog, _ = media
+    handler_class = type('TestRequestHandler', (RangeRequestHandler,),
+                         {'use_sendfile': request.param,
+                          'catalog': catalog,
+                          'log_message': lambda self, *args: None})
+    server = PooledHTTPServer(('127.0.0.1', 0), handler_class, max_workers=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server, media):
+    _, entry = media
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+    sockets = []
+
+    def request(method='GET', headers=None, path=None):
+        conn.request(method, path or entry.url_path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        # http.client verbindet sich still neu - die Socket-Identität zählt
+        sockets.append(conn.sock)
+        return response, body
+
+    request.sockets = sockets
+    yield request
+    conn.close()
+
+
+def etag_of(client):
+    response, _ = client('HEAD')
+    return response.getheader('ETag')
+
+
+def test_full_get(client):
+    response, body = client()
+    assert response.status == 200
+    assert body == DATA
+    assert response.getheader('Accept-Ranges') == 'bytes'
+    assert response.getheader('ETag')
+    assert response.getheader('Last-Modified')
+
+
+def test_single_range(client):
+    response, body = client(headers={'Range': 'bytes=100-199'})
+    assert response.status == 206
+    assert body == DATA[100:200]
+    assert response.getheader('Content-Range') == f'bytes 100-199/{SIZE}'
+    assert response.getheader('Content-Length') == '100'
+
+
+def test_suffix_and_open_ended_ranges(client):
+    response, body = client(headers={'Range': 'bytes=-500'})
+    assert response.status == 206 and body == DATA[-500:]
+    response, body = client(headers={'Range': f'bytes={SIZE - 1000}-'})
+    assert response.status == 206 and body == DATA[SIZE - 1000:]
+
+
+def test_multi_range(client):
+    response, body = client(headers={'Range': 'bytes=0-9,1000-1099,-10'})
+    assert response.status == 206
+    content_type = response.getheader('Content-Type')
+    assert content_type.startswith('multipart/byteranges; boundary=')
+    assert int(response.getheader('Content-Length')) == len(body)
+
+    boundary = content_type.partition('boundary=')[2].encode('latin-1')
+    chunks = body.split(b'--' + boundary)
+    assert chunks[-1] == b'--\r\n'
+    parts = []
+    for chunk in chunks[1:-1]:
+        head, _, payload = chunk.partition(b'\r\n\r\n')
+        headers = dict(line.split(b': ', 1) for line in head.split(b'\r\n') if line)
+        parts.append((headers[b'Content-Range'].decode(), payload.removesuffix(b'\r\n')))
+    assert parts == [
+        (f'bytes 0-9/{SIZE}', DATA[0:10]),
+        (f'bytes 1000-1099/{SIZE}', DATA[1000:1100]),
+        (f'bytes {SIZE - 10}-{SIZE - 1}/{SIZE}', DATA[-10:]),
+    ]
+
+
+def test_overlapping_ranges_are_merged(client):
+    response, body = client(headers={'Range': 'bytes=0-9,5-19'})
+    assert response.status == 206
+    assert response.getheader('Content-Range') == f'bytes 0-19/{SIZE}'
+    assert body == DATA[0:20]
+
+
+def test_unsatisfiable_range(client):
+    response, body = client(headers={'Range': f'bytes={SIZE + 10}-'})
+    assert response.status == 416
+    assert response.getheader('Content-Range') == f'bytes */{SIZE}'
+    assert body == b''
+
+
+def test_invalid_range_is_ignored(client):
+    response, body = client(headers={'Range': 'bytes=abc'})
+    assert response.status == 200 and body == DATA
+
+
+def test_if_range(client):
+    etag = etag_of(client)
+    response, body = client(headers={'Range': 'bytes=100-199', 'If-Range': etag})
+    assert response.status == 206 and body == DATA[100:200]
+    # Anderer oder schwacher Validator: ganze Datei statt Teilbereich
+    for validator in ('"veraltet"', f'W/{etag}'):
+        response, body = client(headers={'Range': 'bytes=100-199', 'If-Range': validator})
+        assert response.status == 200 and body == DATA
+
+
+def test_if_range_with_date(client):
+    response, _ = client('HEAD')
+    last_modified = response.getheader('Last-Modified')
+    response, body = client(headers={'Range': 'bytes=0-9', 'If-Range': last_modified})
+    assert response.status == 206 and body == DATA[:10]
+    response, body = client(headers={'Range': 'bytes=0-9',
+                                     'If-Range': 'Sun, 06 Nov 1994 08:49:37 GMT'})
+    assert response.status == 200 and body == DATA
+
+
+def test_conditional_requests(client):
+    etag = etag_of(client)
+    response, body = client(headers={'If-None-Match': etag})
+    assert response.status == 304 and body == b''
+    assert response.getheader('ETag') == etag
+    response, body = client(headers={'If-None-Match': f'"anders", W/{etag}'})
+    assert response.status == 304
+    response, body = client(headers={'If-None-Match': '"anders"'})
+    assert response.status == 200 and body == DATA
+
+
+def test_head(client):
+    response, body = client('HEAD', headers={'Range': 'bytes=0-99'})
+    assert response.status == 206
+    assert body == b''
+    assert response.getheader('Content-Length') == '100'
+
+
+def test_unknown_media_is_404(client):
+    response, _ = client(path='/media/0000000000000000/fehlt.mp4')
+    assert response.status == 404
+
+
+def test_keep_alive_across_all_response_kinds(client):
+    etag = etag_of(client)
+    for headers in ({}, {'Range': 'bytes=0-9'}, {'Range': 'bytes=0-9,100-109'},
+                    {'Range': f'bytes={SIZE}-'}, {'If-None-Match': etag},
+                    {'Range': 'bytes=0-9', 'If-Range': '"veraltet"'}):
+        client(headers=headers)
+    client('HEAD')
+    response, body = client(headers={'Range': 'bytes=0-0'})
+    assert response.status == 206 and body == DATA[:1]
+    assert client.sockets[0] is not None
+    assert all(sock is client.sockets[0] for sock in client.sockets)
+
+
+def test_parallel_connections(server, media):
+    _, entry = media
+    results = []
+
+    def fetch():
+        conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+        conn.request('GET', entry.url_path, headers={'Range': 'bytes=1000-'})
+        results.append(conn.getresponse().read() == DATA[1000:])
+        conn.close()
+
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert results == [True] * 4
+    assert time.monotonic() - started < 10
+
+
+# --- Worker-Pool ---
+
+@pytest.fixture
+def small_server(media):
+    catalog, _ = media
+    handler_class = type('PoolRequestHandler', (RangeRequestHandler,),
+                         {'catalog': catalog, 'idle_timeout': 0.3,
+                          'log_message': lambda self, *args: None})
+    server = PooledHTTPServer(('127.0.0.1', 0), handler_class, max_workers=1, max_queued=1)
+    server.close_timeout = 0.5
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def raw_connection(server):
+    return socket.create_connection(('127.0.0.1', server.server_address[1]), timeout=5)
+
+
+def test_idle_keep_alive_connection_is_closed(small_server, media):
+    _, entry = media
+    with raw_connection(small_server) as sock:
+        sock.sendall(f'GET {entry.url_path} HTTP/1.1\r\nHost: x\r\nRange: bytes=0-0\r\n\r\n'.encode())
+        time.sleep(0.2)
+        assert sock.recv(65536).startswith(b'HTTP/1.1 206')
+        started = time.monotonic()
+        assert sock.recv(1) == b''
+        assert time.monotonic() - started < 2
+
+
+def test_overload_is_rejected_with_503(small_server):
+    busy = raw_connection(small_server)
+    queued = raw_connection(small_server)
+    time.sleep(0.1)
+    with raw_connection(small_server) as rejected:
+        assert rejected.recv(1024).startswith(b'HTTP/1.1 503')
+    busy.close()
+    queued.close()
+
+
+def test_server_close_drops_queued_connections(small_server):
+    busy = raw_connection(small_server)
+    queued = raw_connection(small_server)
+    time.sleep(0.1)
+    small_server.shutdown()
+    started = time.monotonic()
+    small_server.server_close()
+    assert time.monotonic() - started < 2
+    assert queued.recv(1) == b''
+    busy.close()
+    queued.close()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Encoding-Benchmark: Software-Encoding am Stück gegen paralleles Abschnitts-Encoding
+
+Aufruf: python3 tools/benchmark_encoding.py <Videodatei> [Sekunden]
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from videoplayer import ChunkedSoftwareEncoder  # noqa: E402
+
+
+def run_encoding_benchmark(input_path, seconds=180):
+    """Vergleicht Software-Encoding am Stück mit dem parallelen Abschnitts-Encoding
+
+    Kodiert die ersten seconds Sekunden von input_path rein auf der CPU.
+    """
+    missing = [tool for tool in ('ffmpeg', 'ffprobe') if not shutil.which(tool)]
+    if missing:
+        print(f"✗ Encoding-Benchmark braucht {' und '.join(missing)} im PATH")
+        return None
+    encoder = ChunkedSoftwareEncoder()
+    # Auch auf einem Kern den Abschnitts-Weg messen (dort ohne Parallelgewinn)
+    chunked_jobs = max(2, encoder.jobs)
+    print(f"=== Encoding-Benchmark ({seconds}s, {encoder.codec} {encoder.preset}, "
+          f"{os.cpu_count()} Kerne) ===")
+    if encoder.jobs < 2:
+        print("⚠ Zu wenige Kerne für paralleles Encoding - der Vergleich zeigt nur den Mehraufwand der Abschnitte")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        clip = Path(tmp_dir) / "clip.mkv"
+        subprocess.run(['ffmpeg', '-v', 'error', '-i', str(input_path), '-t', str(seconds),
+                        '-map', '0:v:0', '-map', '0:a:0?', '-c', 'copy', '-y', str(clip)],
+                       check=True)
+        timing = encoder.probe_timing(clip)
+        if not timing:
+            return None
+        results = {}
+        for label, jobs in (("Ein Prozess", 1), (f"{chunked_jobs} Prozesse", chunked_jobs)):
+            encoder_run = ChunkedSoftwareEncoder(encoder.codec, encoder.preset, jobs=jobs,
+                                                 chunk_seconds=max(10, seconds // (2 * jobs)))
+            encoder_run.MIN_CHUNKED_DURATION = 0
+            output = Path(tmp_dir) / f"out_{jobs}.mp4"
+            start = time.perf_counter()
+            if jobs == 1:
+                ok = encoder_run._encode_single(clip, output, None, None, None)
+            else:
+                ok = encoder_run.encode(clip, output)
+            if not ok:
+                print(f"  {label:<14} fehlgeschlagen")
+                continue
+            results[label] = timing[1] / (time.perf_counter() - start)
+            print(f"  {label:<14} {results[label]:6.2f}x Echtzeit")
+    if len(results) == 2:
+        single, chunked = results.values()
+        print(f"  Abschnitts-Encoding ist {chunked / single:.2f}x so schnell wie ein Prozess")
+    return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Aufruf: benchmark_encoding.py <Videodatei> [Sekunden]")
+        sys.exit(1)
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 180
+    run_encoding_benchmark(sys.argv[1], seconds)
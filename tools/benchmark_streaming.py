@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Streaming-Benchmark: sendfile() gegen die Python-Kopierschleife des Range-Servers
+
+Aufruf: python3 tools/benchmark_streaming.py [Größe in MB] [Durchläufe]
+"""
+
+import http.client
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from streaming_server import MediaCatalog, PooledHTTPServer, RangeRequestHandler  # noqa: E402
+
+
+def run_streaming_benchmark(size_mb=512, rounds=3):
+    """Vergleicht den Durchsatz von sendfile() und Python-Kopierschleife
+
+    Startet einen lokalen Server auf 127.0.0.1 und lädt eine temporäre Datei
+    mehrfach über einen echten Socket.
+    """
+    print(f"=== Streaming-Benchmark ({size_mb} MB, {rounds} Durchläufe) ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_file = Path(tmp_dir) / "benchmark.mp4"
+        block = os.urandom(1024 * 1024)
+        with open(test_file, 'wb') as f:
+            for _ in range(size_mb):
+                f.write(block)
+
+        catalog = MediaCatalog()
+        entry = catalog.register(test_file)
+
+        results = {}
+        for label, use_sendfile in (("sendfile", True), ("Python-Kopie", False)):
+            handler_class = type('BenchmarkRequestHandler', (RangeRequestHandler,),
+                                 {'use_sendfile': use_sendfile,
+                                  'catalog': catalog,
+                                  'log_message': lambda self, *args: None})
+            server = PooledHTTPServer(('127.0.0.1', 0), handler_class, max_workers=2)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+                buf = bytearray(1024 * 1024)
+                best = None
+                for _ in range(rounds):
+                    start = time.perf_counter()
+                    conn.request('GET', entry.url_path, headers={'Range': 'bytes=0-'})
+                    response = conn.getresponse()
+                    received = 0
+                    while True:
+                        n = response.readinto(buf)
+                        if not n:
+                            break
+                        received += n
+                    elapsed = time.perf_counter() - start
+                    if received != size_mb * 1024 * 1024:
+                        raise RuntimeError(f"Unvollständige Antwort: {received} Bytes")
+                    best = elapsed if best is None else min(best, elapsed)
+                conn.close()
+            finally:
+                server.shutdown()
+                server.server_close()
+            results[label] = size_mb / best
+            print(f"  {label:<14} {results[label]:8.1f} MB/s")
+
+    factor = results["sendfile"] / results["Python-Kopie"]
+    print(f"  sendfile ist {factor:.2f}x so schnell wie die Python-Kopie")
+    return results
+
+
+if __name__ == '__main__':
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    run_streaming_benchmark(size_mb, rounds)
@@ -16,21 +16,29 @@ from enum import Enum
 import hashlib
 from urllib.parse import urlparse, parse_qs, urlunparse, urlencode
 from pathlib import Path
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-from urllib.parse import quote
-from queue import Queue
+from queue import Queue, PriorityQueue
+from collections import deque
+from types import MappingProxyType
+import itertools
+import shutil
+import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 gi.require_version('Gst', '1.0')
 gi.require_version('GstVideo', '1.0')
 gi.require_version('GdkPixbuf', '2.0')
+gi.require_version('Pango', '1.0')
 
-from gi.repository import Gtk, Adw, Gst, GLib, GstVideo, Gdk, Gio, GdkPixbuf
+from gi.repository import Gtk, Adw, Gst, GLib, GstVideo, Gdk, Gio, GdkPixbuf, Pango
 import pychromecast
 from zeroconf import Zeroconf
 from pychromecast.controllers.youtube import YouTubeController
 
+from streaming_server import (HLSSession, ReadAheadManager, StreamingStats, MediaCatalog,
+                              RangeRequestHandler, PooledHTTPServer)
+
 class LoopMode(Enum):
     """Enum für die Wiederholungsmodi der Playlist."""
     NONE = 0
@@ -98,6 +106,352 @@ GPU_INFO = detect_gpu()
 GPU_TYPE = GPU_INFO['type']
 
 
+class FFmpegCapabilities:
+    """Einmalig ermittelte Fähigkeiten der installierten FFmpeg-Version
+
+    Pfad, Version, Encoder, Decoder, Hardware-Beschleunigungen und Filter
+    werden beim ersten Zugriff abgefragt und auf der Platte gespeichert.
+    Ändert sich die FFmpeg-Datei (Pfad, Größe oder mtime, z.B. nach einem
+    Update), wird neu ermittelt. Weitere Zugriffe kosten nur ein stat().
+    """
+
+    CACHE_VERSION = 1
+
+    def __init__(self, cache_file=None):
+        self.cache_file = cache_file or \
+            Path.home() / ".cache" / "video-chromecast-player" / "ffmpeg_capabilities.json"
+        self._lock = threading.Lock()
+        self._info = None
+
+    @staticmethod
+    def binary_identity():
+        """Pfad, Größe und mtime von ffmpeg und ffprobe (None wenn ffmpeg fehlt)"""
+        identity = {}
+        for name in ('ffmpeg', 'ffprobe'):
+            path = shutil.which(name)
+            if not path:
+                identity[name] = None
+                continue
+            stat = os.stat(path)
+            identity[name] = {'path': os.path.realpath(path), 'size': stat.st_size,
+                              'mtime_ns': stat.st_mtime_ns}
+        return identity if identity['ffmpeg'] else None
+
+    def get(self):
+        """Liefert die Fähigkeiten (ermittelt sie bei Bedarf neu)"""
+        identity = self.binary_identity()
+        with self._lock:
+            if self._info is not None and self._info.get('identity') == identity:
+                return self._info
+            info = self.load_cache()
+            if info.get('identity') != identity:
+                info = self.discover(identity)
+                self.save_cache(info)
+            self._info = info
+            return info
+
+    def load_cache(self):
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == self.CACHE_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def save_cache(self, info):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(info, f, indent=2)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print(f"Fehler beim Speichern der FFmpeg-Fähigkeiten: {e}")
+
+    @staticmethod
+    def _query(args):
+        try:
+            result = subprocess.run(['ffmpeg', '-hide_banner'] + args,
+                                    capture_output=True, text=True, timeout=10)
+            return result.stdout if result.returncode == 0 else ''
+        except (OSError, subprocess.TimeoutExpired):
+            return ''
+
+    @classmethod
+    def _parse_codecs(cls, output):
+        # Zeilen wie " V....D libx264   libx264 H.264 ..." nach der Trennlinie " ------"
+        names = []
+        for line in output.split(' ------', 1)[-1].splitlines():
+            match = re.match(r'^\s*[VASFXBD.]{6}\s+(\S+)', line)
+            if match:
+                names.append(match.group(1))
+        return sorted(names)
+
+    def discover(self, identity):
+        """Fragt FFmpeg einmalig nach Version und Fähigkeiten"""
+        info = {'version': self.CACHE_VERSION, 'identity': identity, 'ffmpeg_version': None,
+                'encoders': [], 'decoders': [], 'hwaccels': [], 'filters': []}
+        if identity is None:
+            print("ℹ FFmpeg nicht gefunden")
+            return info
+        first_line = self._query(['-version']).split('\n', 1)[0].split()
+        info['ffmpeg_version'] = first_line[2] if len(first_line) > 2 else None
+        info['encoders'] = self._parse_codecs(self._query(['-encoders']))
+        info['decoders'] = self._parse_codecs(self._query(['-decoders']))
+        info['hwaccels'] = [line.strip() for line in self._query(['-hwaccels']).splitlines()[1:]
+                            if line.strip()]
+        filters = []
+        for line in self._query(['-filters']).splitlines():
+            match = re.match(r'^\s*[TSC.]{3}\s+(\S+)\s+\S+->\S+', line)
+            if match:
+                filters.append(match.group(1))
+        info['filters'] = sorted(filters)
+        print(f"✓ FFmpeg {info['ffmpeg_version']}: {len(info['encoders'])} Encoder, "
+              f"{len(info['decoders'])} Decoder, {len(info['filters'])} Filter, "
+              f"Hardware: {', '.join(info['hwaccels']) or 'keine'}")
+        return info
+
+    def refresh(self):
+        """Verwirft den Cache und ermittelt die Fähigkeiten neu"""
+        with self._lock:
+            self._info = None
+            try:
+                self.cache_file.unlink()
+            except OSError:
+                pass
+        return self.get()
+
+    @property
+    def available(self):
+        return self.get()['identity'] is not None
+
+    @property
+    def ffprobe_available(self):
+        identity = self.get()['identity']
+        return bool(identity and identity.get('ffprobe'))
+
+    @property
+    def version(self):
+        return self.get()['ffmpeg_version']
+
+    def has_encoder(self, name):
+        return name in self.get()['encoders']
+
+    def has_decoder(self, name):
+        return name in self.get()['decoders']
+
+    def has_hwaccel(self, name):
+        return name in self.get()['hwaccels']
+
+    def has_filter(self, name):
+        return name in self.get()['filters']
+
+
+FFMPEG_CAPABILITIES = FFmpegCapabilities()
+
+
+class FFmpegProgress:
+    """Fortschritt eines FFmpeg-Laufs aus dem -progress-Protokoll
+
+    FFmpeg schreibt mit '-progress pipe:1' Blöcke aus key=value-Zeilen
+    (out_time_us, speed, fps, total_size, ...), die jeweils mit
+    progress=continue bzw. progress=end abschließen. Zusammen mit der per
+    ffprobe ermittelten Dauer ergeben sich Anteil, Restzeit und
+    Echtzeit-Faktor. Listener werden im GTK-Hauptthread aufgerufen, höchstens
+    alle min_interval Sekunden und immer beim Abschluss. Gefüttert wird aus
+    dem Lese-Thread, _lock schützt die Drosselung gegen den Hauptthread.
+    """
+
+    def __init__(self, label, duration=None, offset=0.0, min_interval=0.5):
+        self.label = label
+        self.duration = duration  # Gesamtdauer in Sekunden (None = unbekannt)
+        self.offset = offset  # Bereits erledigte Sekunden (fortgesetzte Läufe)
+        self.min_interval = min_interval
+        self.position = offset
+        self.speed = None
+        self.fps = None
+        self.total_size = None
+        self.state = 'running'  # running, done, failed, cancelled
+        self._block = {}
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._last_notify = 0.0
+        self._pending = False
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """callback(progress) wird im Hauptthread aufgerufen"""
+        self._listeners.append(callback)
+
+    def feed_line(self, line):
+        """Verarbeitet eine Ausgabezeile von FFmpeg (andere Zeilen werden ignoriert)"""
+        key, sep, value = line.strip().partition('=')
+        if not sep or ' ' in key:
+            return
+        if key != 'progress':
+            self._block[key] = value.strip()
+            return
+        block, self._block = self._block, {}
+        fields = {}
+        try:
+            if block.get('out_time_us', 'N/A') != 'N/A':
+                fields['position'] = self.offset + int(block['out_time_us']) / 1e6
+            if block.get('speed', 'N/A') not in ('N/A', ''):
+                fields['speed'] = float(block['speed'].rstrip('x'))
+            if block.get('fps'):
+                fields['fps'] = float(block['fps'])
+            if block.get('total_size', 'N/A') != 'N/A':
+                fields['total_size'] = int(block['total_size'])
+        except ValueError:
+            pass
+        self.update(**fields)
+
+    def update(self, position=None, speed=None, fps=None, total_size=None):
+        """Setzt Werte direkt (z.B. für zusammengefasste Abschnitts-Encodings)"""
+        if position is not None:
+            self.position = max(position, 0.0)
+        if speed is not None:
+            self.speed = speed
+        if fps is not None:
+            self.fps = fps
+        if total_size is not None:
+            self.total_size = total_size
+        self._notify()
+
+    def finish(self, state='done'):
+        self.state = state
+        self._notify(force=True)
+
+    @property
+    def finished(self):
+        return self.state != 'running'
+
+    @property
+    def fraction(self):
+        """Anteil 0.0-1.0 oder None ohne bekannte Dauer"""
+        if self.state == 'done':
+            return 1.0
+        if not self.duration:
+            return None
+        return min(1.0, self.position / self.duration)
+
+    @property
+    def realtime_factor(self):
+        """Sekunden Medien pro Sekunde Laufzeit (FFmpeg-Angabe, sonst gemessen)"""
+        if self.speed:
+            return self.speed
+        elapsed = time.monotonic() - self._started
+        if elapsed < 1.0 or self.position <= self.offset:
+            return None
+        return (self.position - self.offset) / elapsed
+
+    @property
+    def eta(self):
+        """Geschätzte Restzeit in Sekunden oder None"""
+        factor = self.realtime_factor
+        if not self.duration or not factor:
+            return None
+        return max(0.0, (self.duration - self.position) / factor)
+
+    def describe(self):
+        """Kurztext für Statuszeile und Fortschrittsbalken"""
+        if self.state == 'done':
+            return f"{self.label} abgeschlossen"
+        if self.state != 'running':
+            return f"{self.label} {'abgebrochen' if self.state == 'cancelled' else 'fehlgeschlagen'}"
+        fraction = self.fraction
+        if fraction is None:
+            return f"{self.label}... {VideoConverter.format_seconds(self.position)}"
+        text = f"{self.label}... {fraction * 100:.0f}%"
+        details = []
+        if self.realtime_factor:
+            details.append(f"{self.realtime_factor:.1f}x")
+        if self.eta is not None:
+            details.append(f"noch {VideoConverter.format_seconds(self.eta)}")
+        return f"{text} ({', '.join(details)})" if details else text
+
+    def _notify(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_notify < self.min_interval:
+                return
+            self._last_notify = now
+            if self._pending or not self._listeners:
+                return
+            # Höchstens ein ausstehender Aufruf im Hauptthread
+            self._pending = True
+        GLib.idle_add(self._dispatch)
+
+    def _dispatch(self):
+        with self._lock:
+            self._pending = False
+        for callback in list(self._listeners):
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Fehler im Fortschritts-Listener: {e}")
+        return False
+
+
+def run_ffmpeg(cmd, progress=None, cancel_event=None, on_start=None):
+    """Führt FFmpeg aus und wertet dabei '-progress pipe:1' aus
+
+    cancel_event beendet den Prozess - ein Wächter-Thread prüft es auch,
+    während FFmpeg nichts ausgibt. on_start(process) erhält den Prozess.
+    Returns: (Rückgabewert, letzte Ausgabezeilen für Fehlermeldungen);
+             Rückgabewert None, wenn FFmpeg nicht gestartet werden konnte
+    """
+    print(f"Führe aus: {' '.join(cmd)}")
+    try:
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            bufsize=1
+        )
+    except OSError as e:
+        print(f"✗ FFmpeg konnte nicht gestartet werden: {e}")
+        if progress:
+            progress.finish('failed')
+        return None, str(e)
+    if on_start:
+        on_start(process)
+
+    def watch_cancel():
+        while not watch_done.is_set():
+            if cancel_event.wait(0.5):
+                if process.poll() is None:
+                    process.terminate()
+                    try:
+                        process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+                return
+
+    watch_done = threading.Event()
+    if cancel_event:
+        threading.Thread(target=watch_cancel, name="ffmpeg-cancel", daemon=True).start()
+    tail = deque(maxlen=20)
+    try:
+        for line in iter(process.stdout.readline, ''):
+            if progress:
+                progress.feed_line(line)
+            if '=' not in line or ' ' in line.split('=', 1)[0].strip():
+                tail.append(line.rstrip())
+        process.wait()
+    finally:
+        watch_done.set()
+    if progress:
+        if cancel_event and cancel_event.is_set():
+            progress.finish('cancelled')
+        else:
+            progress.finish('done' if process.returncode == 0 else 'failed')
+    return process.returncode, '\n'.join(tail)
+
+
 class ConfigManager:
     """Verwaltet Anwendungseinstellungen"""
     
@@ -117,7 +471,24 @@ class ConfigManager:
             "equalizer": None,
             "hardware_acceleration": True,
             "auto_convert_mkv": True,
+            "progressive_casting": True,
+            "adaptive_bitrate": True,
+            "audio_only_for_speakers": True,
+            "hls_for_reencode": True,
+            "readahead_enabled": True,
+            "readahead_window_mb": 8,
+            "readahead_keep_behind_mb": 16,
+            "readahead_drop_behind": True,
+            "readahead_background": True,
             "cache_size_gb": 10,
+            "encoder_mode": "auto",
+            "software_codec": "libx264",
+            "software_preset": "veryfast",
+            "preconvert_next": 2,
+            "preconvert_workers": 1,
+            "cast_warm_session": True,
+            "cast_session_idle_minutes": 10,
+            "cast_preconnect": True,
             "keyboard_shortcuts": {
                 "play_pause": "space",
                 "fullscreen": "F11",
@@ -325,83 +696,1644 @@ class RecentFilesManager:
         self.save_recent_files()
 
 
+class BandwidthManager:
+    """Merkt sich die gemessene Bandbreite zu jedem Cast-Gerät (per UUID)
+
+    Gemessen wird am Streaming-Server: beim Start einer Wiedergabe (der
+    Receiver füllt seinen Puffer so schnell die Verbindung erlaubt) und
+    während BUFFERING-Phasen. Daraus wird die Stufe der Bitrate-Leiter für
+    künftige Transkodierungen gewählt.
+    """
+
+    # Von hoch nach niedrig; video_kbps entspricht -b:v
+    BITRATE_LADDER = [
+        {'name': '1080p-high', 'height': 1080, 'video_kbps': 8000},
+        {'name': '1080p', 'height': 1080, 'video_kbps': 5000},
+        {'name': '720p', 'height': 720, 'video_kbps': 3000},
+        {'name': '540p', 'height': 540, 'video_kbps': 1800},
+        {'name': '360p', 'height': 360, 'video_kbps': 800},
+    ]
+    DEFAULT_RUNG = '1080p'  # Ohne Messung wie bisher: 5 Mbit/s
+    AUDIO_KBPS = 192
+    HEADROOM = 1.5  # Verbindung muss Bitrate × HEADROOM schaffen
+    SMOOTHING = 0.3  # Gewicht neuer Messungen (EWMA)
+
+    def __init__(self):
+        self.bandwidth_dir = Path.home() / ".config" / "video-chromecast-player"
+        self.bandwidth_file = self.bandwidth_dir / "device_bandwidth.json"
+        self.bandwidth_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.devices = self.load_bandwidth()
+
+    def load_bandwidth(self):
+        """Lädt gespeicherte Messwerte"""
+        if self.bandwidth_file.exists():
+            try:
+                with open(self.bandwidth_file, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Fehler beim Laden der Bandbreiten: {e}")
+        return {}
+
+    def save_bandwidth(self):
+        """Speichert Messwerte"""
+        try:
+            with open(self.bandwidth_file, 'w') as f:
+                json.dump(self.devices, f, indent=2)
+        except Exception as e:
+            print(f"Fehler beim Speichern der Bandbreiten: {e}")
+
+    def record_sample(self, device_uuid, bits_per_second, source='playback', limit=False):
+        """Verbucht eine Durchsatzmessung
+
+        Args:
+            source: 'probe' (Start der Wiedergabe) oder 'playback' (BUFFERING)
+            limit: True wenn Netzwerk-Stalls auftraten - die Messung ist dann
+                   eine Obergrenze und senkt die Schätzung sofort
+        """
+        if not device_uuid or bits_per_second <= 0:
+            return
+        key = str(device_uuid)
+        with self._lock:
+            entry = self.devices.get(key)
+            if entry is None:
+                entry = {'bits_per_second': bits_per_second, 'samples': 0}
+            elif limit:
+                entry['bits_per_second'] = min(entry['bits_per_second'], bits_per_second)
+            else:
+                entry['bits_per_second'] = (
+                    (1 - self.SMOOTHING) * entry['bits_per_second'] + self.SMOOTHING * bits_per_second
+                )
+            entry['samples'] += 1
+            entry['source'] = source
+            entry['timestamp'] = time.time()
+            self.devices[key] = entry
+            self.save_bandwidth()
+        print(f"ℹ Bandbreite {key[:8]}: {entry['bits_per_second'] / 1e6:.1f} Mbit/s ({source})")
+
+    def get_bandwidth(self, device_uuid):
+        """Geschätzte Bandbreite in Bit/s oder None ohne Messung"""
+        if not device_uuid:
+            return None
+        entry = self.devices.get(str(device_uuid))
+        return entry['bits_per_second'] if entry else None
+
+    def select_rung(self, device_uuid):
+        """Wählt die höchste Stufe der Bitrate-Leiter, die die Verbindung trägt"""
+        bandwidth = self.get_bandwidth(device_uuid)
+        if bandwidth is None:
+            return next(r for r in self.BITRATE_LADDER if r['name'] == self.DEFAULT_RUNG)
+        for rung in self.BITRATE_LADDER:
+            if (rung['video_kbps'] + self.AUDIO_KBPS) * 1000 * self.HEADROOM <= bandwidth:
+                return rung
+        return self.BITRATE_LADDER[-1]
+
+
+class DeviceCapabilityRegistry:
+    """Kennt die Codec-Fähigkeiten der Cast-Geräte (per Modellname)
+
+    Reihenfolge: eingebaute Profile -> Benutzer-Overrides aus
+    device_capabilities.json -> aus fehlgeschlagenen Ladevorgängen gelernte
+    Einschränkungen. Unbekannte Modelle werden wie ein Chromecast behandelt.
+    """
+
+    BASELINE = {
+        'containers': ['mp4', 'webm'],
+        'video_codecs': ['h264', 'vp8'],
+        'audio_codecs': ['aac', 'mp3', 'opus', 'vorbis'],
+        'h264_max_level': 41,
+        'max_height': 1080,
+        'hdr': False,
+        'max_audio_channels': 2,
+        'video': True,
+    }
+
+    # Modellname (Teilstring, ohne Groß-/Kleinschreibung) -> Abweichungen von BASELINE
+    BUILTIN_PROFILES = {
+        'chromecast ultra': {
+            'video_codecs': ['h264', 'hevc', 'vp8', 'vp9'],
+            'audio_codecs': ['aac', 'mp3', 'opus', 'vorbis', 'ac3', 'eac3'],
+            'h264_max_level': 51, 'max_height': 2160, 'hdr': True, 'max_audio_channels': 8,
+        },
+        'google tv': {
+            'containers': ['mp4', 'webm', 'mkv'],
+            'video_codecs': ['h264', 'hevc', 'vp8', 'vp9', 'av1'],
+            'audio_codecs': ['aac', 'mp3', 'opus', 'vorbis', 'flac', 'ac3', 'eac3'],
+            'h264_max_level': 51, 'max_height': 2160, 'hdr': True, 'max_audio_channels': 8,
+        },
+        # Chromecast mit Google TV (HD): HEVC/AV1 und HDR, aber höchstens 1080p
+        'chromecast hd': {
+            'containers': ['mp4', 'webm', 'mkv'],
+            'video_codecs': ['h264', 'hevc', 'vp8', 'vp9', 'av1'],
+            'audio_codecs': ['aac', 'mp3', 'opus', 'vorbis', 'flac', 'ac3', 'eac3'],
+            'h264_max_level': 42, 'max_height': 1080, 'hdr': True, 'max_audio_channels': 8,
+        },
+        'shield': {
+            'containers': ['mp4', 'webm', 'mkv'],
+            'video_codecs': ['h264', 'hevc', 'vp8', 'vp9'],
+            'audio_codecs': ['aac', 'mp3', 'opus', 'vorbis', 'flac', 'ac3', 'eac3'],
+            'h264_max_level': 51, 'max_height': 2160, 'hdr': True, 'max_audio_channels': 8,
+        },
+        'mibox': {
+            'containers': ['mp4', 'webm', 'mkv'],
+            'video_codecs': ['h264', 'hevc', 'vp8', 'vp9'],
+            'audio_codecs': ['aac', 'mp3', 'opus', 'vorbis', 'ac3', 'eac3'],
+            'h264_max_level': 51, 'max_height': 2160, 'hdr': True, 'max_audio_channels': 8,
+        },
+        'nest hub': {
+            'video_codecs': ['h264', 'vp8', 'vp9'],
+            'max_height': 720,
+        },
+    }
+
+    # Cast-Typ -> Abweichungen (Lautsprecher und Gruppen haben kein Bild)
+    AUDIO_ONLY = {'video': False, 'video_codecs': []}
+
+    # Alle Container -> MIME-Type
+    CONTAINER_MIME_TYPES = {'mp4': 'video/mp4', 'webm': 'video/webm', 'mkv': 'video/x-matroska'}
+
+    def __init__(self):
+        self.capabilities_dir = Path.home() / ".config" / "video-chromecast-player"
+        self.capabilities_file = self.capabilities_dir / "device_capabilities.json"
+        self.capabilities_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        data = self.load_capabilities()
+        # overrides: vom Benutzer gepflegt, learned: automatisch ermittelt
+        self.overrides = data.get('overrides', {})
+        self.learned = data.get('learned', {})
+
+    def load_capabilities(self):
+        """Lädt Overrides und gelernte Einschränkungen"""
+        if self.capabilities_file.exists():
+            try:
+                with open(self.capabilities_file, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Fehler beim Laden der Geräte-Fähigkeiten: {e}")
+        return {}
+
+    def save_capabilities(self):
+        """Speichert Overrides und gelernte Einschränkungen"""
+        try:
+            with open(self.capabilities_file, 'w') as f:
+                json.dump({'overrides': self.overrides, 'learned': self.learned}, f, indent=2)
+        except Exception as e:
+            print(f"Fehler beim Speichern der Geräte-Fähigkeiten: {e}")
+
+    def get_capabilities(self, model_name, cast_type=None):
+        """Gibt die Fähigkeiten eines Modells als dict zurück"""
+        caps = dict(self.BASELINE)
+        model = (model_name or '').lower()
+
+        # Spezifischstes eingebautes Profil (längster passender Teilstring)
+        matches = [key for key in self.BUILTIN_PROFILES if key in model]
+        if matches:
+            caps.update(self.BUILTIN_PROFILES[max(matches, key=len)])
+        if cast_type in ('audio', 'group'):
+            caps.update(self.AUDIO_ONLY)
+
+        with self._lock:
+            caps.update(self.overrides.get(model_name or '', {}))
+            learned = self.learned.get(model_name or '', {})
+            for codec in learned.get('unsupported_video', []):
+                caps['video_codecs'] = [c for c in caps['video_codecs'] if c != codec]
+            for codec in learned.get('unsupported_audio', []):
+                caps['audio_codecs'] = [c for c in caps['audio_codecs'] if c != codec]
+            if 'max_audio_channels' in learned:
+                caps['max_audio_channels'] = min(caps['max_audio_channels'], learned['max_audio_channels'])
+        return caps
+
+    def get_cast_profile(self, model_name, cast_type=None):
+        """Baut das Profil für VideoConverter.plan_cast_conversion"""
+        return self.profile_from_capabilities(self.get_capabilities(model_name, cast_type))
+
+    @classmethod
+    def profile_from_capabilities(cls, caps):
+        """Übersetzt Fähigkeiten in Codec-Mengen pro Container"""
+        video_codecs = set(caps['video_codecs'])
+        audio_codecs = set(caps['audio_codecs'])
+        pixel_formats = {'yuv420p', 'yuvj420p'}
+        if caps['hdr']:
+            pixel_formats |= {'yuv420p10le', 'p010le'}
+        containers = {c: cls.CONTAINER_MIME_TYPES[c] for c in caps['containers']}
+        return {
+            'containers': containers,
+            # WebM erlaubt nur VP8/VP9/AV1 und Opus/Vorbis
+            'video_codecs': {
+                'mp4': video_codecs - {'vp8'},
+                'webm': video_codecs & {'vp8', 'vp9', 'av1'},
+                'mkv': video_codecs,
+            },
+            'audio_codecs': {
+                'mp4': audio_codecs - {'opus', 'vorbis', 'flac'},
+                'webm': audio_codecs & {'opus', 'vorbis'},
+                'mkv': audio_codecs,
+            },
+            'h264_profiles': {'Baseline', 'Constrained Baseline', 'Main', 'High'},
+            'h264_max_level': caps['h264_max_level'],
+            'pixel_formats': pixel_formats,
+            'max_audio_channels': caps['max_audio_channels'],
+            'max_height': caps['max_height'],
+        }
+
+    def mime_type_for(self, path, model_name, cast_type=None):
+        """MIME-Type für eine Datei, sofern das Gerät den Container abspielt"""
+        suffix = Path(path).suffix.lower().lstrip('.')
+        container = {'m4v': 'mp4', 'mov': 'mp4'}.get(suffix, suffix)
+        if container in self.get_capabilities(model_name, cast_type)['containers']:
+            return self.CONTAINER_MIME_TYPES[container]
+        return None
+
+    def record_load_failure(self, model_name, media_info):
+        """Lernt aus einem fehlgeschlagenen Ladevorgang
+
+        Nur Eigenschaften jenseits von BASELINE werden als nicht unterstützt
+        markiert - H.264/AAC-Stereo läuft auf jedem Gerät.
+        """
+        if not model_name or not media_info:
+            return
+        with self._lock:
+            learned = self.learned.setdefault(model_name, {})
+            video_codec = media_info.get('video_codec')
+            audio_codec = media_info.get('audio_codec')
+            if video_codec and video_codec not in self.BASELINE['video_codecs']:
+                learned.setdefault('unsupported_video', [])
+                if video_codec not in learned['unsupported_video']:
+                    learned['unsupported_video'].append(video_codec)
+            if audio_codec and audio_codec not in self.BASELINE['audio_codecs']:
+                learned.setdefault('unsupported_audio', [])
+                if audio_codec not in learned['unsupported_audio']:
+                    learned['unsupported_audio'].append(audio_codec)
+            if (media_info.get('audio_channels') or 0) > self.BASELINE['max_audio_channels']:
+                learned['max_audio_channels'] = self.BASELINE['max_audio_channels']
+            if not learned:
+                del self.learned[model_name]
+                return
+            self.save_capabilities()
+        print(f"ℹ Gelernt für '{model_name}': {learned}")
+
+
+class ProgressiveFile:
+    """Eine Datei, die noch geschrieben wird (z.B. laufende fMP4-Konvertierung)
+
+    Der HTTP-Server liefert sie bereits während des Schreibens aus und wartet
+    bei Anfragen hinter dem aktuellen Schreibstand, bis die Daten vorliegen.
+    Mehrere Verbraucher (Streaming, Vorab-Konvertierung) teilen sich einen
+    Lauf; jeder meldet sich mit acquire() an und mit release() ab. Erst wenn
+    der letzte abspringt, wird die Konvertierung abgebrochen.
+    """
+
+    def __init__(self, path):
+        self._path = str(path)
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+        self._consumers = 0
+        self.failed = False
+        self.cancelled = False
+        self.process = None  # FFmpeg-Prozess, solange er läuft
+
+    @property
+    def path(self):
+        with self._lock:
+            return self._path
+
+    def available_bytes(self):
+        """Anzahl bereits geschriebener Bytes"""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def is_complete(self):
+        return self._finished.is_set()
+
+    def finish(self, final_path=None, success=True):
+        """Markiert die Datei als fertig (optional unter neuem Pfad)"""
+        with self._lock:
+            if final_path:
+                self._path = str(final_path)
+            self.failed = not success
+        self._finished.set()
+
+    def wait_for(self, offset, timeout):
+        """Wartet bis mehr als `offset` Bytes vorliegen oder die Datei fertig ist
+
+        Returns: True wenn Daten ab `offset` lesbar sind
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.available_bytes() > offset:
+                return True
+            if self._finished.is_set():
+                return not self.failed and self.available_bytes() > offset
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._finished.wait(min(0.2, remaining))
+
+    def wait_complete(self, timeout=None):
+        """Wartet bis die Konvertierung beendet ist; True bei Erfolg"""
+        self._finished.wait(timeout)
+        return self._finished.is_set() and not self.failed
+
+    def acquire(self):
+        """Meldet einen Verbraucher an, der den Lauf am Leben hält"""
+        with self._lock:
+            self._consumers += 1
+
+    def release(self):
+        """Meldet einen Verbraucher ab; der letzte bricht eine unfertige Konvertierung ab"""
+        with self._lock:
+            self._consumers = max(0, self._consumers - 1)
+            last = self._consumers == 0
+        if last and not self.is_complete():
+            self.cancel()
+
+    def cancel(self):
+        """Bricht die laufende Konvertierung ab (unabhängig von anderen Verbrauchern)"""
+        self.cancelled = True
+        process = self.process
+        if process and process.poll() is None:
+            process.terminate()
+
+    def wait_until_playable(self, min_bytes=2 * 1024 * 1024, timeout=60):
+        """Wartet bis genug Fragmente für den Wiedergabestart geschrieben sind"""
+        if not self.wait_for(min_bytes - 1, timeout):
+            # Kurze Videos können kleiner als min_bytes sein
+            return self.is_complete() and not self.failed
+        return not self.failed
+
+
+class ConversionCacheIndex:
+    """Inhaltsadressierter Index der Konvertierungs-Cache-Dateien
+
+    Der Schlüssel einer Quelldatei ergibt sich aus Größe und einem Hash über
+    Stichproben von Anfang, Mitte und Ende - unabhängig von Pfad und Name.
+    Verschobene, umbenannte oder kopierte Dateien finden so ihre bereits
+    konvertierte Fassung. Ein Schnellpfad über Gerät/Inode/Größe/mtime
+    vermeidet das erneute Hashen unveränderter Dateien. Reine Zugriffe
+    (last_access) werden nur im Speicher vermerkt und gesammelt nach
+    SAVE_DELAY bzw. spätestens mit flush() beim Beenden geschrieben.
+    """
+
+    SAMPLE_SIZE = 64 * 1024
+    INDEX_VERSION = 1
+    SAVE_DELAY = 30.0  # Sekunden bis zum Speichern geänderter Zugriffszeiten
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.index_file = self.cache_dir / "cache_index.json"
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._save_timer = None
+        data = self.load_index()
+        self.entries = data.get('entries', {})  # Dateiname im Cache -> Metadaten
+        self.sources = data.get('sources', {})  # "dev:ino" -> Identität + Schlüssel
+
+    def load_index(self):
+        """Lädt den Index (leer bei fehlender oder veralteter Datei)"""
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == self.INDEX_VERSION:
+                    return data
+            except Exception as e:
+                print(f"Fehler beim Laden des Cache-Index: {e}")
+        return {}
+
+    def save_index(self):
+        """Speichert den Index atomar (Aufrufer hält _lock)"""
+        self._dirty = False
+        tmp_file = self.index_file.with_suffix('.json.tmp')
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump({'version': self.INDEX_VERSION, 'entries': self.entries,
+                           'sources': self.sources}, f, indent=2)
+            os.replace(tmp_file, self.index_file)
+        except Exception as e:
+            print(f"Fehler beim Speichern des Cache-Index: {e}")
+
+    def schedule_save(self):
+        """Speichert verzögert; mehrere Änderungen ergeben einen Schreibvorgang (Aufrufer hält _lock)"""
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.SAVE_DELAY, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Schreibt ausstehende Änderungen sofort (z.B. beim Beenden)"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._dirty:
+                self.save_index()
+
+    @classmethod
+    def sample_hash(cls, path, size):
+        """SHA-1 über Anfang, Mitte und Ende der Datei"""
+        digest = hashlib.sha1(str(size).encode())
+        with open(path, 'rb') as f:
+            if size <= 3 * cls.SAMPLE_SIZE:
+                digest.update(f.read())
+            else:
+                for offset in (0, size // 2 - cls.SAMPLE_SIZE // 2, size - cls.SAMPLE_SIZE):
+                    f.seek(offset)
+                    digest.update(f.read(cls.SAMPLE_SIZE))
+        return digest.hexdigest()
+
+    def source_identity(self, input_path):
+        """Ermittelt Identität und Inhaltsschlüssel einer Quelldatei
+
+        Returns: dict mit path, size, dev, ino, mtime_ns, sample_hash, key
+        """
+        input_file = Path(input_path).resolve()
+        stat = input_file.stat()
+        inode_key = f"{stat.st_dev}:{stat.st_ino}"
+
+        with self._lock:
+            known = self.sources.get(inode_key)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            sample_hash = known['sample_hash']
+        else:
+            sample_hash = self.sample_hash(input_file, stat.st_size)
+
+        identity = {
+            'path': str(input_file),
+            'size': stat.st_size,
+            'dev': stat.st_dev,
+            'ino': stat.st_ino,
+            'mtime_ns': stat.st_mtime_ns,
+            'sample_hash': sample_hash,
+            'key': hashlib.sha1(f"{stat.st_size}:{sample_hash}".encode()).hexdigest()[:20],
+        }
+        if known != identity:
+            with self._lock:
+                self.sources[inode_key] = identity
+                self.save_index()
+        return identity
+
+    def output_path(self, input_path, suffix='.mp4'):
+        """Pfad der Cache-Datei für eine Quelldatei (z.B. suffix '.mp4', '_a0.m4a')"""
+        return self.cache_dir / f"{self.source_identity(input_path)['key']}{suffix}"
+
+    def lookup(self, input_path, suffix='.mp4'):
+        """Gibt den Pfad einer fertigen Cache-Datei zurück oder None"""
+        name = self.output_path(input_path, suffix).name
+        with self._lock:
+            entry = self.entries.get(name)
+            if not entry:
+                return None
+            output = self.cache_dir / name
+            try:
+                intact = output.stat().st_size == entry['output_size']
+            except OSError:
+                intact = False  # Datei wurde außerhalb gelöscht
+            if not intact:
+                # Gelöscht oder verändert (z.B. abgeschnitten) - kein Cache-Treffer
+                del self.entries[name]
+                self.save_index()
+                return None
+            entry['last_access'] = time.time()
+            self.schedule_save()
+        return output
+
+    def record(self, input_path, output_path, plan=None, encoder=None):
+        """Trägt eine fertige Konvertierung in den Index ein"""
+        output = Path(output_path)
+        identity = self.source_identity(input_path)
+        with self._lock:
+            self.entries[output.name] = {
+                'source': identity,
+                'plan': plan['action'] if isinstance(plan, dict) else plan,
+                'encoder': encoder,
+                'output_size': output.stat().st_size,
+                'created': time.time(),
+                'last_access': time.time(),
+            }
+            self.save_index()
+
+    def touch(self, name):
+        """Aktualisiert den letzten Zugriff eines Eintrags"""
+        with self._lock:
+            entry = self.entries.get(name)
+            if entry:
+                entry['last_access'] = time.time()
+                self.schedule_save()
+
+    def set_pinned(self, name, pinned):
+        """Setzt das Pin-Flag eines Eintrags"""
+        with self._lock:
+            entry = self.entries.get(name)
+            if entry:
+                entry['pinned'] = bool(pinned)
+                self.save_index()
+
+    def snapshot(self):
+        """Kopie aller Einträge (Dateiname -> Metadaten)"""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self.entries.items()}
+
+    def remove(self, name):
+        """Entfernt einen Eintrag (Datei wurde gelöscht)"""
+        with self._lock:
+            entry = self.entries.pop(name, None)
+            if entry is None:
+                return
+            # Quell-Identitäten ohne verbleibende Cache-Dateien vergessen
+            used_keys = {e['source']['key'] for e in self.entries.values()}
+            self.sources = {k: v for k, v in self.sources.items() if v['key'] in used_keys}
+            self.save_index()
+
+    def total_size(self):
+        """Summe der Ausgabegrößen laut Index (ohne stat)"""
+        with self._lock:
+            return sum(entry['output_size'] for entry in self.entries.values())
+
+
+class ConversionCacheManager:
+    """LRU-Verwaltung des Konvertierungs-Caches mit Größenbudget
+
+    Nutzt den ConversionCacheIndex: Zugriffe (Cache-Treffer und Auslieferung
+    per HTTP) aktualisieren last_access, ein Hintergrund-Thread entfernt die
+    am längsten ungenutzten Einträge, bis das Budget eingehalten wird.
+    Angepinnte Einträge werden nie entfernt. HLS-Segmentordner zählen mit,
+    ihr letzter Zugriff ist die Änderungszeit des Ordners.
+    """
+
+    MEDIA_SUFFIXES = ('.mp4', '.m4a', '.vtt')
+    ORPHAN_MIN_AGE = 3600  # Dateien ohne Index-Eintrag erst nach 1 h löschen
+    RESUME_MAX_AGE = 7 * 24 * 3600  # Angefangene Konvertierungen eine Woche aufheben
+
+    def __init__(self, cache_dir, budget_bytes, check_interval=300):
+        self.cache_dir = Path(cache_dir)
+        self.index = ConversionCacheIndex(self.cache_dir)
+        self.budget_bytes = budget_bytes
+        self.check_interval = check_interval
+        # Callable() -> Namen der Cache-Dateien, die gerade entstehen (VideoConverter)
+        self.busy_files = None
+        self._stats_lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes_evicted': 0, 'orphans_removed': 0}
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._eviction_loop, daemon=True)
+        self._thread.start()
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def lookup(self, input_path, suffix='.mp4'):
+        """Wie ConversionCacheIndex.lookup, zählt Treffer und Fehlgriffe"""
+        cached = self.index.lookup(input_path, suffix)
+        self._count('hits' if cached else 'misses')
+        return cached
+
+    def record(self, input_path, output_path, plan=None, encoder=None):
+        """Trägt eine Konvertierung ein und prüft danach das Budget"""
+        self.index.record(input_path, output_path, plan, encoder)
+        self.request_eviction()
+
+    def touch_path(self, path):
+        """Markiert eine ausgelieferte Cache-Datei als benutzt"""
+        path = Path(path)
+        if path.parent != self.cache_dir:
+            return
+        self.index.touch(path.name)
+
+    def set_pinned(self, name, pinned):
+        """Pinnt einen Eintrag (wird nie automatisch entfernt)"""
+        self.index.set_pinned(name, pinned)
+
+    def set_budget(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.request_eviction()
+
+    def request_eviction(self):
+        """Weckt den Hintergrund-Thread für einen Durchlauf"""
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+        self.index.flush()
+
+    def _eviction_loop(self):
+        while not self._stopped:
+            try:
+                self.remove_orphans()
+                self.evict_to_budget()
+            except Exception as e:
+                print(f"✗ Cache-Bereinigung fehlgeschlagen: {e}")
+            self._wakeup.wait(self.check_interval)
+            self._wakeup.clear()
+
+    def _hls_dirs(self):
+        """HLS-Segmentordner als (Name, Größe, letzter Zugriff)"""
+        hls_root = self.cache_dir / "hls"
+        result = []
+        if not hls_root.is_dir():
+            return result
+        for entry in os.scandir(hls_root):
+            if entry.is_dir():
+                size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+                result.append((f"hls/{entry.name}", size, entry.stat().st_mtime))
+        return result
+
+    def list_entries(self):
+        """Alle Einträge für die Cache-Ansicht, zuletzt benutzte zuerst"""
+        entries = [
+            {'name': name, 'source': entry['source']['path'], 'size': entry['output_size'],
+             'last_access': entry['last_access'], 'pinned': entry.get('pinned', False),
+             'plan': entry.get('plan'), 'encoder': entry.get('encoder')}
+            for name, entry in self.index.snapshot().items()
+        ]
+        entries += [
+            {'name': name, 'source': 'HLS-Segmente', 'size': size, 'last_access': mtime,
+             'pinned': False, 'plan': 'hls', 'encoder': None}
+            for name, size, mtime in self._hls_dirs()
+        ]
+        entries.sort(key=lambda e: e['last_access'], reverse=True)
+        return entries
+
+    def evict_to_budget(self):
+        """Entfernt die am längsten ungenutzten Einträge bis zum Budget"""
+        candidates = self.list_entries()
+        total = sum(e['size'] for e in candidates)
+        if total <= self.budget_bytes:
+            return
+        # Frisch genutzte HLS-Ordner gehören vermutlich zu laufenden Sitzungen
+        now = time.time()
+        for entry in reversed(candidates):
+            if total <= self.budget_bytes:
+                break
+            if entry['pinned'] or (entry['plan'] == 'hls' and now - entry['last_access'] < 3600):
+                continue
+            if self.remove_entry(entry['name']):
+                total -= entry['size']
+                self._count('evictions')
+                self._count('bytes_evicted', entry['size'])
+                print(f"✗ Cache-Eintrag entfernt (Budget): {entry['name']} ({entry['size'] / 1024**2:.1f} MB)")
+
+    def remove_orphans(self):
+        """Löscht Dateien ohne Index-Eintrag (z.B. alte Cache-Namen, Abbrüche)
+
+        Dateien laufender Konvertierungen (Ziel, .part.* und .tmp.*) bleiben
+        unabhängig vom Alter liegen - lange Läufe überschreiten ORPHAN_MIN_AGE.
+        """
+        known = set(self.index.snapshot())
+        busy = set(self.busy_files()) if self.busy_files else set()
+        now = time.time()
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file() or not entry.name.endswith(self.MEDIA_SUFFIXES) or entry.name in known:
+                continue
+            if entry.name.replace('.part.', '.').replace('.tmp.', '.') in busy:
+                continue
+            try:
+                if now - entry.stat().st_mtime < self.ORPHAN_MIN_AGE:
+                    continue  # evtl. Lauf einer anderen Instanz
+                os.unlink(entry.path)
+                self._count('orphans_removed')
+                print(f"✗ Verwaiste Cache-Datei gelöscht: {entry.name}")
+            except OSError:
+                pass
+        # Reste abgebrochener Abschnitts-Encodings (ChunkedSoftwareEncoder)
+        # und angefangene, fortsetzbare Konvertierungen (ConversionJournal)
+        for subdir, max_age in (("chunks", self.ORPHAN_MIN_AGE), ("resume", self.RESUME_MAX_AGE)):
+            root = self.cache_dir / subdir
+            if not root.is_dir():
+                continue
+            for entry in os.scandir(root):
+                if entry.is_dir() and now - entry.stat().st_mtime >= max_age:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    self._count('orphans_removed')
+
+    def remove_entry(self, name):
+        """Löscht einen Eintrag samt Datei bzw. HLS-Ordner"""
+        target = self.cache_dir / name
+        try:
+            if name.startswith('hls/'):
+                shutil.rmtree(target, ignore_errors=True)
+            elif target.exists():
+                target.unlink()
+        except OSError as e:
+            print(f"✗ Cache-Eintrag konnte nicht gelöscht werden: {e}")
+            return False
+        self.index.remove(name)
+        return True
+
+    def clear(self, include_pinned=False):
+        """Leert den Cache (angepinnte Einträge bleiben standardmäßig erhalten)"""
+        removed = 0
+        for entry in self.list_entries():
+            if entry['pinned'] and not include_pinned:
+                continue
+            if self.remove_entry(entry['name']):
+                removed += 1
+        return removed
+
+    def get_stats(self):
+        """Statistik für Anzeige und Logs"""
+        entries = self.list_entries()
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats.update({
+            'entries': len(entries),
+            'pinned': sum(1 for e in entries if e['pinned']),
+            'total_bytes': sum(e['size'] for e in entries),
+            'budget_bytes': self.budget_bytes,
+        })
+        return stats
+
+
+class ConversionJournal:
+    """Journal einer unterbrechbaren Konvertierung
+
+    Fertige Segmente liegen in work_dir, journal.json hält fest, mit welchen
+    Parametern sie entstanden sind und welche abgeschlossen sind. Nach einem
+    Absturz oder Abbruch setzt die Konvertierung beim letzten fertigen
+    Segment fort; passen die Parameter nicht mehr, wird von vorn begonnen.
+    """
+
+    def __init__(self, work_dir, signature):
+        self.work_dir = Path(work_dir)
+        self.journal_file = self.work_dir / "journal.json"
+        self._lock = threading.Lock()
+        data = self.load_journal()
+        if data.get('signature') != signature:
+            if data:
+                print("ℹ Parameter geändert, verwerfe angefangene Konvertierung")
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            data = {'signature': signature, 'runs': [], 'done': []}
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.data = data
+        with self._lock:
+            self.save_journal()
+
+    def load_journal(self):
+        """Lädt journal.json (leer wenn nicht vorhanden oder beschädigt)"""
+        try:
+            with open(self.journal_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_journal(self):
+        """Speichert das Journal atomar (Aufrufer hält _lock)"""
+        tmp_file = self.journal_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_file, self.journal_file)
+
+    def start_run(self, offset):
+        """Trägt einen FFmpeg-Lauf ab offset Sekunden ein
+
+        Returns: (Pfad der Segmentliste für diesen Lauf, erste Segmentnummer)
+        """
+        start_number = len(self.completed_segments())
+        with self._lock:
+            # Segmente eines abgebrochenen Laufs ab start_number werden überschrieben
+            run = {'offset': offset, 'list': f"run_{len(self.data['runs'])}.csv",
+                   'start_number': start_number}
+            self.data['runs'].append(run)
+            self.save_journal()
+        return self.work_dir / run['list'], start_number
+
+    def completed_segments(self):
+        """Fertige Segmente in Reihenfolge: [{'file', 'start', 'end'}] (absolute Zeiten)
+
+        FFmpeg schreibt eine Zeile in die Segmentliste, sobald ein Segment
+        geschlossen ist - unvollständige Segmente tauchen dort nie auf.
+        """
+        segments = []
+        with self._lock:
+            runs = list(self.data['runs'])
+        for run in runs:
+            del segments[run['start_number']:]
+            try:
+                with open(self.work_dir / run['list'], 'r') as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                continue
+            for line in lines:
+                name, _, times = line.partition(',')
+                try:
+                    start, end = (float(t) for t in times.split(',')[:2])
+                except ValueError:
+                    continue
+                if (self.work_dir / name).exists():
+                    segments.append({'file': name, 'start': run['offset'] + start,
+                                     'end': run['offset'] + end})
+        return segments
+
+    def is_done(self, name):
+        with self._lock:
+            return name in self.data['done'] and (self.work_dir / name).exists()
+
+    def mark_done(self, name):
+        with self._lock:
+            if name not in self.data['done']:
+                self.data['done'].append(name)
+                self.save_journal()
+
+    def has_progress(self):
+        with self._lock:
+            return bool(self.data['done'] or self.data['runs'])
+
+    def discard(self):
+        """Löscht Journal und Segmente (nach Erfolg oder endgültigem Fehler)"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+class ChunkedSoftwareEncoder:
+    """Software-Encoding (libx264/libx265), parallel über alle CPU-Kerne
+
+    Ein einzelner FFmpeg-Prozess lastet viele Kerne nicht aus. Die Quelle wird
+    daher an Keyframes in Abschnitte geteilt, die Abschnitte werden in
+    mehreren FFmpeg-Prozessen gleichzeitig kodiert und anschließend per
+    Concat-Demuxer ohne erneutes Kodieren zusammengefügt. Audio wird einmal
+    am Stück aus dem Original kodiert, damit an den Schnittstellen keine
+    Lücken entstehen.
+    """
+
+    CODEC_PARAMS = {
+        'libx264': ['-profile:v', 'high', '-level', '4.1', '-pix_fmt', 'yuv420p'],
+        'libx265': ['-tag:v', 'hvc1', '-pix_fmt', 'yuv420p', '-x265-params', 'log-level=error'],
+    }
+    DEFAULT_CRF = {'libx264': 21, 'libx265': 24}
+    MIN_CHUNKED_DURATION = 120  # Sekunden; kürzere Dateien am Stück kodieren
+
+    def __init__(self, codec='libx264', preset='veryfast', jobs=None, chunk_seconds=60):
+        if codec not in self.CODEC_PARAMS:
+            print(f"⚠ Unbekannter Software-Encoder '{codec}', nutze libx264")
+            codec = 'libx264'
+        self.codec = codec
+        self.preset = preset
+        cpu_count = os.cpu_count() or 2
+        # Zwei Threads pro Prozess skalieren bei x264/x265 fast linear
+        self.jobs = jobs or max(1, cpu_count // 2)
+        self.threads_per_job = max(1, cpu_count // self.jobs)
+        self.chunk_seconds = chunk_seconds
+
+    def video_params(self, rung=None, threads=None):
+        """FFmpeg-Parameter für den Video-Stream (für alle Abschnitte identisch)"""
+        params = ['-c:v', self.codec, '-preset', self.preset] + self.CODEC_PARAMS[self.codec]
+        if rung:
+            params += VideoConverter.bitrate_params(rung)
+            params += ['-vf', f"scale=-2:min({rung['height']}\\,ih)"]
+        else:
+            params += ['-crf', str(self.DEFAULT_CRF[self.codec])]
+        if threads:
+            params += ['-threads', str(threads)]
+        return params
+
+    def probe_timing(self, input_path):
+        """Liefert (Startzeit, Dauer, Bilddauer) des Video-Streams oder None"""
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+                 '-show_entries', 'format=start_time,duration:stream=avg_frame_rate,r_frame_rate',
+                 '-of', 'json', str(input_path)],
+                capture_output=True, text=True, timeout=15
+            )
+            data = json.loads(result.stdout)
+            stream = data['streams'][0]
+            rate = stream.get('avg_frame_rate') or stream.get('r_frame_rate') or '25/1'
+            num, _, den = rate.partition('/')
+            fps = float(num) / float(den or 1) if float(num) > 0 else 25.0
+            return (float(data['format'].get('start_time') or 0.0),
+                    float(data['format']['duration']), 1.0 / fps)
+        except (ValueError, KeyError, IndexError, ZeroDivisionError,
+                FileNotFoundError, subprocess.TimeoutExpired) as e:
+            print(f"✗ Video-Timing konnte nicht ermittelt werden: {e}")
+            return None
+
+    def keyframe_before(self, input_path, timestamp):
+        """Zeitstempel des letzten Keyframes vor timestamp (absolute Zeit)
+
+        ffprobe sucht wie FFmpeg zum vorherigen Keyframe und liest nur ein
+        Paket - so muss nicht die ganze Datei nach Keyframes durchsucht werden.
+        """
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+                 '-read_intervals', f'{timestamp:.3f}%+#1',
+                 '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', str(input_path)],
+                capture_output=True, text=True, timeout=15
+            )
+            for line in result.stdout.splitlines():
+                pts_time, _, flags = line.partition(',')
+                if 'K' in flags:
+                    return float(pts_time)
+        except (ValueError, FileNotFoundError, subprocess.TimeoutExpired):
+            pass
+        return None
+
+    def plan_chunks(self, input_path, timing):
+        """Teilt die Datei an Keyframes in Abschnitte von etwa chunk_seconds
+
+        Returns: Liste von (Start, Dauer) relativ zum Dateianfang
+        """
+        start_time, duration, frame_duration = timing
+        boundaries = [0.0]
+        position = self.chunk_seconds
+        while position < duration - self.chunk_seconds / 2:
+            keyframe = self.keyframe_before(input_path, start_time + position)
+            if keyframe is not None:
+                keyframe -= start_time
+                if keyframe - boundaries[-1] > frame_duration:
+                    boundaries.append(keyframe)
+            position += self.chunk_seconds
+        boundaries.append(duration)
+        # Schnitte eine halbe Bilddauer vor dem Keyframe: exakte Suche beginnt
+        # dann genau beim Keyframe, -t endet genau ein Bild davor
+        half_frame = frame_duration / 2
+        cuts = [0.0] + [b - half_frame for b in boundaries[1:-1]] + [duration + half_frame]
+        return [(cuts[i], cuts[i + 1] - cuts[i]) for i in range(len(cuts) - 1)]
+
+    DEFAULT_AUDIO_MAPS = ['-map', '0:a:0?']
+    DEFAULT_AUDIO_PARAMS = ['-c:a', 'aac', '-b:a', '192k', '-ar', '48000', '-ac', '2']
+
+    def encode(self, input_path, output_path, rung=None, progress=None, cancel_event=None,
+               work_dir=None, audio_maps=None, audio_params=None, extra_outputs=None):
+        """Kodiert input_path nach output_path (MP4, standardmäßig erste Audio-Spur als AAC Stereo)
+
+        progress: FFmpegProgress, fasst den Fortschritt aller Abschnitte zusammen
+        audio_maps/audio_params: Audio-Auswahl und -Codecs bezogen auf Eingabe 0 (die Quelle)
+        extra_outputs: weitere Ausgaben aus der Quelle (Eingabe 0), z.B. WebVTT-Untertitel
+        work_dir: Verzeichnis für Abschnitte und Journal. Fertige Abschnitte
+                  bleiben bei Abbruch oder Fehler erhalten und werden beim
+                  nächsten Aufruf übersprungen. Ohne work_dir wird ein
+                  temporäres Verzeichnis genutzt.
+        Returns: True bei Erfolg
+        """
+        timing = self.probe_timing(input_path)
+        chunks = None
+        if timing and timing[1] >= self.MIN_CHUNKED_DURATION and (self.jobs > 1 or work_dir):
+            chunks = self.plan_chunks(input_path, timing)
+        if progress and timing and not progress.duration:
+            progress.duration = timing[1]
+        audio_params = (audio_maps or self.DEFAULT_AUDIO_MAPS) + \
+            (audio_params or self.DEFAULT_AUDIO_PARAMS)
+        if not chunks or len(chunks) < 2:
+            print(f"Software-Encoding am Stück ({self.codec}, {self.preset})")
+            return self._encode_single(input_path, output_path, rung, progress, cancel_event,
+                                       audio_params, extra_outputs)
+
+        print(f"Software-Encoding in {len(chunks)} Abschnitten mit {self.jobs} Prozessen "
+              f"({self.codec}, {self.preset}, {self.threads_per_job} Threads je Prozess)")
+        resumable = work_dir is not None
+        if not resumable:
+            work_dir = Path(output_path).parent / "chunks" / Path(output_path).stem
+            shutil.rmtree(work_dir, ignore_errors=True)
+        journal = ConversionJournal(work_dir, json.dumps(
+            {'chunks': chunks, 'params': self.video_params(rung, self.threads_per_job)}))
+        chunk_dir = journal.work_dir
+        succeeded = False
+        try:
+            chunk_progress = [0.0] * len(chunks)
+            processes = set()
+            lock = threading.Lock()
+            failed = threading.Event()
+
+            def report():
+                if progress:
+                    progress.update(position=sum(chunk_progress))
+
+            def encode_chunk(i):
+                chunk_name = f"chunk_{i:04d}.mp4"
+                if journal.is_done(chunk_name):
+                    chunk_progress[i] = chunks[i][1]
+                    return True
+                if failed.is_set() or (cancel_event and cancel_event.is_set()):
+                    return False
+                start, length = chunks[i]
+                part_path = chunk_dir / f"chunk_{i:04d}.part.mp4"
+                cmd = ['ffmpeg', '-hide_banner', '-nostats']
+                if start > 0:
+                    cmd += ['-ss', f'{start:.6f}']
+                cmd += ['-i', str(input_path), '-t', f'{length:.6f}',
+                        '-map', '0:v:0', '-an', '-sn', '-dn'] + \
+                    self.video_params(rung, self.threads_per_job) + \
+                    ['-progress', 'pipe:1', '-f', 'mp4', '-y', str(part_path)]
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                           universal_newlines=True, bufsize=1)
+                with lock:
+                    processes.add(process)
+                try:
+                    for line in iter(process.stdout.readline, ''):
+                        if line.startswith('out_time_us='):
+                            try:
+                                chunk_progress[i] = int(line.split('=', 1)[1]) / 1e6
+                            except ValueError:
+                                continue
+                            report()
+                    process.wait()
+                finally:
+                    with lock:
+                        processes.discard(process)
+                if process.returncode != 0:
+                    if not failed.is_set() and not (cancel_event and cancel_event.is_set()):
+                        print(f"✗ Abschnitt {i + 1}/{len(chunks)} fehlgeschlagen")
+                    failed.set()
+                    return False
+                os.replace(part_path, chunk_dir / chunk_name)
+                journal.mark_done(chunk_name)
+                return True
+
+            def watch_cancel():
+                # Laufende Prozesse beenden, sobald abgebrochen wird oder ein Abschnitt scheitert
+                while not watch_done.wait(0.5):
+                    if failed.is_set() or (cancel_event and cancel_event.is_set()):
+                        with lock:
+                            for process in processes:
+                                process.terminate()
+
+            watch_done = threading.Event()
+            threading.Thread(target=watch_cancel, daemon=True).start()
+            done_before = {i for i in range(len(chunks)) if journal.is_done(f"chunk_{i:04d}.mp4")}
+            if done_before:
+                print(f"ℹ Setze Encoding fort: {len(done_before)}/{len(chunks)} Abschnitte bereits fertig")
+            started = time.monotonic()
+            try:
+                with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="encode") as pool:
+                    results = list(pool.map(encode_chunk, range(len(chunks))))
+            finally:
+                watch_done.set()
+            if not all(results):
+                return False
+
+            elapsed = time.monotonic() - started
+            encoded = sum(length for i, (_, length) in enumerate(chunks) if i not in done_before)
+            print(f"✓ {len(chunks)} Abschnitte kodiert in {elapsed:.0f}s "
+                  f"({encoded / max(elapsed, 0.001):.1f}x Echtzeit)")
+            succeeded = self._concat(input_path, output_path, chunk_dir, len(chunks), cancel_event,
+                                     audio_params, extra_outputs)
+            return succeeded
+        finally:
+            if succeeded or not resumable:
+                journal.discard()
+
+    def _concat(self, input_path, output_path, chunk_dir, chunk_count, cancel_event=None,
+                audio_params=None, extra_outputs=None):
+        """Fügt die Abschnitte verlustfrei zusammen und kodiert das Audio dazu
+
+        Die Quelle ist Eingabe 0, damit Audio- und Zusatz-Parameter dieselben
+        Stream-Angaben wie beim Encoding am Stück verwenden.
+        """
+        list_file = chunk_dir / "chunks.txt"
+        with open(list_file, 'w') as f:
+            for i in range(chunk_count):
+                f.write(f"file '{chunk_dir / f'chunk_{i:04d}.mp4'}'\n")
+        cmd = [
+            'ffmpeg', '-hide_banner', '-nostats',
+            '-i', str(input_path),
+            '-f', 'concat', '-safe', '0', '-i', str(list_file),
+            '-map', '1:v:0',
+        ] + (audio_params or self.DEFAULT_AUDIO_MAPS + self.DEFAULT_AUDIO_PARAMS) + [
+            '-c:v', 'copy',
+        ] + (['-tag:v', 'hvc1'] if self.codec == 'libx265' else []) + [
+            '-sn', '-movflags', '+faststart',
+            '-f', 'mp4', '-y', str(output_path)
+        ] + (extra_outputs or [])
+        return self._run(cmd, cancel_event)
+
+    def _encode_single(self, input_path, output_path, rung, progress, cancel_event,
+                       audio_params=None, extra_outputs=None):
+        """Fallback: ein FFmpeg-Prozess mit allen Threads"""
+        cmd = ['ffmpeg', '-hide_banner', '-nostats', '-i', str(input_path),
+               '-map', '0:v:0'] + \
+            (audio_params or self.DEFAULT_AUDIO_MAPS + self.DEFAULT_AUDIO_PARAMS) + \
+            self.video_params(rung) + [
+                '-sn', '-movflags', '+faststart', '-progress', 'pipe:1',
+                '-f', 'mp4', '-y', str(output_path)
+            ] + (extra_outputs or [])
+        return self._run(cmd, cancel_event, progress)
+
+    @staticmethod
+    def _run(cmd, cancel_event=None, progress=None):
+        returncode, output = run_ffmpeg(cmd, progress, cancel_event)
+        if returncode and not (cancel_event and cancel_event.is_set()):
+            print(f"✗ FFmpeg-Fehler: {output[-300:]}")
+        return returncode == 0 and not (cancel_event and cancel_event.is_set())
+
+
 class VideoConverter:
     """Automatische Video-Konvertierung für Chromecast-Kompatibilität"""
 
-    def __init__(self):
+    # Was ein Chromecast ohne bekanntes Modell ohne Konvertierung abspielt
+    DEFAULT_CAST_PROFILE = DeviceCapabilityRegistry.profile_from_capabilities(
+        DeviceCapabilityRegistry.BASELINE
+    )
+
+    # Segmentlänge unterbrechbarer Konvertierungen (Sekunden)
+    SEGMENT_SECONDS = 60
+
+    def __init__(self, cache_size_gb=10, encoder_mode='auto', software_codec='libx264',
+                 software_preset='veryfast'):
+        # auto: Hardware-Encoder, sonst paralleles Software-Encoding
+        # hardware: nur Hardware-Encoder, software: immer CPU
+        self.encoder_mode = encoder_mode
+        self.software_encoder = ChunkedSoftwareEncoder(software_codec, software_preset)
         self.conversion_cache_dir = Path.home() / ".cache" / "video-chromecast-player"
         self.conversion_cache_dir.mkdir(parents=True, exist_ok=True)
         self.active_conversions = {}
-        self.cleanup_old_cache_files(max_age_days=7, max_size_gb=10)
+        self._active_lock = threading.Lock()  # schützt Prüfen+Eintragen in active_conversions
+        # Callables(FFmpegProgress), aufgerufen beim Start jedes FFmpeg-Laufs
+        self.progress_listeners = []
+        # Bereinigung läuft im Hintergrund (LRU bis zum Budget)
+        self.cache_manager = ConversionCacheManager(self.conversion_cache_dir,
+                                                    int(cache_size_gb * 1024**3))
+        self.cache_index = self.cache_manager.index
+        self.cache_manager.busy_files = self.busy_cache_files
+        self._conversion_locks = {}  # Ausgabedatei -> Lock
+        self._locks_guard = threading.Lock()
+        self._reencoder_cache = {}  # (Modus, Software-Codec, Stufe) -> (video_codec, video_params)
+        self._pending_subtitles = {}  # WebVTT-Cachepfad -> Event, solange ein Lauf die Spur erzeugt
+        self.probe_cache_file = self.conversion_cache_dir / "probe_cache.json"
+        self._probe_lock = threading.Lock()
+        self.probe_cache = self.load_probe_cache()
+
+    def get_cached_mp4_path(self, mkv_path, plan=None, rung=None):
+        """Generiert Pfad für konvertierte MP4-Datei im Cache (inhaltsadressiert, je Variante)"""
+        return self.cache_index.output_path(mkv_path, self.cache_suffix(plan, rung))
+
+    def cache_suffix(self, plan=None, rung=None):
+        """Dateiendung der Cache-Variante, z.B. '_vhevc_ace.mp4' oder '_t360p_ae.mp4'
+
+        Derselbe Inhalt ergibt je nach Geräteprofil (was kopiert werden darf)
+        und Bitrate-Stufe verschiedene Dateien. Die Variante gehört daher zum
+        Schlüssel, sonst bekäme z.B. ein einfacher Chromecast die HEVC-Kopie
+        für einen Google TV oder eine schnelle Verbindung die 360p-Fassung.
+        Ohne Plan (kein ffprobe) bleibt es bei '.mp4'.
+        """
+        if not plan:
+            return '.mp4'
+        if plan.get('copy_video', True):
+            video = f"v{plan.get('video_codec') or 'copy'}"
+        else:
+            video = f"t{rung['name'] if rung else 'default'}"
+            if self.encoder_mode != 'hardware' and self.software_encoder.codec == 'libx265':
+                video += '-hevc'
+        tracks = plan.get('audio_tracks')
+        if tracks:
+            audio = ''.join('c' if track['copy'] else 'e' for track in tracks)
+        else:
+            audio = 'c' if plan.get('copy_audio') else 'e'
+        return f"_{video}_a{audio}.mp4"
 
-    def cleanup_old_cache_files(self, max_age_days=7, max_size_gb=10):
-        """Bereinigt alte Cache-Dateien"""
-        now = time.time()
-        max_size_bytes = max_size_gb * 1024**3
-        total_size = 0
-        
-        cache_files = []
-        for file in self.conversion_cache_dir.glob("*.mp4"):
-            file_age = now - file.stat().st_mtime
-            file_size = file.stat().st_size
-            
-            if file_age > max_age_days * 86400:
-                file.unlink()
-                print(f"✗ Alte Cache-Datei gelöscht: {file.name}")
+    def is_ffmpeg_available(self):
+        """Prüft ob FFmpeg installiert ist (aus dem Fähigkeiten-Cache)"""
+        return FFMPEG_CAPABILITIES.available
+
+    def load_probe_cache(self):
+        """Lädt gespeicherte ffprobe-Ergebnisse"""
+        if self.probe_cache_file.exists():
+            try:
+                with open(self.probe_cache_file, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Fehler beim Laden des Probe-Caches: {e}")
+        return {}
+
+    def save_probe_cache(self):
+        """Speichert ffprobe-Ergebnisse"""
+        try:
+            with open(self.probe_cache_file, 'w') as f:
+                json.dump(self.probe_cache, f, indent=2)
+        except Exception as e:
+            print(f"Fehler beim Speichern des Probe-Caches: {e}")
+
+    def probe_media(self, input_path):
+        """Liest Container und alle Streams per ffprobe
+
+        Das Ergebnis wird pro Datei gecacht und bei geänderter Größe oder
+        Änderungszeit neu ermittelt.
+        Returns: dict mit 'format' und 'streams' oder None bei Fehler
+        """
+        input_file = Path(input_path).resolve()
+        try:
+            stat = input_file.stat()
+        except OSError:
+            return None
+        key = str(input_file)
+
+        with self._probe_lock:
+            cached = self.probe_cache.get(key)
+            if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+                return cached['probe']
+
+        if not FFMPEG_CAPABILITIES.ffprobe_available:
+            return None
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-show_format', '-show_streams',
+                 '-of', 'json', str(input_file)],
+                capture_output=True, text=True, timeout=30
+            )
+            if result.returncode != 0:
+                print(f"✗ ffprobe fehlgeschlagen: {result.stderr.strip()[-300:]}")
+                return None
+            raw = json.loads(result.stdout)
+        except (ValueError, FileNotFoundError, subprocess.TimeoutExpired) as e:
+            print(f"✗ ffprobe nicht möglich: {e}")
+            return None
+
+        # Nur die Felder behalten, die für die Planung gebraucht werden
+        stream_fields = ('index', 'codec_type', 'codec_name', 'profile', 'level', 'pix_fmt',
+                         'width', 'height', 'channels', 'channel_layout', 'sample_rate')
+        streams = []
+        for stream in raw.get('streams', []):
+            info = {field: stream[field] for field in stream_fields if field in stream}
+            info['attached_pic'] = bool(stream.get('disposition', {}).get('attached_pic'))
+            info['language'] = stream.get('tags', {}).get('language')
+            info['title'] = stream.get('tags', {}).get('title')
+            streams.append(info)
+        fmt = raw.get('format', {})
+        probe = {
+            'format': {
+                'format_name': fmt.get('format_name', ''),
+                'duration': float(fmt['duration']) if fmt.get('duration') else None,
+                'bit_rate': int(fmt['bit_rate']) if fmt.get('bit_rate') else None,
+            },
+            'streams': streams,
+        }
+
+        with self._probe_lock:
+            self.probe_cache[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'probe': probe}
+            self.save_probe_cache()
+        return probe
+
+    def plan_cast_conversion(self, input_path, profile=None, audio_index=0):
+        """Ermittelt die minimale Konvertierung für den Chromecast
+
+        Returns: dict mit
+            'action': 'passthrough' (direkt streamen), 'remux' (nur Container),
+                      'audio' (Video kopieren, Audio zu AAC) oder 'transcode'
+            'mime_type': MIME-Type für passthrough, sonst 'video/mp4'
+            'copy_video' / 'copy_audio': ob die Streams kopiert werden können
+            'reasons': Liste der Gründe für eine Konvertierung
+        oder None, wenn die Datei nicht untersucht werden kann
+        """
+        probe = self.probe_media(input_path)
+        if probe is None:
+            return None
+        profile = profile or self.DEFAULT_CAST_PROFILE
+        reasons = []
+
+        # Container: ffprobe meldet MP4 und MOV gemeinsam als "mov,mp4,..."
+        suffix = Path(input_path).suffix.lower()
+        format_names = probe['format']['format_name'].split(',')
+        container = None
+        if 'mp4' in format_names and suffix in ('.mp4', '.m4v', '.mov'):
+            container = 'mp4'
+        elif 'webm' in format_names and suffix == '.webm':
+            container = 'webm'
+        elif 'matroska' in format_names and suffix == '.mkv':
+            container = 'mkv'
+        if container not in profile['containers']:
+            reasons.append(f"Container {probe['format']['format_name']} ({suffix})")
+            container = None
+
+        video_streams = [st for st in probe['streams']
+                         if st.get('codec_type') == 'video' and not st.get('attached_pic')]
+        audio_streams = [st for st in probe['streams'] if st.get('codec_type') == 'audio']
+        video = video_streams[0] if video_streams else None
+        audio = None
+        if audio_streams:
+            audio = audio_streams[audio_index] if audio_index < len(audio_streams) else audio_streams[0]
+
+        # Bei Konvertierung entsteht immer MP4 - dafür müssen die Codecs passen
+        target = container or 'mp4'
+
+        copy_video = True
+        if video:
+            codec = video.get('codec_name')
+            if codec not in profile['video_codecs'].get(target, set()):
+                reasons.append(f"Video-Codec {codec}")
+                copy_video = False
+            elif codec == 'h264':
+                if video.get('profile') not in profile['h264_profiles']:
+                    reasons.append(f"H.264-Profil {video.get('profile')}")
+                    copy_video = False
+                if (video.get('level') or 0) > profile['h264_max_level']:
+                    reasons.append(f"H.264-Level {video.get('level')}")
+                    copy_video = False
+            if copy_video and video.get('pix_fmt') and video['pix_fmt'] not in profile['pixel_formats']:
+                reasons.append(f"Pixelformat {video['pix_fmt']}")
+                copy_video = False
+            max_height = profile.get('max_height')
+            if copy_video and max_height and (video.get('height') or 0) > max_height:
+                reasons.append(f"Auflösung {video.get('width')}x{video.get('height')}")
+                copy_video = False
+
+        def audio_compatible(stream):
+            return stream.get('codec_name') in profile['audio_codecs'].get(target, set()) and \
+                (stream.get('channels') or 0) <= profile['max_audio_channels']
+
+        copy_audio = True
+        if audio:
+            codec = audio.get('codec_name')
+            if codec not in profile['audio_codecs'].get(target, set()):
+                reasons.append(f"Audio-Codec {codec}")
+                copy_audio = False
+            elif (audio.get('channels') or 0) > profile['max_audio_channels']:
+                reasons.append(f"{audio.get('channels')} Audio-Kanäle ({audio.get('channel_layout')})")
+                copy_audio = False
+
+        # Bei einer Konvertierung bleiben alle Audio-Spuren erhalten (jede einzeln
+        # kopiert oder zu AAC), Text-Untertitel werden zu WebVTT-Dateien daneben
+        audio_tracks = [{
+            'index': n,
+            'codec': st.get('codec_name'),
+            'channels': st.get('channels'),
+            'language': st.get('language'),
+            'title': st.get('title'),
+            'copy': audio_compatible(st),
+        } for n, st in enumerate(audio_streams)]
+
+        if not copy_video:
+            action = 'transcode'
+        elif not copy_audio:
+            action = 'audio'
+        elif container is None:
+            action = 'remux'
+        else:
+            action = 'passthrough'
+
+        # Ohne Video kein Videocontainer
+        mime_type = profile['containers'][container] if container else 'video/mp4'
+        if not video and mime_type.startswith('video/'):
+            mime_type = 'audio/' + mime_type.split('/', 1)[1]
+
+        return {
+            'action': action,
+            'mime_type': mime_type,
+            'copy_video': copy_video,
+            'copy_audio': copy_audio,
+            'video_codec': video.get('codec_name') if video else None,
+            'audio_codec': audio.get('codec_name') if audio else None,
+            'audio_channels': audio.get('channels') if audio else None,
+            'audio_tracks': audio_tracks,
+            'subtitle_tracks': self.text_subtitle_tracks(probe),
+            'reasons': reasons,
+        }
+
+    TEXT_SUBTITLE_CODECS = ('subrip', 'srt', 'ass', 'ssa', 'webvtt', 'mov_text', 'text')
+
+    @classmethod
+    def text_subtitle_tracks(cls, probe):
+        """Text-Untertitel einer Datei (Bitmap-Formate wie PGS lassen sich nicht nach WebVTT wandeln)
+
+        'index' zählt innerhalb der Untertitel-Streams (FFmpeg: 0:s:<index>)
+        """
+        subtitle_streams = [st for st in probe['streams'] if st.get('codec_type') == 'subtitle']
+        return [{'index': n, 'codec': st.get('codec_name'), 'language': st.get('language'),
+                 'title': st.get('title')}
+                for n, st in enumerate(subtitle_streams)
+                if st.get('codec_name') in cls.TEXT_SUBTITLE_CODECS]
+
+    @staticmethod
+    def video_params_for_plan(plan):
+        """FFmpeg-Video-Parameter für kopierte Streams"""
+        params = ['-c:v', 'copy']
+        if plan and plan.get('video_codec') == 'hevc':
+            # hvc1-Tag, sonst verweigern manche Receiver HEVC in MP4
+            params += ['-tag:v', 'hvc1']
+        return params
+
+    @staticmethod
+    def audio_params_for_plan(plan):
+        """FFmpeg-Audio-Parameter für alle Audio-Spuren des Plans
+
+        Jede Spur wird einzeln kopiert, wenn der Chromecast sie abspielen kann,
+        sonst zu AAC Stereo kodiert. Ohne Spurliste: Kopieren wenn der Plan es
+        erlaubt, sonst AAC.
+        """
+        tracks = plan.get('audio_tracks') if plan else None
+        if not tracks:
+            if plan and plan.get('copy_audio'):
+                return ['-c:a', 'copy']
+            return ['-c:a', 'aac', '-b:a', '192k', '-ar', '48000', '-ac', '2']
+        params = []
+        for n, track in enumerate(tracks):
+            if track['copy']:
+                params += [f'-c:a:{n}', 'copy']
             else:
-                cache_files.append((file, file_size))
-                total_size += file_size
-        
-        # Wenn Cache zu groß, älteste Dateien löschen
-        cache_files.sort(key=lambda x: x[0].stat().st_mtime)
-        while total_size > max_size_bytes and cache_files:
-            file_to_delete, file_size = cache_files.pop(0)
-            file_to_delete.unlink()
-            total_size -= file_size
-            print(f"✗ Cache-Datei gelöscht (Größenlimit): {file_to_delete.name}")
-
-    def get_cached_mp4_path(self, mkv_path):
-        """Generiert Pfad für konvertierte MP4-Datei im Cache"""
-        mkv_file = Path(mkv_path)
-        # Nutze Hash des Original-Pfads + Dateiname für eindeutigen Cache-Key
-        path_hash = hashlib.md5(str(mkv_file.absolute()).encode()).hexdigest()[:8]
-        mp4_name = f"{mkv_file.stem}_{path_hash}.mp4"
-        return self.conversion_cache_dir / mp4_name
+                params += [f'-c:a:{n}', 'aac', f'-b:a:{n}', '192k',
+                           f'-ar:a:{n}', '48000', f'-ac:a:{n}', '2']
+        return params
 
-    def is_ffmpeg_available(self):
-        """Prüft ob FFmpeg installiert ist"""
+    @staticmethod
+    def stream_maps_for_plan(plan, input_index=0, video=True):
+        """-map-Parameter: ein Video-Stream (ohne Cover-Bilder) und alle Audio-Spuren
+
+        Ohne Spurliste im Plan bleibt es bei FFmpegs Standardauswahl.
+        """
+        if not plan or not plan.get('audio_tracks'):
+            return []
+        maps = ['-map', f'{input_index}:V:0?'] if video else []
+        return maps + ['-map', f'{input_index}:a?']
+
+    def subtitle_outputs(self, input_file, plan, input_index=0):
+        """Zusätzliche FFmpeg-Ausgaben: jede noch fehlende Text-Untertitelspur als WebVTT
+
+        Die Spuren entstehen im selben FFmpeg-Lauf wie das MP4. Spuren, die
+        gerade ein anderer Lauf erzeugt, werden ausgelassen.
+        Returns: (FFmpeg-Parameter, Liste von (Teil-Pfad, Cache-Pfad)) für finish_subtitle_outputs
+        """
+        params, outputs = [], []
+        for track in (plan or {}).get('subtitle_tracks', []):
+            suffix = f"_s{track['index']}.vtt"
+            if self.cache_manager.lookup(input_file, suffix):
+                continue
+            final_path = self.cache_index.output_path(input_file, suffix)
+            with self._locks_guard:
+                if str(final_path) in self._pending_subtitles:
+                    continue
+                self._pending_subtitles[str(final_path)] = threading.Event()
+            part_path = final_path.with_suffix('.part.vtt')
+            params += ['-map', f"{input_index}:s:{track['index']}", '-c:s', 'webvtt',
+                       '-f', 'webvtt', '-y', str(part_path)]
+            outputs.append((part_path, final_path))
+        return params, outputs
+
+    def finish_subtitle_outputs(self, input_file, outputs, success):
+        """Veröffentlicht die WebVTT-Dateien eines Laufs (oder räumt sie weg)"""
+        for part_path, final_path in outputs:
+            try:
+                self._publish_subtitle(input_file, part_path, final_path, success)
+            finally:
+                with self._locks_guard:
+                    pending = self._pending_subtitles.pop(str(final_path), None)
+                if pending:
+                    pending.set()
+
+    def _publish_subtitle(self, input_file, part_path, final_path, success):
         try:
-            subprocess.run(['ffmpeg', '-version'],
-                         capture_output=True,
-                         check=True,
-                         timeout=5)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            return False
+            if success and part_path.stat().st_size > 0:
+                os.replace(part_path, final_path)
+                self.cache_manager.record(input_file, final_path, 'subtitle', encoder='webvtt')
+                return
+        except OSError:
+            pass
+        try:
+            part_path.unlink()
+        except OSError:
+            pass
+
+    def get_subtitle_sidecars(self, input_path):
+        """Bereits erzeugte WebVTT-Dateien einer Quelle
+
+        Returns: Liste von dicts mit index, language, title, path
+        """
+        probe = self.probe_media(input_path)
+        if probe is None:
+            return []
+        sidecars = []
+        for track in self.text_subtitle_tracks(probe):
+            cached = self.cache_manager.lookup(input_path, f"_s{track['index']}.vtt")
+            if cached:
+                sidecars.append(dict(track, path=str(cached)))
+        return sidecars
+
+    def extract_subtitle_sidecars(self, input_path, progress_callback=None):
+        """Wandelt alle noch fehlenden Text-Untertitel in einem FFmpeg-Lauf nach WebVTT
+
+        Für Dateien, die ohne Konvertierung gestreamt werden (oder deren
+        Konvertierung fortgesetzt wurde). Returns: get_subtitle_sidecars()
+        """
+        probe = self.probe_media(input_path)
+        if probe is None or not self.is_ffmpeg_available():
+            return []
+        params, outputs = self.subtitle_outputs(Path(input_path),
+                                                {'subtitle_tracks': self.text_subtitle_tracks(probe)})
+        if outputs:
+            print(f"\n=== Untertitel-Extraktion ({len(outputs)} Spuren nach WebVTT) ===")
+            cmd = ['ffmpeg', '-hide_banner', '-nostats', '-progress', 'pipe:1',
+                   '-i', str(input_path)] + params
+            progress = self.track_progress("Extrahiere Untertitel", input_path, progress_callback)
+            returncode, output = run_ffmpeg(cmd, progress)
+            if returncode != 0:
+                print(f"✗ Untertitel-Extraktion fehlgeschlagen: {output[-300:]}")
+            self.finish_subtitle_outputs(Path(input_path), outputs, returncode == 0)
+        return self.get_subtitle_sidecars(input_path)
+
+    def complete_subtitle_sidecars(self, input_path, progress_callback=None):
+        """Stellt alle Text-Untertitel einer Quelle als WebVTT bereit
+
+        Wartet auf Spuren, die ein laufender Konvertierungslauf gerade
+        erzeugt (z.B. der progressive Remux), und extrahiert die übrigen.
+        Returns: get_subtitle_sidecars()
+        """
+        probe = self.probe_media(input_path)
+        if probe is None:
+            return []
+        paths = [str(self.cache_index.output_path(input_path, f"_s{track['index']}.vtt"))
+                 for track in self.text_subtitle_tracks(probe)]
+        with self._locks_guard:
+            pending = [self._pending_subtitles[path] for path in paths
+                       if path in self._pending_subtitles]
+        for event in pending:
+            event.wait()
+        return self.extract_subtitle_sidecars(input_path, progress_callback)
+
+    def get_media_duration(self, input_path):
+        """Ermittelt die Dauer einer Datei in Sekunden per ffprobe (None bei Fehler)"""
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                 '-of', 'default=noprint_wrappers=1:nokey=1', str(input_path)],
+                capture_output=True, text=True, timeout=15
+            )
+            if result.returncode == 0:
+                return float(result.stdout.strip())
+        except (ValueError, FileNotFoundError, subprocess.TimeoutExpired) as e:
+            print(f"✗ Dauer konnte nicht ermittelt werden: {e}")
+        return None
+
+    def create_hls_session(self, input_path, rung=None, plan=None):
+        """Erstellt eine HLS-Sitzung, die Segmente erst bei Bedarf transkodiert
+
+        Args:
+            rung: Stufe der Bitrate-Leiter (siehe BandwidthManager)
+            plan: Ergebnis von plan_cast_conversion - passendes Audio wird kopiert
+        Returns: HLSSession oder None (kein FFmpeg, kein Encoder, Dauer unbekannt)
+        """
+        if not self.is_ffmpeg_available():
+            print("✗ FFmpeg ist nicht installiert!")
+            return None
+
+        video_codec, video_params = self.select_reencoder(rung)
+        if video_codec is None:
+            print("✗ Kein Hardware-Encoder für HLS verfügbar")
+            return None
+
+        duration = self.get_media_duration(input_path)
+        if not duration:
+            return None
 
-    def convert_to_mp4(self, input_path, progress_callback=None):
+        input_file = Path(input_path)
+        # Segmente verschiedener Bitrate-Stufen nicht mischen
+        rung_name = rung['name'] if rung else 'default'
+        content_key = self.cache_index.source_identity(input_file)['key']
+        session_key = hashlib.md5(f"{content_key}:{rung_name}".encode()).hexdigest()[:16]
+        segment_dir = self.conversion_cache_dir / "hls" / session_key
+        # MPEG-TS: nur AAC/MP3 kopieren, alles andere einmal pro Sitzung kodieren
+        copy_audio = bool(plan and plan.get('copy_audio') and plan.get('audio_codec') in ('aac', 'mp3'))
+        return HLSSession(session_key, input_file, duration, segment_dir, video_params,
+                          copy_audio=copy_audio)
+
+    def _conversion_lock(self, output_path):
+        """Lock pro Ausgabedatei, damit ein Inhalt nie doppelt konvertiert wird"""
+        with self._locks_guard:
+            return self._conversion_locks.setdefault(str(output_path), threading.Lock())
+
+    def busy_cache_files(self):
+        """Namen der Cache-Dateien, an denen gerade ein Lauf schreibt"""
+        with self._active_lock:
+            paths = list(self.active_conversions)
+        with self._locks_guard:
+            paths += [path for path, lock in self._conversion_locks.items() if lock.locked()]
+            paths += list(self._pending_subtitles)
+        return {Path(path).name for path in paths}
+
+    def convert_to_mp4(self, input_path, progress_callback=None, rung=None, plan=None, cancel_event=None):
         """
         Konvertiert MKV zu MP4 (schnell, ohne Re-Encoding wenn möglich)
+        rung: Stufe der Bitrate-Leiter für ein eventuell nötiges Re-Encoding
+        plan: Ergebnis von plan_cast_conversion (Audio kopieren / direkt Re-Encoding)
+        cancel_event: threading.Event zum Abbrechen (z.B. aus der ConversionQueue)
+        Läuft für denselben Inhalt bereits eine Konvertierung, wird auf deren
+        Ergebnis gewartet statt parallel ein zweites Mal zu konvertieren.
         Returns: Pfad zur MP4-Datei oder None bei Fehler
         """
+        with self._conversion_lock(self.get_cached_mp4_path(input_path, plan, rung)):
+            return self._convert_to_mp4(input_path, progress_callback, rung, plan, cancel_event)
+
+    def _convert_to_mp4(self, input_path, progress_callback, rung, plan, cancel_event):
         input_file = Path(input_path)
-        output_path = self.get_cached_mp4_path(input_path)
-
-        # Prüfe ob bereits konvertiert und aktuell
-        if output_path.exists():
-            # Prüfe ob Cache-Datei neuer ist als Original
-            if output_path.stat().st_mtime >= input_file.stat().st_mtime:
-                print(f"✓ Nutze bereits konvertierte Datei: {output_path.name}")
-                return str(output_path)
-            else:
-                print(f"Cache veraltet, konvertiere neu...")
-                output_path.unlink()
+        suffix = self.cache_suffix(plan, rung)
+        output_path = self.cache_index.output_path(input_path, suffix)
+
+        # Prüfe ob dieser Inhalt in dieser Variante bereits konvertiert wurde (auch unter anderem Pfad)
+        cached = self.cache_manager.lookup(input_path, suffix)
+        if cached:
+            print(f"✓ Nutze bereits konvertierte Datei: {cached.name}")
+            return str(cached)
 
         if not self.is_ffmpeg_available():
             print("✗ FFmpeg ist nicht installiert!")
             print("  Installation: sudo dnf install ffmpeg")
             return None
 
+        if plan and not plan['copy_video']:
+            # Video-Stream ist nicht kompatibel - Remux-Versuch überspringen
+            return self.convert_with_reencoding(input_file, output_path, progress_callback, rung, cancel_event,
+                                                plan=plan)
+
         print(f"\n=== Automatische Video-Konvertierung ===")
         print(f"Eingabe: {input_file.name}")
         print(f"Ausgabe: {output_path.name}")
@@ -411,127 +2343,503 @@ class VideoConverter:
         if progress_callback:
             GLib.idle_add(progress_callback, "Konvertiere Video zu MP4...")
 
-        try:
-            # Versuche zuerst schnelle Konvertierung ohne Re-Encoding
-            cmd = [
-                'ffmpeg',
-                '-i', str(input_file),
-                '-c:v', 'copy',  # Kopiere Video ohne Re-Encoding
-                '-c:a', 'aac',   # Konvertiere Audio zu AAC (Chromecast benötigt AAC)
-                '-b:a', '192k',  # Audio-Bitrate
-                '-ar', '48000',  # Sample-Rate
-                '-ac', '2',      # Stereo
-                '-movflags', '+faststart',  # Optimiere für Streaming
-                '-progress', 'pipe:1',  # Fortschritt ausgeben
-                '-y',  # Überschreibe falls vorhanden
-                str(output_path)
+        # Kopiere Video ohne Re-Encoding; Audio kopieren wenn kompatibel, sonst AAC
+        params = self.stream_maps_for_plan(plan) + self.video_params_for_plan(plan) + \
+            self.audio_params_for_plan(plan) + [
+                '-sn',  # Untertitel-Formate aus MKV passen nicht in MP4 (-> WebVTT)
             ]
+        subtitle_params, subtitle_outputs = self.subtitle_outputs(input_file, plan)
+        print("Bitte warten, dies kann einige Sekunden dauern...")
+        result = self.run_resumable_conversion(input_file, output_path, params, "Konvertiere",
+                                               progress_callback, cancel_event,
+                                               extra_outputs=subtitle_params)
+        self.finish_subtitle_outputs(input_file, subtitle_outputs, result is True)
+        if result is None:
+            print(f"ℹ Konvertierung abgebrochen: {input_file.name} (wird beim nächsten Mal fortgesetzt)")
+            return None
+        if result:
+            print(f"✓ Konvertierung erfolgreich!")
+            print(f"  Dateigröße: {output_path.stat().st_size / (1024*1024):.1f} MB")
+            self.cache_manager.record(input_file, output_path, plan or 'remux', encoder='copy')
+            if progress_callback:
+                GLib.idle_add(progress_callback, "Konvertierung abgeschlossen!")
+            return str(output_path)
+
+        print(f"✗ Schnelle Konvertierung fehlgeschlagen, versuche Re-Encoding...")
+        return self.convert_with_reencoding(input_file, output_path, progress_callback, rung, cancel_event,
+                                            plan=plan)
+
+    def resume_dir(self, output_path):
+        """Arbeitsverzeichnis (Segmente + Journal) einer unterbrechbaren Konvertierung"""
+        return self.conversion_cache_dir / "resume" / Path(output_path).stem
+
+    def run_resumable_conversion(self, input_file, output_path, params, label,
+                                 progress_callback=None, cancel_event=None, extra_outputs=None):
+        """Führt eine Konvertierung in Segmenten aus, die nach Abbruch fortgesetzt wird
+
+        FFmpeg schreibt über den Segment-Muxer Abschnitte von SEGMENT_SECONDS
+        in resume_dir(); die Segmentliste dient als Journal. Ein neuer Lauf
+        beginnt beim Ende des letzten fertigen Segments. Wird das Video
+        kopiert, beginnt er dagegen von vorn: kopiertes Video lässt sich nur
+        am Keyframe davor schneiden, die übrigen Streams exakt - das ergäbe
+        doppelte Bilder und Versatz zwischen Bild und Ton. Am Ende werden die
+        Segmente verlustfrei zusammengefügt, geprüft und atomar an
+        output_path veröffentlicht - dort liegt nie eine halbe Datei.
+
+        extra_outputs: weitere FFmpeg-Ausgaben (z.B. WebVTT-Untertitel), nur
+                       bei einem Lauf ab dem Anfang - ein fortgesetzter Lauf
+                       sieht die Quelle nicht vollständig
+        Returns: True (veröffentlicht), False (Fehler, Journal verworfen),
+                 None (abgebrochen, Journal bleibt für die Fortsetzung)
+        """
+        output_path = Path(output_path)
+        video_copy = '-c:v' in params and params[params.index('-c:v') + 1] == 'copy'
+        journal = ConversionJournal(self.resume_dir(output_path), ' '.join(params))
+        segments = journal.completed_segments()
+        if segments and video_copy:
+            # Remux ist schnell - neu beginnen statt an einer ungenauen Grenze fortsetzen
+            print("ℹ Video wird kopiert, beginne angefangene Konvertierung neu")
+            journal.discard()
+            journal = ConversionJournal(self.resume_dir(output_path), ' '.join(params))
+            segments = []
+        offset = segments[-1]['end'] if segments else 0.0
+        if segments:
+            print(f"ℹ Setze Konvertierung fort bei {self.format_seconds(offset)} "
+                  f"({len(segments)} Segmente fertig)")
+        list_path, start_number = journal.start_run(offset)
+
+        cmd = ['ffmpeg', '-hide_banner']
+        if offset > 0:
+            # Nur kodiertes Video: exakt ab der (erzwungenen) Keyframe-Grenze,
+            # knapp davor suchen, damit das erste Bild dabei ist
+            cmd += ['-ss', f"{offset - 0.001:.6f}"]
+        cmd += ['-i', str(input_file)] + params
+        if not video_copy:
+            # Segmentgrenzen erzwingen, sonst entscheidet der Encoder über Keyframes
+            cmd += ['-force_key_frames', f'expr:gte(t,n_forced*{self.SEGMENT_SECONDS})']
+        cmd += [
+            '-f', 'segment',
+            '-segment_time', str(self.SEGMENT_SECONDS),
+            '-segment_format', 'mp4',
+            '-segment_start_number', str(start_number),
+            '-reset_timestamps', '1',
+            '-segment_list', str(list_path),
+            '-segment_list_type', 'csv',
+            '-progress', 'pipe:1',
+            '-nostats',
+            '-y',
+            str(journal.work_dir / 'seg_%05d.mp4')
+        ]
+        if extra_outputs and offset == 0:
+            cmd += extra_outputs
+
+        progress = self.track_progress(label, input_file, progress_callback, offset=offset)
+        returncode, output = run_ffmpeg(cmd, progress, cancel_event)
+        if returncode is None:
+            journal.discard()
+            return False
+        if (cancel_event and cancel_event.is_set()) or returncode < 0:
+            # Abgebrochen oder FFmpeg per Signal beendet: Fortschritt behalten
+            return None
+        if returncode != 0:
+            print(f"✗ FFmpeg-Fehler: {output[-300:]}")
+            journal.discard()
+            return False
+
+        segments = journal.completed_segments()
+        list_file = journal.work_dir / "concat.txt"
+        with open(list_file, 'w') as f:
+            for segment in segments:
+                f.write(f"file '{journal.work_dir / segment['file']}'\n")
+        joined_path = journal.work_dir / "output.mp4"
+        tag_params = ['-tag:v', params[params.index('-tag:v') + 1]] if '-tag:v' in params else []
+        result = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-v', 'error', '-f', 'concat', '-safe', '0',
+             '-i', str(list_file), '-map', '0', '-c', 'copy'] + tag_params +
+            ['-movflags', '+faststart', '-f', 'mp4', '-y', str(joined_path)],
+            capture_output=True, text=True
+        )
+        published = result.returncode == 0 and self.publish_output(joined_path, output_path, input_file)
+        if result.returncode != 0:
+            print(f"✗ Zusammenfügen fehlgeschlagen: {result.stderr.strip()[-300:]}")
+        journal.discard()
+        return published
+
+    def track_progress(self, label, input_path=None, progress_callback=None, offset=0.0):
+        """Erzeugt ein FFmpegProgress für einen FFmpeg-Lauf
+
+        Die Dauer stammt aus dem ffprobe-Cache. progress_callback erhält den
+        Kurztext, progress_listeners (z.B. der Fortschrittsbalken im
+        Fenster) das Objekt selbst.
+        """
+        duration = None
+        if input_path:
+            probe = self.probe_media(input_path)
+            duration = probe.get('duration') if probe else None
+        progress = FFmpegProgress(label, duration, offset)
+        if progress_callback:
+            progress.add_listener(lambda p: progress_callback(p.describe()))
+        for listener in list(self.progress_listeners):
+            listener(progress)
+        return progress
+
+    @staticmethod
+    def format_seconds(seconds):
+        seconds = int(seconds)
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
 
-            print(f"Führe aus: {' '.join(cmd)}")
-            print("Bitte warten, dies kann einige Sekunden dauern...")
+    def verify_output(self, output_path, input_path=None):
+        """Integritätsprüfung vor der Aufnahme in den Cache
 
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1
+        Die Datei muss sich von ffprobe lesen lassen (bei MP4 setzt das den
+        moov-Block voraus, der bei einem Abbruch fehlt), mindestens einen
+        Audio- oder Video-Stream haben und ungefähr so lang sein wie die Quelle.
+        """
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration:stream=codec_type',
+                 '-of', 'json', str(output_path)],
+                capture_output=True, text=True, timeout=30
             )
+            data = json.loads(result.stdout or '{}')
+        except (ValueError, FileNotFoundError, subprocess.TimeoutExpired) as e:
+            print(f"✗ Integritätsprüfung nicht möglich: {e}")
+            return False
+        streams = [st.get('codec_type') for st in data.get('streams', [])]
+        try:
+            duration = float(data.get('format', {}).get('duration'))
+        except (TypeError, ValueError):
+            duration = 0.0
+        if result.returncode != 0 or not ({'video', 'audio'} & set(streams)) or duration <= 0:
+            print(f"✗ Integritätsprüfung fehlgeschlagen: {Path(output_path).name} ist nicht lesbar")
+            return False
+        if input_path:
+            probe = self.probe_media(input_path)
+            expected = probe.get('duration') if probe else None
+            if expected and abs(duration - expected) > max(2.0, expected * 0.01):
+                print(f"✗ Integritätsprüfung fehlgeschlagen: Dauer {duration:.1f}s statt {expected:.1f}s")
+                return False
+        return True
+
+    def publish_output(self, temp_path, output_path, input_path=None):
+        """Prüft eine fertige Datei und verschiebt sie atomar an ihren Cache-Pfad"""
+        if not self.verify_output(temp_path, input_path):
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return False
+        os.replace(temp_path, output_path)
+        return True
+
+    def convert_to_mp4_progressive(self, input_path, progress_callback=None, plan=None):
+        """
+        Startet eine Remux-Konvertierung zu fragmentiertem MP4 im Hintergrund
+        Die Datei kann bereits während der Konvertierung gestreamt werden.
+        plan: Ergebnis von plan_cast_conversion (Audio kopieren wenn möglich)
+        Returns: ProgressiveFile oder None wenn FFmpeg fehlt. Der Aufrufer ist
+        als Verbraucher angemeldet und gibt den Lauf mit release() frei.
+        """
+        input_file = Path(input_path)
+        suffix = self.cache_suffix(plan)
+        output_path = self.cache_index.output_path(input_path, suffix)
+
+        cached = self.cache_manager.lookup(input_path, suffix)
+        if cached:
+            print(f"✓ Nutze bereits konvertierte Datei: {cached.name}")
+            progressive = ProgressiveFile(cached)
+            progressive.acquire()
+            progressive.finish()
+            return progressive
+
+        if not self.is_ffmpeg_available():
+            print("✗ FFmpeg ist nicht installiert!")
+            return None
 
-            # Parse Fortschritt in Echtzeit
-            for line in iter(process.stdout.readline, ''):
-                if 'time=' in line and progress_callback:
-                    time_match = re.search(r'time=(\d+:\d+:\d+\.\d+)', line)
-                    if time_match:
-                        GLib.idle_add(progress_callback, f"Konvertiere... {time_match.group(1)}")
+        part_path = output_path.with_suffix('.part.mp4')
+        # Queue-Worker und Streaming-Thread können gleichzeitig hier ankommen -
+        # nur einer darf FFmpeg auf die .part.mp4 ansetzen
+        with self._active_lock:
+            # Läuft für diese Datei bereits eine Konvertierung? Dann mitnutzen.
+            running = self.active_conversions.get(str(output_path))
+            if isinstance(running, ProgressiveFile) and not running.is_complete():
+                print(f"ℹ Konvertierung läuft bereits: {output_path.name}")
+                running.acquire()
+                return running
+            progressive = ProgressiveFile(part_path)
+            progressive.acquire()
+            self.active_conversions[str(output_path)] = progressive
+
+        print(f"\n=== Progressive Konvertierung (fragmentiertes MP4) ===")
+        print(f"Eingabe: {input_file.name}")
+        print(f"Ausgabe: {output_path.name}")
 
-            process.wait()
+        subtitle_params, subtitle_outputs = self.subtitle_outputs(input_file, plan)
+        cmd = [
+            'ffmpeg',
+            '-i', str(input_file),
+        ] + self.stream_maps_for_plan(plan) + self.video_params_for_plan(plan) + \
+            self.audio_params_for_plan(plan) + [
+            '-sn',
+            # Fragmentiertes MP4: moov am Anfang, danach eigenständige Fragmente
+            '-movflags', 'frag_keyframe+empty_moov+default_base_moof',
+            '-progress', 'pipe:1',
+            '-nostats',
+            '-f', 'mp4',
+            '-y',
+            str(part_path)
+        ] + subtitle_params
+
+        progress = self.track_progress("Konvertiere", input_file, progress_callback)
+
+        def started(process):
+            progressive.process = process
+            if progressive.cancelled:
+                process.terminate()
+
+        def run():
+            returncode, output = run_ffmpeg(cmd, progress, on_start=started)
+            success = returncode == 0 and not progressive.cancelled
+            if returncode and not progressive.cancelled:
+                print(f"✗ FFmpeg-Fehler: {output[-300:]}")
+            progressive.process = None
+            # Fragmentiertes MP4 ist auch abgeschnitten lesbar - Dauer prüfen
+            success = success and self.verify_output(part_path, input_file)
+            self.finish_subtitle_outputs(input_file, subtitle_outputs, success)
 
-            if process.returncode == 0:
-                print(f"✓ Konvertierung erfolgreich!")
-                print(f"  Dateigröße: {output_path.stat().st_size / (1024*1024):.1f} MB")
+            if success:
+                # Per Hardlink veröffentlichen, damit laufende Requests die Datei
+                # unter altem oder neuem Pfad jederzeit finden
+                if output_path.exists():
+                    output_path.unlink()
+                os.link(part_path, output_path)
+                progressive.finish(output_path)
+                part_path.unlink()
+                self.cache_manager.record(input_file, output_path, plan or 'remux', encoder='copy')
+                print(f"✓ Progressive Konvertierung abgeschlossen: {output_path.name}")
                 if progress_callback:
                     GLib.idle_add(progress_callback, "Konvertierung abgeschlossen!")
-                return str(output_path)
             else:
-                print(f"✗ Schnelle Konvertierung fehlgeschlagen, versuche Re-Encoding...")
-                return self.convert_with_reencoding(input_file, output_path, progress_callback)
+                if progressive.cancelled:
+                    print(f"ℹ Progressive Konvertierung abgebrochen: {output_path.name}")
+                else:
+                    print("✗ Progressive Konvertierung fehlgeschlagen")
+                try:
+                    part_path.unlink()
+                except OSError:
+                    pass
+                progressive.finish(success=False)
+            with self._active_lock:
+                if self.active_conversions.get(str(output_path)) is progressive:
+                    del self.active_conversions[str(output_path)]
+
+        threading.Thread(target=run, daemon=True).start()
+        return progressive
+
+    def get_audio_codec(self, input_path, audio_index=0):
+        """Codec einer Audio-Spur aus dem ffprobe-Cache (None bei Fehler oder fehlender Spur)"""
+        probe = self.probe_media(input_path)
+        if probe is None:
+            return None
+        audio_streams = [st for st in probe['streams'] if st.get('codec_type') == 'audio']
+        if audio_index >= len(audio_streams):
+            return None
+        return audio_streams[audio_index].get('codec_name')
+
+    def extract_audio_for_cast(self, input_path, audio_index=0, progress_callback=None):
+        """
+        Extrahiert eine Audio-Spur als AAC in M4A für Audio-Geräte und Gruppen
+        AAC-Spuren werden kopiert, alle anderen zu AAC transkodiert.
+        Returns: Pfad zur M4A-Datei oder None bei Fehler
+        """
+        output_path = self.cache_index.output_path(input_path, f"_a{audio_index}.m4a")
+        with self._conversion_lock(output_path):
+            return self._extract_audio_for_cast(input_path, audio_index, progress_callback)
+
+    def _extract_audio_for_cast(self, input_path, audio_index, progress_callback):
+        input_file = Path(input_path)
+        suffix = f"_a{audio_index}.m4a"
+        output_path = self.cache_index.output_path(input_file, suffix)
+
+        cached = self.cache_manager.lookup(input_file, suffix)
+        if cached:
+            print(f"✓ Nutze bereits extrahierte Audio-Spur: {cached.name}")
+            return str(cached)
+
+        if not self.is_ffmpeg_available():
+            print("✗ FFmpeg ist nicht installiert!")
+            return None
+
+        codec = self.get_audio_codec(input_file, audio_index)
+        if codec is None:
+            print(f"✗ Audio-Spur {audio_index} nicht gefunden")
+            return None
+
+        if codec == 'aac':
+            audio_params = ['-c:a', 'copy']
+        else:
+            audio_params = ['-c:a', 'aac', '-b:a', '192k', '-ar', '48000', '-ac', '2']
+
+        print(f"\n=== Audio-Extraktion (Spur {audio_index}, {codec}) ===")
+        if progress_callback:
+            GLib.idle_add(progress_callback, "Extrahiere Audio-Spur...")
+
+        part_path = output_path.with_suffix('.part.m4a')
+        cmd = [
+            'ffmpeg',
+            '-i', str(input_file),
+            '-map', f'0:a:{audio_index}',
+            '-vn', '-sn', '-dn',
+        ] + audio_params + [
+            '-movflags', '+faststart',
+            '-progress', 'pipe:1',
+            '-nostats',
+            '-f', 'mp4',
+            '-y',
+            str(part_path)
+        ]
 
+        try:
+            progress = self.track_progress("Extrahiere Audio", input_file, progress_callback)
+            returncode, output = run_ffmpeg(cmd, progress)
+            if returncode != 0:
+                print(f"✗ Audio-Extraktion fehlgeschlagen: {output[-500:]}")
+                if part_path.exists():
+                    part_path.unlink()
+                return None
+            if not self.publish_output(part_path, output_path, input_file):
+                return None
+            self.cache_manager.record(input_file, output_path, 'audio-only',
+                                    encoder='copy' if codec == 'aac' else 'aac')
         except Exception as e:
-            print(f"✗ Konvertierungsfehler: {e}")
-            import traceback
-            traceback.print_exc()
-            if output_path.exists():
-                output_path.unlink()
-            if progress_callback:
-                GLib.idle_add(progress_callback, f"Fehler: {e}")
+            print(f"✗ Audio-Extraktion Fehler: {e}")
+            if part_path.exists():
+                part_path.unlink()
             return None
 
-    def convert_with_reencoding(self, input_file, output_path, progress_callback=None):
-        """Konvertiert mit Re-Encoding (garantierte Kompatibilität)"""
-        print("\n=== Re-Encoding für garantierte Kompatibilität ===")
+        print(f"✓ Audio-Spur extrahiert: {output_path.name} "
+              f"({output_path.stat().st_size / (1024*1024):.1f} MB)")
+        if progress_callback:
+            GLib.idle_add(progress_callback, "Audio-Extraktion abgeschlossen!")
+        return str(output_path)
+
+    @staticmethod
+    def bitrate_params(rung):
+        """Bitrate-Parameter (Ziel, Maximum, VBV-Puffer) für eine Stufe der Bitrate-Leiter"""
+        video_kbps = rung['video_kbps'] if rung else 5000
+        return [
+            '-b:v', f'{video_kbps}k',
+            '-maxrate', f'{video_kbps * 8 // 5}k',
+            '-bufsize', f'{video_kbps * 2}k',
+        ]
+
+    def select_reencoder(self, rung=None):
+        """Wählt den Encoder nach encoder_mode: Hardware, sonst Software (CPU)
+
+        Die Wahl wird je Modus und Bitrate-Stufe gemerkt, damit nicht jede
+        HLS-Sitzung die Erkennung samt Ausgaben wiederholt.
+        Returns: (video_codec, video_params) oder (None, None) wenn keiner erlaubt ist
+        """
+        key = (self.encoder_mode, self.software_encoder.codec, rung['name'] if rung else None)
+        if key not in self._reencoder_cache:
+            self._reencoder_cache[key] = self._select_reencoder(rung)
+        video_codec, video_params = self._reencoder_cache[key]
+        return video_codec, list(video_params) if video_params else video_params
+
+    def _select_reencoder(self, rung):
+        if self.encoder_mode != 'software':
+            video_codec, video_params = self.select_video_encoder(rung)
+            if video_codec or self.encoder_mode == 'hardware':
+                return video_codec, video_params
+        if not FFMPEG_CAPABILITIES.has_encoder(self.software_encoder.codec):
+            print(f"  ✗ Software-Encoder {self.software_encoder.codec} fehlt in FFmpeg")
+            return None, None
+        print(f"  ✓ Encoder: {self.software_encoder.codec} (Software, {os.cpu_count()} Kerne)")
+        return self.software_encoder.codec, self.software_encoder.video_params(rung)
+
+    def select_video_encoder(self, rung=None):
+        """Wählt den Hardware-Video-Encoder passend zur GPU
 
-        # Wähle Video-Encoder basierend auf GPU (nur Hardware-Encoder!)
+        Args:
+            rung: Stufe aus BandwidthManager.BITRATE_LADDER (Bitrate + Höhe),
+                  None für die Standard-Einstellungen
+        Returns: (video_codec, video_params) oder (None, None) ohne Hardware-Encoder
+        """
+        # Nur Hardware-Encoder!
         video_codec = None
         video_params = None
+        # Nicht hochskalieren: min(Zielhöhe, Quellhöhe)
+        scale_height = f"min({rung['height']}\\,ih)" if rung else None
+        rate_params = self.bitrate_params(rung)
 
         if GPU_TYPE == 'nvidia':
             print("Nutze NVIDIA NVENC Hardware-Encoding...")
-            video_codec = 'h264_nvenc'
-            video_params = [
-                '-c:v', 'h264_nvenc',
-                '-preset', 'p4',  # NVENC Preset (p1-p7, p4 = balanced)
-                '-profile:v', 'high',
-                '-level', '4.1',
-                '-b:v', '5M',  # Bitrate 5 Mbps
-                '-maxrate', '8M',
-                '-bufsize', '10M',
-            ]
-            print("  ✓ Encoder: NVIDIA NVENC (Hardware-beschleunigt)")
+            if FFMPEG_CAPABILITIES.has_encoder('h264_nvenc'):
+                video_codec = 'h264_nvenc'
+                video_params = [
+                    '-c:v', 'h264_nvenc',
+                    '-preset', 'p4',  # NVENC Preset (p1-p7, p4 = balanced)
+                    '-profile:v', 'high',
+                    '-level', '4.1',
+                ] + rate_params
+                if scale_height:
+                    video_params += ['-vf', f'scale=-2:{scale_height}']
+                print("  ✓ Encoder: NVIDIA NVENC (Hardware-beschleunigt)")
+            else:
+                print("  ✗ NVIDIA NVENC Encoder nicht verfügbar")
 
         elif GPU_TYPE == 'amd':
             print("Nutze AMD VAAPI Hardware-Encoding...")
             # Prüfe ob VAAPI Encoding verfügbar ist
-            try:
-                vaapi_check = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
-                                            capture_output=True, text=True, timeout=5)
-                if 'h264_vaapi' in vaapi_check.stdout:
-                    video_codec = 'h264_vaapi'
-                    video_params = [
-                        '-vaapi_device', '/dev/dri/renderD128',
-                        '-c:v', 'h264_vaapi',
-                        '-profile:v', 'high',
-                        '-level', '4.1',
-                        '-qp', '23',
-                    ]
-                    print("  ✓ Encoder: AMD VAAPI (Hardware-beschleunigt)")
+            if FFMPEG_CAPABILITIES.has_encoder('h264_vaapi'):
+                video_codec = 'h264_vaapi'
+                video_params = [
+                    '-vaapi_device', '/dev/dri/renderD128',
+                    '-c:v', 'h264_vaapi',
+                    '-profile:v', 'high',
+                    '-level', '4.1',
+                ]
+                if rung:
+                    # Bandbreite bekannt: Bitrate statt konstanter Qualität
+                    video_params += ['-rc_mode', 'VBR'] + rate_params
+                    video_params += ['-vf', f'format=nv12,hwupload,scale_vaapi=w=-2:h={scale_height}']
                 else:
-                    print("  ✗ AMD VAAPI Encoder nicht verfügbar")
-                    video_codec = None
-            except Exception as e:
-                print(f"  ✗ Fehler beim Prüfen von VAAPI: {e}")
-                video_codec = None
+                    video_params += ['-qp', '23']
+                print("  ✓ Encoder: AMD VAAPI (Hardware-beschleunigt)")
+            else:
+                print("  ✗ AMD VAAPI Encoder nicht verfügbar")
 
         elif GPU_TYPE == 'intel':
             print("Nutze Intel QSV Hardware-Encoding...")
-            try:
-                qsv_check = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
-                                          capture_output=True, text=True, timeout=5)
-                if 'h264_qsv' in qsv_check.stdout:
-                    video_codec = 'h264_qsv'
-                    video_params = [
-                        '-c:v', 'h264_qsv',
-                        '-profile:v', 'high',
-                        '-level', '4.1',
-                        '-b:v', '5M',
-                    ]
-                    print("  ✓ Encoder: Intel QSV (Hardware-beschleunigt)")
-                else:
-                    print("  ✗ Intel QSV Encoder nicht verfügbar")
-                    video_codec = None
-            except Exception as e:
-                print(f"  ✗ Fehler beim Prüfen von QSV: {e}")
-                video_codec = None
+            if FFMPEG_CAPABILITIES.has_encoder('h264_qsv'):
+                video_codec = 'h264_qsv'
+                video_params = [
+                    '-c:v', 'h264_qsv',
+                    '-profile:v', 'high',
+                    '-level', '4.1',
+                ] + rate_params
+                if scale_height:
+                    video_params += ['-vf', f'scale=-2:{scale_height}']
+                print("  ✓ Encoder: Intel QSV (Hardware-beschleunigt)")
+            else:
+                print("  ✗ Intel QSV Encoder nicht verfügbar")
+
+        return video_codec, video_params
+
+    def convert_with_reencoding(self, input_file, output_path, progress_callback=None, rung=None,
+                                cancel_event=None, plan=None):
+        """Konvertiert mit Re-Encoding (garantierte Kompatibilität)"""
+        print("\n=== Re-Encoding für garantierte Kompatibilität ===")
+        if rung:
+            print(f"Bitrate-Stufe: {rung['name']} ({rung['video_kbps']} kbit/s)")
+
+        # Wähle Video-Encoder basierend auf GPU
+        video_codec, video_params = (None, None)
+        if self.encoder_mode != 'software':
+            video_codec, video_params = self.select_video_encoder(rung)
+        if video_codec is None and self.encoder_mode != 'hardware':
+            return self.convert_with_software_encoder(input_file, output_path, progress_callback,
+                                                      rung, cancel_event, plan=plan)
 
         # Keine Hardware-Beschleunigung verfügbar
         if video_codec is None:
@@ -545,7 +2853,8 @@ class VideoConverter:
                 "Für AMD: sudo dnf install mesa-va-drivers ffmpeg\n"
                 "Für NVIDIA: sudo dnf install nvidia-driver ffmpeg\n"
                 "Für Intel: sudo dnf install intel-media-driver ffmpeg\n\n"
-                "Alternative: Konvertiere die Datei manuell zu MP4 und lade dann die MP4-Datei."
+                "Alternative: Setze \"encoder_mode\" in der Konfiguration auf \"auto\",\n"
+                "dann wird ohne Hardware-Encoder auf der CPU kodiert."
             )
             print("\n" + error_msg)
             if progress_callback:
@@ -557,186 +2866,330 @@ class VideoConverter:
         if progress_callback:
             GLib.idle_add(progress_callback, f"Re-Encoding läuft ({video_codec})...")
 
-        try:
-            cmd = [
-                'ffmpeg',
-                '-i', str(input_file),
-            ]
-
-            # Füge Video-Codec-Parameter hinzu
-            cmd.extend(video_params)
-
-            # Audio-Codec (immer gleich)
-            cmd.extend([
-                '-c:a', 'aac',
-                '-b:a', '192k',
-                '-ar', '48000',
-                '-ac', '2',
-                # MP4-Optimierungen
-                '-movflags', '+faststart',
-                '-progress', 'pipe:1',
-                '-f', 'mp4',
-                '-y',
-                str(output_path)
-            ])
-
-            print(f"Führe aus: {' '.join(cmd)}")
-
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1
-            )
-
-            # Parse Fortschritt in Echtzeit
-            for line in iter(process.stdout.readline, ''):
-                if 'time=' in line and progress_callback:
-                    time_match = re.search(r'time=(\d+:\d+:\d+\.\d+)', line)
-                    if time_match:
-                        GLib.idle_add(progress_callback, f"Re-Encoding... {time_match.group(1)}")
-
-            process.wait()
+        # Alle Audio-Spuren: kompatible kopieren, übrige zu AAC
+        params = self.stream_maps_for_plan(plan) + video_params + self.audio_params_for_plan(plan) + ['-sn']
+        subtitle_params, subtitle_outputs = self.subtitle_outputs(input_file, plan)
+        result = self.run_resumable_conversion(input_file, output_path, params, "Re-Encoding",
+                                               progress_callback, cancel_event,
+                                               extra_outputs=subtitle_params)
+        self.finish_subtitle_outputs(input_file, subtitle_outputs, result is True)
+        if result is None:
+            print(f"ℹ Re-Encoding abgebrochen: {Path(input_file).name} (wird beim nächsten Mal fortgesetzt)")
+            return None
+        if not result:
+            print(f"✗ Re-Encoding fehlgeschlagen")
+            return None
 
-            if process.returncode == 0:
-                print(f"✓ Re-Encoding erfolgreich!")
-                print(f"  Dateigröße: {output_path.stat().st_size / (1024*1024):.1f} MB")
-                if progress_callback:
-                    GLib.idle_add(progress_callback, "Re-Encoding abgeschlossen!")
-                return str(output_path)
+        print(f"✓ Re-Encoding erfolgreich!")
+        print(f"  Dateigröße: {output_path.stat().st_size / (1024*1024):.1f} MB")
+        self.cache_manager.record(input_file, output_path, 'transcode', encoder=video_codec)
+        if progress_callback:
+            GLib.idle_add(progress_callback, "Re-Encoding abgeschlossen!")
+        return str(output_path)
+
+    def convert_with_software_encoder(self, input_file, output_path, progress_callback=None,
+                                      rung=None, cancel_event=None, plan=None):
+        """Re-Encoding rein auf der CPU, in Abschnitten parallel über alle Kerne"""
+        encoder = self.software_encoder
+        if not FFMPEG_CAPABILITIES.has_encoder(encoder.codec):
+            print(f"✗ Software-Encoder {encoder.codec} fehlt in FFmpeg")
+            if progress_callback:
+                GLib.idle_add(progress_callback, f"{encoder.codec} nicht verfügbar")
+            return None
+        print(f"Nutze Software-Encoding ({encoder.codec}, Preset {encoder.preset})...")
+        if progress_callback:
+            GLib.idle_add(progress_callback, f"Re-Encoding läuft ({encoder.codec})...")
+
+        # Fertige Abschnitte bleiben bei Abbruch in resume_dir() liegen
+        temp_path = output_path.with_name(f"{output_path.stem}.tmp.mp4")
+        progress = self.track_progress("Re-Encoding", input_file, progress_callback)
+        subtitle_params, subtitle_outputs = self.subtitle_outputs(input_file, plan)
+        success = encoder.encode(input_file, temp_path, rung, progress, cancel_event,
+                                 work_dir=self.resume_dir(output_path),
+                                 audio_maps=self.stream_maps_for_plan(plan, video=False),
+                                 audio_params=self.audio_params_for_plan(plan),
+                                 extra_outputs=subtitle_params)
+        self.finish_subtitle_outputs(input_file, subtitle_outputs, success)
+        cancelled = bool(cancel_event and cancel_event.is_set())
+        progress.finish('cancelled' if cancelled else ('done' if success else 'failed'))
+        if not success or not self.publish_output(temp_path, output_path, input_file):
+            if cancel_event and cancel_event.is_set():
+                print(f"ℹ Re-Encoding abgebrochen: {Path(input_file).name} (wird beim nächsten Mal fortgesetzt)")
             else:
-                print(f"✗ Re-Encoding fehlgeschlagen")
-                if output_path.exists():
-                    output_path.unlink()
-                return None
+                print(f"✗ Software-Encoding fehlgeschlagen")
+            if temp_path.exists():
+                temp_path.unlink()
+            return None
 
-        except Exception as e:
-            print(f"✗ Re-Encoding Fehler: {e}")
-            if output_path.exists():
-                output_path.unlink()
+        print(f"✓ Re-Encoding erfolgreich!")
+        print(f"  Dateigröße: {output_path.stat().st_size / (1024*1024):.1f} MB")
+        self.cache_manager.record(input_file, output_path, 'transcode', encoder=encoder.codec)
+        if progress_callback:
+            GLib.idle_add(progress_callback, "Re-Encoding abgeschlossen!")
+        return str(output_path)
+
+
+class ConversionJob:
+    """Eine Hintergrund-Konvertierung in der ConversionQueue"""
+
+    def __init__(self, source, path, priority):
+        self.source = source
+        self.path = path
+        self.priority = priority
+        self.state = 'queued'  # queued, running, done, failed, cancelled
+        self.result = None
+        self.progressive = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.detach()
+
+    def attach(self, progressive):
+        """Merkt sich den (geteilten) progressiven Lauf des Jobs"""
+        with self._lock:
+            self.progressive = progressive
+        if self.cancel_event.is_set():
+            self.detach()
+
+    def detach(self):
+        """Gibt den progressiven Lauf frei - abgebrochen wird er nur, wenn niemand sonst ihn nutzt"""
+        with self._lock:
+            progressive, self.progressive = self.progressive, None
+        if progressive:
+            progressive.release()
+
+
+class ConversionQueue:
+    """Konvertiert Dateien vorab im Hintergrund (z.B. die nächsten Playlist-Einträge)
+
+    Ein kleiner Worker-Pool arbeitet Jobs nach Priorität ab (kleiner = früher).
+    Pro Quelldatei gibt es höchstens einen Job; erneutes Einreihen ändert nur
+    die Priorität. Jobs außerhalb des aktuellen Fensters werden abgebrochen.
+    """
+
+    def __init__(self, converter, max_workers=1):
+        self.converter = converter
+        # Callable(path) -> {'plan': ..., 'rung': ...} oder None (nichts zu tun)
+        self.options_provider = None
+        self._queue = PriorityQueue()
+        self._jobs = {}  # Quelle -> ConversionJob
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._workers = []
+        for i in range(max(1, max_workers)):
+            worker = threading.Thread(target=self._worker, name=f"preconvert-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    @staticmethod
+    def source_key(path):
+        return str(Path(path).resolve())
+
+    def submit(self, path, priority=10):
+        """Reiht eine Datei ein oder ändert die Priorität eines vorhandenen Jobs"""
+        source = self.source_key(path)
+        with self._lock:
+            job = self._jobs.get(source)
+            if job and job.state in ('queued', 'running') and not job.cancel_event.is_set():
+                if job.priority != priority:
+                    job.priority = priority
+                    if job.state == 'queued':
+                        # Alter Eintrag in der Queue wird beim Abholen übersprungen
+                        self._queue.put((priority, next(self._sequence), job))
+                return job
+            job = ConversionJob(source, path, priority)
+            self._jobs[source] = job
+            self._queue.put((priority, next(self._sequence), job))
+            return job
+
+    def cancel(self, path):
+        """Bricht den Job einer Datei ab (falls vorhanden)"""
+        with self._lock:
+            job = self._jobs.pop(self.source_key(path), None)
+        if job:
+            job.cancel()
+
+    def set_window(self, paths, keep=()):
+        """Setzt die vorzukonvertierenden Dateien in Reihenfolge
+
+        Jobs für andere Dateien werden abgebrochen, außer sie stehen in keep
+        (z.B. die gerade gestreamte Datei).
+        """
+        wanted = [self.source_key(p) for p in paths]
+        protected = {self.source_key(p) for p in keep if p}
+        with self._lock:
+            obsolete = [job for source, job in self._jobs.items()
+                        if source not in wanted and source not in protected]
+            for job in obsolete:
+                del self._jobs[job.source]
+            for source in protected:
+                job = self._jobs.get(source)
+                if job and job.priority != 0:
+                    job.priority = 0
+                    if job.state == 'queued':
+                        # Wie in submit(): der alte Eintrag wird beim Abholen übersprungen
+                        self._queue.put((0, next(self._sequence), job))
+        for job in obsolete:
+            print(f"ℹ Vorab-Konvertierung abgebrochen: {Path(job.path).name}")
+            job.cancel()
+        for priority, path in enumerate(paths, start=1):
+            self.submit(path, priority)
+
+    def get_jobs(self):
+        """Momentaufnahme aller Jobs (Pfad, Status, Priorität)"""
+        with self._lock:
+            return [{'path': job.path, 'state': job.state, 'priority': job.priority}
+                    for job in sorted(self._jobs.values(), key=lambda j: j.priority)]
+
+    def shutdown(self):
+        """Bricht alle Jobs ab und beendet die Worker"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+        for job in jobs:
+            job.cancel()
+        for _ in self._workers:
+            self._queue.put((float('inf'), next(self._sequence), None))
+
+    def _worker(self):
+        while True:
+            priority, _, job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                # Veraltete Einträge (umpriorisiert, abgebrochen, schon erledigt) überspringen
+                if job.state != 'queued' or job.priority != priority or job.cancel_event.is_set():
+                    continue
+                job.state = 'running'
+            try:
+                job.result = self._run(job)
+                job.state = 'cancelled' if job.cancel_event.is_set() else ('done' if job.result else 'failed')
+            except Exception as e:
+                print(f"✗ Vorab-Konvertierung fehlgeschlagen: {e}")
+                job.state = 'failed'
+            finally:
+                job.done_event.set()
+                with self._lock:
+                    if self._jobs.get(job.source) is job:
+                        del self._jobs[job.source]
+
+    def _run(self, job):
+        options = self.options_provider(job.path) if self.options_provider else None
+        if not options or job.cancel_event.is_set():
             return None
+        plan = options.get('plan')
+        print(f"\n=== Vorab-Konvertierung ({plan['action'] if plan else 'mp4'}): {Path(job.path).name} ===")
+        if plan and plan['copy_video'] and options.get('progressive', True):
+            # Fragmentiertes MP4: startet die Wiedergabe, bevor der Job fertig ist,
+            # teilt sich den Lauf über active_conversions mit prepare_cast_media
+            progressive = self.converter.convert_to_mp4_progressive(job.path, plan=plan)
+            if progressive is None:
+                return None
+            job.attach(progressive)
+            try:
+                # Ein abgebrochener Job wartet nicht auf einen Lauf, den das Streaming weiter nutzt
+                while not progressive.wait_complete(timeout=1.0):
+                    if progressive.is_complete() or job.cancel_event.is_set():
+                        return None
+                return progressive.path
+            finally:
+                job.detach()
+        return self.converter.convert_to_mp4(job.path, rung=options.get('rung'), plan=plan,
+                                             cancel_event=job.cancel_event)
 
 
 class VideoHTTPServer:
-    """Einfacher HTTP-Server für Video-Streaming zu Chromecast"""
+    """Langlebiger HTTP-Server für Video-Streaming zu Chromecast
 
-    def __init__(self):
+    Der Server wird einmal gestartet und liefert alle Dateien aus dem
+    MediaCatalog unter /media/<id>/<name> aus. Ein Wechsel des Videos ist
+    damit nur noch ein URL-Wechsel statt eines Server-Neustarts.
+    """
+
+    def __init__(self, max_workers=16, connection_timeout=30, use_sendfile=True, readahead=None,
+                 on_file_served=None):
         self.server = None
         self.server_thread = None
         self.port = 8765
         self.current_video_path = None
+        self.max_workers = max_workers
+        self.connection_timeout = connection_timeout
+        self.use_sendfile = use_sendfile
+        self.readahead = readahead
+        self.on_file_served = on_file_served
+        self.stats = StreamingStats()
+        self.catalog = MediaCatalog()
+        self.hls_sessions = {}  # Session-ID -> HLSSession
+        self._local_ip_cache = {}  # Ziel-Host -> lokale IP
+        self._start_lock = threading.Lock()
+
+    def get_local_ip(self, target_host=None):
+        """Ermittelt die lokale IP-Adresse, über die target_host erreichbar ist
+
+        Das Ergebnis wird pro Ziel (Cast-Gerät) gecacht.
+        """
+        cache_key = target_host or ''
+        cached = self._local_ip_cache.get(cache_key)
+        if cached:
+            return cached
 
-    def get_local_ip(self):
-        """Ermittelt die lokale IP-Adresse"""
+        ip = "127.0.0.1"
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
+            try:
+                # UDP-connect sendet keine Pakete, wählt aber die Route zum Gerät
+                s.connect((target_host or "8.8.8.8", 8009 if target_host else 80))
+                ip = s.getsockname()[0]
+            finally:
+                s.close()
         except Exception:
-            return "127.0.0.1"
-
-    def start_server(self, video_path):
-        """Startet HTTP-Server für ein Video"""
-        if self.server:
-            self.stop_server()
-
-        self.current_video_path = video_path
-        video_dir = str(Path(video_path).parent)
-
-        class RangeRequestHandler(SimpleHTTPRequestHandler):
-            def log_message(self, format, *args):
-                # Zeige HTTP-Logs für Debugging
-                print(f"HTTP: {format % args}")
+            return ip
 
-            def handle(self):
-                """Überschreibe handle() für besseres Error-Handling"""
-                try:
-                    super().handle()
-                except (ConnectionResetError, BrokenPipeError, ConnectionAbortedError) as e:
-                    # Chromecast hat Verbindung getrennt (z.B. Stop gedrückt)
-                    print(f"HTTP-Verbindung geschlossen: {e}")
-                except Exception as e:
-                    print(f"HTTP-Server Fehler: {e}")
-                    import traceback
-                    traceback.print_exc()
-            
-            def do_GET(self):
-                """Behandelt GET-Anfragen mit Unterstützung für Range-Header."""
-                range_header = self.headers.get('Range')
-                if not range_header:
-                    # Keine Range-Anfrage, verhalte dich wie normal
-                    super().do_GET()
-                    return
+        self._local_ip_cache[cache_key] = ip
+        return ip
 
-                try:
-                    filepath = self.translate_path(self.path)
-                    with open(filepath, 'rb') as f:
-                        fs = os.fstat(f.fileno())
-                        file_len = fs.st_size
-                        
-                        # Parse Range Header
-                        byte1, byte2 = 0, None
-                        m = re.match(r'bytes=(\d+)-(\d*)', range_header)
-                        if m:
-                            byte1 = int(m.group(1))
-                            if m.group(2):
-                                byte2 = int(m.group(2))
-
-                        if byte2 is None:
-                            byte2 = file_len - 1
-
-                        # Ungültige Range
-                        if byte1 >= file_len or byte2 >= file_len:
-                            self.send_error(416, 'Requested Range Not Satisfiable')
-                            return
-
-                        self.send_response(206) # Partial Content
-                        self.send_header('Content-type', self.guess_type(self.path))
-                        self.send_header('Accept-Ranges', 'bytes')
-                        
-                        content_range = f'bytes {byte1}-{byte2}/{file_len}'
-                        self.send_header('Content-Range', content_range)
-                        self.send_header('Content-Length', str(byte2 - byte1 + 1))
-                        self.end_headers()
-
-                        f.seek(byte1)
-                        chunk_size = 65536 # 64KB
-                        bytes_to_send = byte2 - byte1 + 1
-                        while bytes_to_send > 0:
-                            data = f.read(min(chunk_size, bytes_to_send))
-                            if not data:
-                                break
-                            self.wfile.write(data)
-                            bytes_to_send -= len(data)
-                except Exception as e:
-                    print(f"Fehler bei Range-Request: {e}")
-                    # Fallback auf normales Verhalten
-                    f = self.send_head()
-                    if f:
-                        try:
-                            self.copyfile(f, self.wfile)
-                        finally:
-                            f.close()
+    def start_server(self, video_path=None):
+        """Startet den HTTP-Server (einmalig) und registriert optional ein Video
 
-            def __init__(self, *args, **kwargs):
-                super().__init__(*args, directory=video_dir, **kwargs)
+        Läuft der Server bereits, wird nur registriert - kein Neustart.
+        """
+        with self._start_lock:
+            if not self.server:
+                if not self._bind_server():
+                    return False
 
+        if video_path:
+            self.current_video_path = video_path
+            self.catalog.register(video_path)
+        return True
+
+    def _bind_server(self):
+        handler = type('VideoRangeRequestHandler', (RangeRequestHandler,),
+                       {'timeout': self.connection_timeout,
+                        'use_sendfile': self.use_sendfile,
+                        'catalog': self.catalog,
+                        'hls_sessions': self.hls_sessions,
+                        'readahead': self.readahead,
+                        'stats': self.stats,
+                        'on_file_served': staticmethod(self.on_file_served)
+                                          if self.on_file_served else None})
 
         try:
-            # Versuche mehrere Ports, falls 8765 belegt ist
-            ports_to_try = [self.port, 8766, 8767, 8768, 8080, 8888]
+            # Bevorzuge den zuletzt gebundenen Port, danach Ausweich-Ports
+            ports_to_try = [self.port] + [p for p in (8765, 8766, 8767, 8768, 8080, 8888) if p != self.port]
             server_started = False
 
             for port in ports_to_try:
                 try:
+                    self.server = PooledHTTPServer(('0.0.0.0', port), handler,
+                                                   max_workers=self.max_workers)
                     self.port = port
-                    self.server = HTTPServer(('0.0.0.0', self.port), RangeRequestHandler)
                     self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
                     self.server_thread.start()
-                    print(f"✓ HTTP-Server gestartet auf Port {self.port}")
+                    print(f"✓ HTTP-Server gestartet auf Port {self.port} ({self.max_workers} Worker)")
 
                     # Kurze Wartezeit, um dem Server Zeit zum Binden zu geben
                     time.sleep(0.1)
@@ -745,7 +3198,6 @@ class VideoHTTPServer:
                         raise OSError("Server-Thread konnte nicht gestartet werden.")
 
                     print(f"  Lokale IP: {self.get_local_ip()}")
-                    print(f"  Video-Verzeichnis: {video_dir}")
                     server_started = True
                     break
                 except OSError as e:
@@ -763,43 +3215,363 @@ class VideoHTTPServer:
             print(f"✗ Fehler beim Starten des HTTP-Servers: {e}")
             import traceback
             traceback.print_exc()
+            self.server = None
             return False
 
-    def get_video_url(self, video_path):
-        """Gibt die HTTP-URL für ein Video zurück"""
-        if not self.server:
-            if not self.start_server(video_path):
-                return None
+    def get_media_url(self, path, device_host=None, content_type=None, progressive=None):
+        """Registriert eine Datei im Katalog und gibt ihre HTTP-URL zurück
+
+        Args:
+            path: Lokaler Dateipfad (Video, konvertierte Cache-Datei, Untertitel)
+            device_host: IP des Cast-Geräts, um die passende lokale Adresse zu wählen
+            content_type: Optionaler MIME-Type (sonst anhand der Endung)
+            progressive: ProgressiveFile, falls die Datei noch geschrieben wird
+        """
+        if not self.start_server():
+            return None
+
+        entry = self.catalog.register(path, content_type, progressive)
+        local_ip = self.get_local_ip(device_host)
+        return f"http://{local_ip}:{self.port}{entry.url_path}"
 
-        local_ip = self.get_local_ip()
-        video_filename = Path(video_path).name
-        url = f"http://{local_ip}:{self.port}/{quote(video_filename)}"
+    def get_hls_url(self, session, device_host=None):
+        """Registriert eine HLS-Sitzung und gibt die URL ihrer Playlist zurück"""
+        if not self.start_server():
+            return None
+
+        # Eine Sitzung pro Cast: Vorgänger samt Segmenten aufräumen
+        self.close_hls_sessions(keep=session)
+        self.hls_sessions[session.session_id] = session
+        local_ip = self.get_local_ip(device_host)
+        return f"http://{local_ip}:{self.port}/hls/{session.session_id}/index.m3u8"
+
+    def close_hls_sessions(self, keep=None):
+        """Schließt alle HLS-Sitzungen außer keep (neuer Cast oder Cast beendet)"""
+        for session_id, session in list(self.hls_sessions.items()):
+            if session is keep or self.hls_sessions.pop(session_id, None) is None:
+                continue
+            # Gleicher Inhalt und gleiche Stufe nutzen dasselbe Segment-Verzeichnis
+            session.close(remove_segments=keep is None or session.segment_dir != keep.segment_dir)
+
+    def get_video_url(self, video_path, device_host=None):
+        """Gibt die HTTP-URL für ein Video zurück"""
+        url = self.get_media_url(video_path, device_host)
+        if url:
+            self.current_video_path = video_path
         return url
 
     def stop_server(self):
         """Stoppt den HTTP-Server"""
+        self.close_hls_sessions()
+        if self.readahead:
+            stats = self.readahead.get_stats()
+            print(f"Read-Ahead: {stats['prefetch_hits']} Treffer, {stats['prefetch_misses']} Fehlgriffe")
         if self.server:
             self.server.shutdown()
+            self.server.server_close()
             self.server = None
             self.server_thread = None
             print("HTTP-Server gestoppt")
 
+    def shutdown(self):
+        """Stoppt den Server endgültig (Programmende)
+
+        Der Read-Ahead überlebt stop_server(), weil start_server() den
+        Server beim nächsten Cast mit demselben Manager neu startet.
+        """
+        self.stop_server()
+        if self.readahead:
+            self.readahead.close()
+
+
+class PlaybackClock:
+    """Lokales Modell der Wiedergabeposition eines Receivers (thread-sicher)
+
+    Speichert die zuletzt gemeldete Position mit Empfangszeitpunkt, Zustand
+    und Wiedergaberate und rechnet daraus die aktuelle Position hoch. Jede
+    Statusmeldung setzt den Anker neu; kleine Rücksprünge durch
+    Netzwerk-Latenz werden geglättet, Abweichungen über DRIFT_THRESHOLD
+    übernommen und als drift_exceeded gemeldet.
+    """
+
+    DRIFT_THRESHOLD = 1.0  # Sekunden
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._position = 0.0
+            self._anchor = time.monotonic()
+            self.state = 'IDLE'
+            self.rate = 1.0
+            self.duration = 0.0
+            self.last_drift = 0.0
+            self.drift_exceeded = False
+            self._last_returned = 0.0
+
+    def sync(self, position, state, rate=1.0, duration=None):
+        """Übernimmt eine Statusmeldung des Receivers"""
+        now = time.monotonic()
+        with self._lock:
+            position = float(position or 0.0)
+            if self.state == 'PLAYING' and state == 'PLAYING':
+                self.last_drift = position - self._predict(now)
+                self.drift_exceeded = abs(self.last_drift) > self.DRIFT_THRESHOLD
+            else:
+                self.last_drift = 0.0
+                self.drift_exceeded = False
+            if state != 'PLAYING' or self.drift_exceeded:
+                self._last_returned = position
+            self._position = position
+            self._anchor = now
+            self.state = state or 'IDLE'
+            self.rate = rate if rate else 1.0
+            if duration is not None:
+                self.duration = duration or 0.0
+
+    def seek(self, position):
+        """Setzt die Position sofort (die Bestätigung kommt per Statusmeldung)"""
+        with self._lock:
+            self._position = position
+            self._anchor = time.monotonic()
+            self._last_returned = position
+            self.drift_exceeded = False
+
+    def position(self):
+        """Hochgerechnete Position in Sekunden"""
+        with self._lock:
+            position = self._predict(time.monotonic())
+            if self.state == 'PLAYING' and 0 < self._last_returned - position <= self.DRIFT_THRESHOLD:
+                # Leicht verspätete Meldung: anhalten statt zurückspringen
+                position = self._last_returned
+            self._last_returned = position
+            return position
+
+    def _predict(self, now):
+        position = self._position
+        if self.state == 'PLAYING':
+            position += (now - self._anchor) * self.rate
+        if self.duration:
+            position = min(position, self.duration)
+        return max(0.0, position)
+
+
+class CastConnectionPool:
+    """Hält Verbindungen zu den zuletzt genutzten Chromecasts offen (nach UUID)
+
+    Ein Gerätewechsel trennt die alte Verbindung nicht; beim Zurückwechseln
+    ist das Gerät sofort verbunden. Über MAX_CONNECTIONS hinaus wird die am
+    längsten ungenutzte Verbindung geschlossen. Hat sich die Adresse eines
+    Geräts geändert oder ist die Verbindung tot, wird sie neu aufgebaut.
+    Verbindungsaufbauten zu verschiedenen Geräten laufen parallel; nur
+    Aufrufe für dasselbe Gerät warten aufeinander.
+    """
+
+    MAX_CONNECTIONS = 3
+    CONNECT_TIMEOUT = 10.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._host_locks = {}  # UUID -> Lock, verhindert doppelte Verbindungen zum selben Gerät
+        self._entries = {}  # UUID -> {'cast', 'address', 'last_used'}
+
+    @staticmethod
+    def _address(service):
+        return (service.host, service.port)
+
+    @staticmethod
+    def is_connected(cast):
+        socket_client = getattr(cast, 'socket_client', None)
+        return bool(socket_client and socket_client.is_connected)
+
+    def get(self, service, fresh=False):
+        """Liefert ein verbundenes Chromecast-Objekt für service
+
+        fresh: vorhandene Verbindung verwerfen und neu verbinden
+        Returns: Chromecast oder None, wenn keine Verbindung zustande kommt
+        """
+        key = str(service.uuid)
+        with self._lock:
+            host_lock = self._host_locks.setdefault(key, threading.Lock())
+        with host_lock:
+            return self._get(service, fresh)
+
+    def _get(self, service, fresh):
+        key = str(service.uuid)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and not fresh and entry['address'] == self._address(service) \
+                    and self.is_connected(entry['cast']):
+                entry['last_used'] = time.monotonic()
+                print(f"✓ Verbindung zu '{service.friendly_name}' wiederverwendet")
+                return entry['cast']
+            if entry:
+                del self._entries[key]
+        if entry:
+            self._close(entry['cast'])
+
+        cast = pychromecast.get_chromecast_from_host(
+            (service.host, service.port, service.uuid, service.model_name, service.friendly_name),
+        )
+        if not cast:
+            return None
+        print("Warte auf Verbindung...")
+        cast.wait(timeout=self.CONNECT_TIMEOUT)  # Warte, bis die Verbindung aktiv ist
+        if not self.is_connected(cast):
+            self._close(cast)
+            return None
+
+        with self._lock:
+            self._entries[key] = {'cast': cast, 'address': self._address(service),
+                                  'last_used': time.monotonic()}
+            evicted = sorted(self._entries.items(), key=lambda item: item[1]['last_used'])
+            evicted = evicted[:max(0, len(evicted) - self.MAX_CONNECTIONS)]
+            for evicted_key, _ in evicted:
+                del self._entries[evicted_key]
+        for _, evicted_entry in evicted:
+            self._close(evicted_entry['cast'])
+        return cast
+
+    def release(self, uuid):
+        """Schließt die Verbindung zu einem Gerät; die übrigen bleiben offen"""
+        with self._lock:
+            entry = self._entries.pop(str(uuid), None)
+        if entry:
+            self._close(entry['cast'])
+
+    def close_all(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._close(entry['cast'])
+
+    @staticmethod
+    def _close(cast):
+        try:
+            cast.disconnect(timeout=1.0)
+        except Exception as e:
+            print(f"ℹ Fehler beim Trennen von '{cast.name}': {e}")
+
+
+class CastStatusListener:
+    """Leitet pychromecast-Statusmeldungen an den ChromecastManager weiter
+
+    Die Callbacks laufen im Socket-Thread von pychromecast. Meldungen eines
+    inzwischen abgewählten Geräts werden ignoriert.
+    """
+
+    def __init__(self, manager, cast):
+        self.manager = manager
+        self.cast = cast
+
+    def new_cast_status(self, status):
+        self._publish()
+
+    def new_media_status(self, status):
+        self._publish(media=status)
+
+    def new_connection_status(self, status):
+        self._publish(connection=getattr(status, 'status', None))
+        if self.manager.selected_cast is self.cast:
+            self.manager.on_connection_status(self.cast, getattr(status, 'status', None))
+
+    def load_media_failed(self, item, error_code):
+        self._publish(media=self.cast.media_controller.status, load_error=error_code or 'LOAD_FAILED')
+
+    def _publish(self, **extra):
+        if self.manager.selected_cast is self.cast:
+            self.manager.publish_status(**extra)
+
 
 class ChromecastManager:
-    """Verwaltet Chromecast-Geräte und Streaming"""
+    """Verwaltet Chromecast-Geräte und Streaming
+
+    Der Gerätestatus wird per Listener aus dem Socket-Thread in einen
+    unveränderlichen Snapshot geschrieben (get_extended_status). Die
+    Oberfläche liest nur diesen Snapshot; die Position rechnet eine
+    PlaybackClock zwischen den Meldungen hoch. Aktive Status-Abfragen
+    schickt ein Hintergrund-Thread in einem an den Wiedergabezustand
+    angepassten Takt.
+    """
+
+    # Abfrage-Intervalle (Sekunden) je Player-Zustand; ohne Medium STATUS_POLL_IDLE.
+    # Während PLAYING rechnet die PlaybackClock hoch, Abfragen korrigieren nur die Drift.
+    STATUS_POLL_INTERVALS = {'BUFFERING': 1.0, 'PLAYING': 15.0, 'PAUSED': 15.0}
+    STATUS_POLL_DRIFT = 2.0  # nach zu großer Abweichung schneller nachfragen
+    STATUS_POLL_IDLE = 10.0
+    STATUS_POLL_MAX = 30.0  # Obergrenze bei wiederholten Fehlern
+
+    # Zeitlimits (Sekunden) für den Wiedergabe-Start; 'playing' deckt auch
+    # das Aufwachen eines ausgeschalteten TVs ab (30+ Sekunden)
+    START_TIMEOUTS = {'quit_app': 5.0, 'load': 10.0, 'playing': 45.0}
+    # Erneuter Play-Befehl als "Anstoß", falls der Receiver IDLE bleibt:
+    # erstmals nach START_NUDGE_FIRST, danach mit verdoppeltem Abstand
+    START_NUDGE_FIRST = 3.0
+    START_NUDGE_BACKOFF = 2.0
+    START_HISTORY = 20  # gespeicherte Startzeiten für get_start_statistics
+
+    # Wiederverbinden nach Verbindungsverlust: pychromecast versucht es selbst;
+    # gelingt das nicht innerhalb von RECONNECT_GRACE Sekunden, wird die
+    # Verbindung mit wachsendem Abstand (bis RECONNECT_MAX) neu aufgebaut
+    RECONNECT_GRACE = 5.0
+    RECONNECT_MAX = 60.0
+    RESUME_TIMEOUT = 5.0  # Wartezeit auf die alte Media-Sitzung nach dem Wiederverbinden
+
+    MEDIA_RECEIVER_APP_ID = 'CC1AD845'
+    SESSION_HEARTBEAT = 30.0  # Sekunden zwischen Status-Anfragen einer vorgewärmten Sitzung
+    WARM_TIMEOUT = 15.0  # so lange wartet play_video auf ein laufendes Vorwärmen
+
+    # Track-ID für nachträglich geladene Untertitel; eingebettete Spuren
+    # nummeriert der Receiver ab 1, mitgeladene WebVTT-Spuren ab 1000
+    EXTERNAL_SUBTITLE_TRACK_ID = 999
 
     def __init__(self):
         self.chromecasts = []
         self.selected_cast = None
         self.selected_device_name = None  # Name des ausgewählten Geräts
+        self.selected_device_host = None  # IP des ausgewählten Geräts
+        self.capabilities = DeviceCapabilityRegistry()
         self.mc = None
+        self.pool = CastConnectionPool()
+        self.selected_service = None
+        # Zählt Gerätewahlen und Trennungen; eine langsame Verbindung wird
+        # verworfen, wenn inzwischen eine neuere Wahl begonnen hat
+        self._selection_generation = 0
+        self._selection_lock = threading.Lock()
+        self._status_listeners = {}  # UUID -> CastStatusListener (einmal je Chromecast-Objekt)
+        self._reconnecting = threading.Event()
+        self.text_tracks = []  # mit dem Medium geladene Untertitel-Spuren
+        self._status_snapshot = self.DISCONNECTED_STATUS
+        self._status_lock = threading.Lock()
+        self._connection_state = None
+        self._poll_wake = threading.Event()
+        self._poll_stop = None  # Event des laufenden Abfrage-Threads
+        self._status_changed = threading.Condition(self._status_lock)
+        self._load_error = None  # Fehlercode aus load_media_failed
+        self.clock = PlaybackClock()
+        self.start_history = deque(maxlen=self.START_HISTORY)  # (Sekunden bis PLAYING, Phasen)
+        # Vorgewärmte Receiver-Sitzung (warm_session)
+        self.session_idle_timeout = None  # Sekunden ohne Wiedergabe bis zum Beenden, None = aus
+        self._session_warm = False
+        self._session_active_at = 0.0
+        self._warm_done = threading.Event()
+        self._warm_done.set()
         self._discovery_browser = None
         self._listener = None
         self._zconf_instance = None
         self._found_devices = {} # UUID -> Service
+        self._discovery_callback = None
 
     def discover_chromecasts(self, callback):
-        """Sucht nach verfügbaren Chromecast-Geräten"""
+        """Sucht nach verfügbaren Chromecast-Geräten
+
+        callback erhält (im Hauptthread) die Liste der gefundenen Geräte; ein
+        erneuter Aufruf ersetzt den Callback der laufenden Suche.
+        """
+        self._discovery_callback = callback
         if self._discovery_browser:
             print("ℹ Chromecast-Suche läuft bereits.")
             # Sofort die bereits gefundenen Geräte zurückgeben
@@ -817,7 +3589,7 @@ class ChromecastManager:
             print(f"✓ Gerät gefunden: {service.friendly_name} ({service.model_name})")
             self._found_devices[uuid] = service
             self.chromecasts = list(self._found_devices.values())
-            GLib.idle_add(callback, self.chromecasts)
+            GLib.idle_add(self._discovery_callback, self.chromecasts)
 
         def remove_callback(uuid, name, service):
             """Wird aufgerufen, wenn ein Gerät aus dem Netzwerk verschwindet."""
@@ -825,7 +3597,7 @@ class ChromecastManager:
             if uuid in self._found_devices:
                 del self._found_devices[uuid]
                 self.chromecasts = list(self._found_devices.values())
-                GLib.idle_add(callback, self.chromecasts)
+                GLib.idle_add(self._discovery_callback, self.chromecasts)
 
         # Listener erstellen
         self._listener = pychromecast.CastListener(add_callback, remove_callback)
@@ -849,28 +3621,44 @@ class ChromecastManager:
 
         GLib.timeout_add_seconds(3, check_if_any_found)
 
-    def connect_to_chromecast(self, service):
-        """Verbindet mit einem Chromecast-Gerät"""
+    def connect_to_chromecast(self, service, background=False):
+        """Verbindet mit einem Chromecast-Gerät
+
+        background: Vorab-Verbindung (preconnect_last_device) - wird verworfen,
+                    sobald ein Gerät gewählt ist, eine Wahl begonnen hat oder
+                    getrennt wurde
+        """
+        with self._selection_lock:
+            if background and self.selected_cast:
+                return False
+            if not background:
+                self._selection_generation += 1
+            generation = self._selection_generation
         try:
             print(f"\n=== Verbinde mit '{service.friendly_name}' ===")
             print(f"Host: {service.host}:{service.port}")
 
-            # Erstelle das Chromecast-Objekt direkt aus den Host-Informationen des
-            # gefundenen Service. Dies ist der zuverlässigste Weg, da er keine neue
-            # Suche startet und die bestehende Zeroconf-Instanz korrekt weiterverwendet.
-            self.selected_cast = pychromecast.get_chromecast_from_host(
-                (service.host, service.port, service.uuid, service.model_name, service.friendly_name),
-            )
+            # Das Chromecast-Objekt entsteht direkt aus den Host-Informationen des
+            # gefundenen Service (keine neue Suche); der Pool hält es für
+            # spätere Wechsel offen.
+            cast = self.pool.get(service)
 
-            if not self.selected_cast:
+            if not cast:
                 print(f"✗ Gerät '{service.friendly_name}' konnte nicht verbunden werden.")
                 return False
+            with self._selection_lock:
+                # Der Verbindungsaufbau blockiert - erst jetzt entscheiden, ob er noch gilt
+                if generation != self._selection_generation or (background and self.selected_cast):
+                    print(f"ℹ Verbindung zu '{service.friendly_name}' verworfen (inzwischen anderes Gerät gewählt)")
+                    return False
+                self.selected_cast = cast
+                self.selected_service = service
 
-            print("Warte auf Verbindung...")
-            self.selected_cast.wait()  # Warte, bis die Verbindung aktiv ist
-
-            # Speichere den Namen des ausgewählten Geräts
-            self.selected_device_name = service.friendly_name
+                # Speichere den Namen des ausgewählten Geräts
+                self.selected_device_name = service.friendly_name
+                self.selected_device_host = service.host
+                self.mc = self.selected_cast.media_controller
+            self.start_status_updates()
 
             print(f"✓ Erfolgreich verbunden mit '{service.friendly_name}'")
             print(f"  Status: {self.selected_cast.status}")
@@ -883,8 +3671,42 @@ class ChromecastManager:
             traceback.print_exc()
         return False
 
-    def play_video(self, video_path, video_url):
-        """Spielt Video auf Chromecast ab"""
+    def is_audio_only_device(self):
+        """True für Lautsprecher und Multi-Room-Gruppen (kein Bildschirm)"""
+        if not self.selected_cast:
+            return False
+        return getattr(self.selected_cast, 'cast_type', None) in ('audio', 'group')
+
+    def get_cast_profile(self):
+        """Codec-Profil des verbundenen Geräts für den Konvertierungs-Planer"""
+        if not self.selected_cast:
+            return None
+        return self.capabilities.get_cast_profile(
+            self.selected_cast.model_name, getattr(self.selected_cast, 'cast_type', None)
+        )
+
+    def get_device_uuid(self):
+        """Gibt die UUID des verbundenen Geräts als String zurück (None wenn keins)"""
+        if not self.selected_cast:
+            return None
+        return str(self.selected_cast.uuid)
+
+    def get_device_host(self):
+        """Gibt die IP-Adresse des verbundenen Geräts zurück (None wenn keins)"""
+        if not self.selected_cast:
+            return None
+        return self.selected_device_host
+
+    def play_video(self, video_path, video_url, content_type=None, media_info=None, text_tracks=None):
+        """Spielt Video auf Chromecast ab
+
+        Args:
+            content_type: Optionaler MIME-Type (z.B. HLS), sonst anhand der Endung
+            media_info: Codecs der gesendeten Streams (siehe plan_cast_conversion);
+                        scheitert das Laden, merkt sich das Gerät diese als nicht unterstützt
+            text_tracks: WebVTT-Untertitel als Cast-Track-Dicts (trackId, trackContentId, ...);
+                         werden mitgeladen, aber nicht aktiviert
+        """
         if not self.selected_cast:
             print("✗ Kein Chromecast-Gerät ausgewählt")
             return False
@@ -902,24 +3724,38 @@ class ChromecastManager:
             print(f"Video: {Path(video_path).name}")
             print(f"URL: {video_url}")
 
+            started = time.monotonic()
+            phases = {}
+
+            # Ein laufendes Vorwärmen (warm_session) erst abschließen lassen
+            if not self._warm_done.is_set():
+                print("  Warte auf Vorwärmen des Receivers...")
+                self._warm_done.wait(self.WARM_TIMEOUT)
+                phases['warm'] = time.monotonic() - started
+            self._session_active_at = time.monotonic()
+            if self._session_warm and self.selected_cast.app_id == self.MEDIA_RECEIVER_APP_ID:
+                print("✓ Receiver-Sitzung ist vorgewärmt")
+
             # Prüfe ob eine andere App aktiv ist (wichtig für Xiaomi TVs)
-            if self.selected_cast.app_id and self.selected_cast.app_id != 'CC1AD845':
-                print(f"ℹ Aktive App erkannt: {self.selected_cast.app_display_name} ({self.selected_cast.app_id})")
-                print("  Beende aktive App für Chromecast-Streaming...")
-                try:
-                    self.selected_cast.quit_app()
-                    # Warte kurz bis App beendet ist
-                    time.sleep(2)
-                    print("  ✓ App beendet")
-                except Exception as e:
-                    print(f"  ⚠ Konnte App nicht beenden: {e}")
+            if self._quit_foreign_app():
+                phases['quit_app'] = time.monotonic() - started
 
             self.mc = self.selected_cast.media_controller
 
             # Video-Typ bestimmen
             mime_type = 'video/mp4'
 
-            if video_path.lower().endswith('.mkv'):
+            device_mime_type = self.capabilities.mime_type_for(
+                video_path, self.selected_cast.model_name, getattr(self.selected_cast, 'cast_type', None)
+            )
+
+            if content_type:
+                mime_type = content_type
+                print(f"✓ Vorgegebener Content-Type: {content_type}")
+            elif device_mime_type:
+                mime_type = device_mime_type
+                print(f"✓ Container vom Gerät unterstützt")
+            elif video_path.lower().endswith('.mkv'):
                 mime_type = 'video/x-matroska'
                 print("ℹ MKV-Format (sollte bereits zu MP4 konvertiert worden sein)")
             elif video_path.lower().endswith('.avi'):
@@ -936,99 +3772,43 @@ class ChromecastManager:
 
             print(f"MIME-Type: {mime_type}")
 
-            # Teste HTTP-Server Erreichbarkeit
-            print("\nTeste HTTP-Server Erreichbarkeit...")
-            import urllib.request
-            try:
-                req = urllib.request.Request(video_url, method='HEAD')
-                urllib.request.urlopen(req, timeout=5)
-                print("✓ HTTP-Server ist erreichbar")
-            except Exception as e:
-                print(f"✗ HTTP-Server nicht erreichbar: {e}")
-                print("  Überprüfe Firewall-Einstellungen!")
-                return False
-
             print("\nStarte Chromecast-Wiedergabe...")
 
             # Erweiterte Metadaten für bessere Kompatibilität mit Xiaomi TVs
             video_title = Path(video_path).stem
+            is_audio = mime_type.startswith('audio/')
             metadata = {
-                'metadataType': 0,  # GenericMediaMetadata
+                'metadataType': 3 if is_audio else 0,  # MusicTrackMediaMetadata / GenericMediaMetadata
                 'title': video_title,
                 'contentType': mime_type
-            }
-
-            print(f"  Titel: {video_title}")
-            print(f"  Content-Type: {mime_type}")
-
-            # Starte Wiedergabe mit Metadaten
-            self.mc.play_media(
-                video_url,
-                mime_type,
-                title=video_title,
-                autoplay=True,
-                current_time=0
-            )
-
-            # Warte auf Status-Update
-            print("  Warte auf Chromecast-Antwort...")
-            self.mc.block_until_active(timeout=10)
-
-            # Robuste Überprüfung, ob die Wiedergabe wirklich startet
-            # Wenn TV ausgeschaltet war, kann Aufwachen 30+ Sekunden dauern!
-            max_attempts = 45  # 45 Sekunden Timeout (für TV-Aufwachen)
-            print(f"  Warte bis zu {max_attempts} Sekunden auf Wiedergabe-Start...")
-
-            for attempt in range(max_attempts):
-                time.sleep(1) # Warte eine Sekunde zwischen den Prüfungen
-
-                try:
-                    self.selected_cast.media_controller.update_status()
-                    status = self.mc.status.player_state
-                except Exception as e:
-                    if attempt % 5 == 0:
-                        print(f"  Versuch {attempt + 1}/{max_attempts}: Fehler beim Status-Update: {e}")
-                    continue
-
-                if status in ("PLAYING", "BUFFERING"):
-                    print(f"✓ Streaming erfolgreich gestartet nach {attempt + 1} Sekunden!")
-                    print(f"  Status: {status}")
-                    if self.mc.status.duration:
-                        print(f"  Dauer: {self.mc.status.duration} Sekunden")
-                    return True
-                elif status == "IDLE":
-                    # Bei TV-Aufwachen kann es lange IDLE bleiben
-                    if attempt < 30:
-                        if attempt % 5 == 0:  # Nur alle 5 Sekunden loggen
-                            print(f"  Versuch {attempt + 1}/{max_attempts}: Status ist IDLE, warte weiter (TV wacht möglicherweise auf)...")
-                    else:
-                        print(f"  Versuch {attempt + 1}/{max_attempts}: Status ist IDLE, warte weiter...")
+            }
 
-                    # Manchmal hilft ein erneuter Play-Befehl
-                    if attempt == 3:
-                        print("  ... sende erneuten Play-Befehl als 'Anstoß'.")
-                        try:
-                            self.mc.play()
-                        except Exception as e:
-                            print(f"  ... Fehler beim Play-Befehl: {e}")
-                    elif attempt == 15:
-                        print("  ... sende zweiten Play-Befehl (TV könnte jetzt bereit sein).")
-                        try:
-                            self.mc.play()
-                        except Exception as e:
-                            print(f"  ... Fehler beim Play-Befehl: {e}")
-                    elif attempt == 30:
-                        print("  ... sende dritten Play-Befehl (letzter Versuch).")
-                        try:
-                            self.mc.play()
-                        except Exception as e:
-                            print(f"  ... Fehler beim Play-Befehl: {e}")
-                else:
-                    if attempt % 5 == 0:  # Nur alle 5 Sekunden loggen
-                        print(f"  Versuch {attempt + 1}/{max_attempts}: Status ist '{status}', warte...")
+            print(f"  Titel: {video_title}")
+            print(f"  Content-Type: {mime_type}")
 
-            print(f"✗ Wiedergabe konnte nicht gestartet werden nach {max_attempts} Sekunden.")
-            print("  Möglicherweise ist der TV ausgeschaltet oder Chromecast reagiert nicht.")
+            # Starte Wiedergabe mit Metadaten
+            self._load_error = None
+            load_sent = time.monotonic()
+            self.mc.play_media(
+                video_url,
+                mime_type,
+                title=video_title,
+                autoplay=True,
+                current_time=0,
+                metadata=metadata if is_audio else None,
+                media_info={'tracks': text_tracks} if text_tracks else None
+            )
+            self.text_tracks = list(text_tracks or [])
+            self.request_status_refresh()
+
+            state = self._await_playback_start(video_url, mime_type, media_info, load_sent, phases)
+            if state in ("PLAYING", "BUFFERING"):
+                self.record_start_time(time.monotonic() - started, phases)
+                snapshot = self.get_extended_status()
+                print(f"  Status: {state}")
+                if snapshot['duration']:
+                    print(f"  Dauer: {snapshot['duration']} Sekunden")
+                return True
             return False
         except Exception as e:
             print(f"\n✗ Streaming fehlgeschlagen: {e}")
@@ -1077,16 +3857,12 @@ class ChromecastManager:
             self.mc.stop()
 
     def get_position(self):
-        """Gibt Chromecast-Position in Sekunden zurück"""
-        if self.mc and self.mc.status:
-            return self.mc.status.current_time or 0.0
-        return 0.0
+        """Gibt Chromecast-Position in Sekunden zurück (lokal hochgerechnet, siehe PlaybackClock)"""
+        return self.clock.position()
 
     def get_duration(self):
-        """Gibt Chromecast-Dauer in Sekunden zurück"""
-        if self.mc and self.mc.status:
-            return self.mc.status.duration or 0.0
-        return 0.0
+        """Gibt Chromecast-Dauer in Sekunden zurück (aus dem Status-Snapshot)"""
+        return self._status_snapshot['duration']
 
     def seek(self, position_seconds):
         """Springt zu Position auf Chromecast"""
@@ -1095,11 +3871,10 @@ class ChromecastManager:
                 print(f"Chromecast: Seeking to {position_seconds:.1f}s")
                 # Warte kurz auf Chromecast-Bereitschaft
                 self.selected_cast.wait()
-                # Seek-Befehl senden
+                # Seek-Befehl senden; die neue Position meldet der Receiver per Status
                 self.mc.seek(position_seconds)
-                # Status aktualisieren
-                time.sleep(0.1)
-                self.mc.update_status()
+                self.clock.seek(position_seconds)
+                self.request_status_refresh()
                 print(f"✓ Chromecast: Seek erfolgreich zu {position_seconds:.1f}s")
             except Exception as e:
                 print(f"✗ Chromecast seek error: {e}")
@@ -1107,13 +3882,358 @@ class ChromecastManager:
                 traceback.print_exc()
 
     def update_status(self):
-        """Aktualisiert Chromecast-Status (nötig für Position-Abfragen)"""
+        """Fragt den Status beim Receiver ab (blockiert - nicht im Hauptthread aufrufen)"""
         if self.selected_cast and self.mc:
             try:
                 self.selected_cast.media_controller.update_status()
             except Exception as e:
                 print(f"Status update error: {e}")
 
+    def request_status_refresh(self):
+        """Lässt den Abfrage-Thread sofort einen Status anfordern (z.B. nach Seek)"""
+        self._poll_wake.set()
+
+    def start_status_updates(self):
+        """Registriert die Status-Listener und startet den Abfrage-Thread"""
+        self.stop_status_updates()
+        self._session_warm = False
+        cast = self.selected_cast
+        key = str(cast.uuid)
+        listener = self._status_listeners.get(key)
+        if listener is None or listener.cast is not cast:
+            # Ein Chromecast-Objekt aus dem Pool hat seine Listener schon
+            listener = CastStatusListener(self, cast)
+            cast.register_status_listener(listener)
+            cast.media_controller.register_status_listener(listener)
+            cast.register_connection_listener(listener)
+            self._status_listeners[key] = listener
+        self._connection_state = None
+        self.clock.reset()
+        self.publish_status(media=cast.media_controller.status)
+        stop = threading.Event()
+        self._poll_stop = stop
+        threading.Thread(target=self._poll_status, args=(cast, stop),
+                         name="cast-status", daemon=True).start()
+
+    def stop_status_updates(self):
+        if self._poll_stop:
+            self._poll_stop.set()
+            self._poll_wake.set()
+            self._poll_stop = None
+
+    def _poll_status(self, cast, stop):
+        """Abfrage-Thread: fordert den Media-Status im adaptiven Takt an
+
+        Der Receiver meldet Zustandswechsel von selbst; die Abfragen halten
+        vor allem die Position aktuell. Bei Fehlern wird das Intervall bis
+        STATUS_POLL_MAX verdoppelt.
+        """
+        failures = 0
+        last_heartbeat = time.monotonic()
+        while not stop.is_set():
+            state = self._status_snapshot['player_state']
+            interval = self.STATUS_POLL_INTERVALS.get(state, self.STATUS_POLL_IDLE)
+            if self.clock.drift_exceeded:
+                interval = min(interval, self.STATUS_POLL_DRIFT)
+            if failures:
+                interval = min(interval * 2 ** failures, self.STATUS_POLL_MAX)
+            self._poll_wake.wait(interval)
+            self._poll_wake.clear()
+            if stop.is_set():
+                break
+            try:
+                if cast.media_controller.status.media_session_id is not None:
+                    cast.media_controller.update_status()
+                    last_heartbeat = time.monotonic()
+                if self._session_warm:
+                    last_heartbeat = self._maintain_session(cast, self._status_snapshot,
+                                                            time.monotonic(), last_heartbeat)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                if failures == 1:
+                    print(f"ℹ Chromecast-Statusabfrage fehlgeschlagen: {e}")
+
+    def publish_status(self, connection=None, media=None, load_error=None):
+        """Baut den Status-Snapshot neu auf (Socket-Thread oder nach Verbindungswechsel)
+
+        media: neu gemeldeter Media-Status - nur dann wird die PlaybackClock
+               nachgestellt, Geräte-Meldungen (z.B. Lautstärke) lassen sie laufen
+        Weckt alle Threads in wait_for_status.
+        """
+        with self._status_changed:
+            if connection is not None:
+                self._connection_state = connection
+            if load_error is not None:
+                self._load_error = load_error
+            if media is not None:
+                self.clock.sync(media.current_time, media.player_state,
+                                getattr(media, 'playback_rate', 1.0), media.duration)
+            elif not self.selected_cast:
+                self.clock.reset()
+            previous_state = self._status_snapshot['player_state']
+            self._status_snapshot = self._build_status_snapshot()
+            self._status_changed.notify_all()
+            if self._status_snapshot['player_state'] != previous_state:
+                # Abfrage-Takt sofort an den neuen Zustand anpassen
+                self._poll_wake.set()
+
+    def _quit_foreign_app(self):
+        """Beendet eine fremde App auf dem Receiver und wartet auf die Bestätigung
+
+        Returns: True, wenn eine App beendet werden musste
+        """
+        foreign_app = self.selected_cast.app_id
+        if not foreign_app or foreign_app == self.MEDIA_RECEIVER_APP_ID:
+            return False
+        print(f"ℹ Aktive App erkannt: {self.selected_cast.app_display_name} ({foreign_app})")
+        print("  Beende aktive App für Chromecast-Streaming...")
+        try:
+            self.selected_cast.quit_app()
+            # Warten, bis der Receiver den App-Wechsel meldet
+            if self.wait_for_status(lambda st: st.get('app_id') != foreign_app,
+                                    self.START_TIMEOUTS['quit_app']):
+                print("  ✓ App beendet")
+            else:
+                print("  ⚠ App-Ende nicht bestätigt, starte trotzdem")
+        except Exception as e:
+            print(f"  ⚠ Konnte App nicht beenden: {e}")
+        return True
+
+    def warm_session(self, idle_timeout=None):
+        """Startet den Standard-Media-Receiver vorab im Hintergrund
+
+        Beendet fremde Apps, startet den Media-Receiver und verbindet den
+        Media-Namespace, sodass das erste play_media nur noch ein LOAD ist.
+        Ein play_video während des Vorwärmens wartet darauf. Der Status-Thread
+        hält die Sitzung mit einer Anfrage alle SESSION_HEARTBEAT Sekunden
+        aktiv und beendet sie nach idle_timeout Sekunden ohne Wiedergabe
+        (None: nie).
+        Returns: False, wenn kein Gerät verbunden ist oder schon vorgewärmt wird
+        """
+        if not self.selected_cast or not self._warm_done.is_set():
+            return False
+        self._warm_done.clear()
+        threading.Thread(target=self._warm_session, args=(self.selected_cast, idle_timeout),
+                         name="cast-warm", daemon=True).start()
+        return True
+
+    def _warm_session(self, cast, idle_timeout):
+        try:
+            started = time.monotonic()
+            self._quit_foreign_app()
+            if cast.app_id != self.MEDIA_RECEIVER_APP_ID:
+                cast.media_controller.launch()
+            if not self.wait_for_status(lambda st: st.get('app_id') == self.MEDIA_RECEIVER_APP_ID,
+                                        self.START_TIMEOUTS['load']):
+                print("ℹ Media-Receiver konnte nicht vorgewärmt werden")
+                return False
+            self.session_idle_timeout = idle_timeout
+            self._session_active_at = time.monotonic()
+            self._session_warm = True
+            print(f"✓ Media-Receiver vorgewärmt in {time.monotonic() - started:.2f}s")
+            return True
+        except Exception as e:
+            print(f"ℹ Vorwärmen des Receivers fehlgeschlagen: {e}")
+            return False
+        finally:
+            self._warm_done.set()
+
+    def _maintain_session(self, cast, st, now, last_heartbeat):
+        """Heartbeat und Leerlauf-Ende der vorgewärmten Sitzung (Status-Thread)
+
+        Returns: Zeitpunkt des letzten Heartbeats
+        """
+        if st.get('app_id') != self.MEDIA_RECEIVER_APP_ID:
+            # Eine andere App hat übernommen - die Sitzung gehört uns nicht mehr
+            self._session_warm = False
+            return last_heartbeat
+        if st['player_state'] in ('PLAYING', 'BUFFERING', 'PAUSED'):
+            self._session_active_at = now
+            return last_heartbeat
+        if self.session_idle_timeout and now - self._session_active_at >= self.session_idle_timeout \
+                and self._warm_done.is_set():
+            print(f"ℹ Receiver-Sitzung seit {self.session_idle_timeout / 60:.0f} Minuten unbenutzt - beende sie")
+            self._session_warm = False
+            cast.quit_app()
+            return last_heartbeat
+        if now - last_heartbeat >= self.SESSION_HEARTBEAT:
+            cast.media_controller.update_status()
+            return now
+        return last_heartbeat
+
+    def on_connection_status(self, cast, state):
+        """Verbindungsstatus des ausgewählten Geräts (Socket-Thread)
+
+        Bei Verlust übernimmt ein Hintergrund-Thread das Wiederverbinden.
+        """
+        if state in ('LOST', 'FAILED', 'DISCONNECTED') and not self._reconnecting.is_set() \
+                and self.selected_service is not None:
+            self._reconnecting.set()
+            snapshot = self._status_snapshot
+            resume = None
+            if snapshot.get('content_id') and snapshot['player_state'] in ('PLAYING', 'PAUSED', 'BUFFERING'):
+                resume = {'content_id': snapshot['content_id'], 'content_type': snapshot['content_type'],
+                          'position': self.clock.position(),
+                          'autoplay': snapshot['player_state'] != 'PAUSED'}
+            print(f"⚠ Verbindung zu '{cast.name}' verloren ({state})")
+            threading.Thread(target=self._reconnect, args=(cast, resume),
+                             name="cast-reconnect", daemon=True).start()
+
+    def _reconnect(self, cast, resume):
+        """Stellt die Verbindung zum ausgewählten Gerät wieder her
+
+        Wartet zuerst RECONNECT_GRACE Sekunden auf pychromecasts eigenen
+        Wiederaufbau, danach wird mit wachsendem Abstand neu verbunden - mit
+        der aktuellen Adresse aus der Suche, falls sich die IP geändert hat.
+        Anschließend wird die Media-Sitzung fortgesetzt.
+        """
+        try:
+            delay = self.RECONNECT_GRACE
+            while True:
+                restored = self.wait_for_status(lambda st: st.get('connection') == 'CONNECTED', delay)
+                if self.selected_cast is not cast:
+                    return  # anderes Gerät gewählt oder getrennt
+                if restored:
+                    break
+                service = self._found_devices.get(self.selected_service.uuid, self.selected_service)
+                print(f"ℹ Verbinde neu mit '{service.friendly_name}' ({service.host})...")
+                try:
+                    new_cast = self.pool.get(service, fresh=True)
+                except Exception as e:
+                    print(f"ℹ Neuverbindung fehlgeschlagen: {e}")
+                    new_cast = None
+                if self.selected_cast is not cast:
+                    return
+                if new_cast:
+                    self.selected_cast = new_cast
+                    self.selected_service = service
+                    self.selected_device_host = service.host
+                    self.mc = new_cast.media_controller
+                    self.start_status_updates()
+                    break
+                delay = min(delay * 2, self.RECONNECT_MAX)
+            print(f"✓ Verbindung zu '{self.selected_cast.name}' wiederhergestellt")
+            self._resume_media(resume)
+        finally:
+            self._reconnecting.clear()
+
+    def _resume_media(self, resume):
+        """Setzt die Wiedergabe nach dem Wiederverbinden fort
+
+        Läuft die Media-Sitzung auf dem Receiver noch, genügt eine
+        Status-Abfrage; sonst wird das Medium an der letzten Position neu geladen.
+        """
+        if not resume:
+            return
+        self.request_status_refresh()
+        if self.wait_for_status(lambda st: st.get('content_id') == resume['content_id']
+                                and st['player_state'] != 'IDLE', self.RESUME_TIMEOUT):
+            print("✓ Media-Sitzung läuft weiter")
+            return
+        print(f"ℹ Media-Sitzung verloren, lade neu ab {resume['position']:.0f}s")
+        try:
+            self.mc.play_media(resume['content_id'], resume['content_type'],
+                               current_time=resume['position'], autoplay=resume['autoplay'],
+                               media_info={'tracks': self.text_tracks} if self.text_tracks else None)
+            self.clock.seek(resume['position'])
+        except Exception as e:
+            print(f"✗ Fortsetzen fehlgeschlagen: {e}")
+
+    def wait_for_status(self, predicate, timeout):
+        """Wartet, bis predicate(Status-Snapshot) wahr ist
+
+        Returns: das Ergebnis von predicate oder None nach timeout Sekunden
+        """
+        deadline = time.monotonic() + timeout
+        with self._status_changed:
+            while True:
+                result = predicate(self._status_snapshot)
+                if result:
+                    return result
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._status_changed.wait(remaining)
+
+    def _await_playback_start(self, video_url, mime_type, media_info, load_sent, phases):
+        """Start-Zustandsautomat: LOAD gesendet -> Medium geladen -> PLAYING
+
+        Wird nur durch Statusmeldungen vorangetrieben. Bleibt der Receiver
+        IDLE (z.B. TV wacht auf), gibt es Play-Befehle mit wachsendem Abstand.
+        Returns: 'PLAYING'/'BUFFERING' bei Erfolg, sonst None
+        """
+        def current_media(st):
+            return st.get('content_id') == video_url
+
+        def outcome(st):
+            if self._load_error:
+                return 'ERROR'
+            if not current_media(st):
+                return None
+            if st['player_state'] in ("PLAYING", "BUFFERING"):
+                return st['player_state']
+            if st['player_state'] == "IDLE" and st.get('idle_reason') == "ERROR":
+                return 'ERROR'
+            return None
+
+        print("  Warte auf Chromecast-Antwort...")
+        loaded = self.wait_for_status(lambda st: outcome(st) or current_media(st),
+                                      self.START_TIMEOUTS['load'])
+        phases['load'] = time.monotonic() - load_sent
+        if not loaded:
+            print(f"  ℹ Medium nach {self.START_TIMEOUTS['load']:.0f}s noch nicht geladen, warte weiter...")
+
+        deadline = load_sent + self.START_TIMEOUTS['playing']
+        nudge_at = load_sent + self.START_NUDGE_FIRST
+        nudge_gap = self.START_NUDGE_FIRST
+        while True:
+            now = time.monotonic()
+            state = self.wait_for_status(outcome, max(0.0, min(nudge_at, deadline) - now))
+            if state == 'ERROR':
+                # Receiver konnte die Datei nicht laden (Codec/Container)
+                print(f"✗ Chromecast meldet Ladefehler für {mime_type}")
+                self.capabilities.record_load_failure(self.selected_cast.model_name, media_info)
+                return None
+            if state:
+                phases['playing'] = time.monotonic() - load_sent
+                return state
+            if time.monotonic() >= deadline:
+                break
+            # Anstoß für Receiver, die nach dem Laden IDLE bleiben
+            st = self.get_extended_status()
+            print(f"  Status ist {st['player_state']} nach {time.monotonic() - load_sent:.0f}s "
+                  f"- sende Play-Befehl als 'Anstoß'")
+            try:
+                self.mc.play()
+            except Exception as e:
+                print(f"  ... Fehler beim Play-Befehl: {e}")
+            self.request_status_refresh()
+            nudge_gap *= self.START_NUDGE_BACKOFF
+            nudge_at = time.monotonic() + nudge_gap
+
+        print(f"✗ Wiedergabe konnte nicht gestartet werden nach {self.START_TIMEOUTS['playing']:.0f} Sekunden.")
+        print("  Möglicherweise ist der TV ausgeschaltet, Chromecast reagiert nicht")
+        print("  oder die Firewall blockiert den HTTP-Server.")
+        return None
+
+    def record_start_time(self, seconds, phases):
+        """Speichert die Zeit bis PLAYING (Benchmark des Wiedergabe-Starts)"""
+        self.start_history.append((seconds, dict(phases)))
+        details = ", ".join(f"{name} {value:.2f}s" for name, value in phases.items())
+        print(f"✓ Streaming gestartet nach {seconds:.2f}s ({details})")
+
+    def get_start_statistics(self):
+        """Zeit bis PLAYING über die letzten Starts
+
+        Returns: dict mit count, last, median, max (Sekunden) oder None ohne Messung
+        """
+        times = sorted(seconds for seconds, _ in self.start_history)
+        if not times:
+            return None
+        return {'count': len(times), 'last': self.start_history[-1][0],
+                'median': times[len(times) // 2], 'max': times[-1]}
+
     def set_volume(self, volume):
         """Setzt Chromecast-Lautstärke (0.0 bis 1.0)"""
         if self.selected_cast:
@@ -1136,6 +4256,36 @@ class ChromecastManager:
                 return 0.5  # Standardwert bei Fehler
         return 0.5  # Standardwert wenn nicht verbunden
 
+    def add_text_tracks(self, video_url, tracks, timeout=30):
+        """Lädt das laufende Medium einmal mit nachträglich fertigen Untertitel-Spuren neu
+
+        Wartet, bis video_url auf dem Receiver läuft; ist inzwischen ein
+        anderes Medium geladen oder sind die Spuren schon dabei, passiert nichts.
+        """
+        snapshot = self.wait_for_status(
+            lambda st: st if st.get('content_id') == video_url
+            and st['player_state'] in ('PLAYING', 'PAUSED', 'BUFFERING') else None, timeout)
+        if not snapshot or not self.mc:
+            return False
+        known = {track['trackId'] for track in self.text_tracks}
+        added = [track for track in tracks if track['trackId'] not in known]
+        if not added:
+            return True
+        position = self.clock.position()
+        print(f"ℹ Lade Medium mit {len(added)} weiteren Untertitel-Spur(en) neu ab {position:.0f}s")
+        try:
+            tracks = self.text_tracks + added
+            self.mc.play_media(video_url, snapshot['content_type'], current_time=position,
+                               autoplay=snapshot['player_state'] != 'PAUSED',
+                               media_info={'tracks': tracks})
+            self.text_tracks = tracks
+            self.clock.seek(position)
+            self.request_status_refresh()
+            return True
+        except Exception as e:
+            print(f"✗ Neuladen mit Untertiteln fehlgeschlagen: {e}")
+            return False
+
     def enable_subtitles(self, subtitle_url, subtitle_lang='en-US', subtitle_name='Subtitles'):
         """Aktiviert Untertitel für Chromecast-Wiedergabe
 
@@ -1155,7 +4305,7 @@ class ChromecastManager:
 
             # Erstelle Track-Metadaten
             tracks = [{
-                'trackId': 1,
+                'trackId': self.EXTERNAL_SUBTITLE_TRACK_ID,
                 'type': 'TEXT',
                 'trackContentId': subtitle_url,
                 'trackContentType': 'text/vtt',  # VTT wird besser unterstützt als SRT
@@ -1164,20 +4314,23 @@ class ChromecastManager:
                 'subtype': 'SUBTITLES'
             }]
 
-            # Update Media mit Untertiteln
+            # Media mit Untertiteln neu laden (die mitgeladenen Spuren bleiben erhalten)
+            tracks = [track for track in self.text_tracks
+                      if track['trackId'] != self.EXTERNAL_SUBTITLE_TRACK_ID] + tracks
             current_time = self.mc.status.current_time or 0
             self.mc.play_media(
                 self.mc.status.content_id,
                 self.mc.status.content_type,
                 current_time=current_time,
                 autoplay=True,
-                subtitles=tracks
+                media_info={'tracks': tracks}
             )
+            self.text_tracks = tracks
 
-            # Aktiviere erste Untertitel-Spur
+            # Aktiviere die neue Untertitel-Spur
             self.mc.update_status()
             time.sleep(0.5)
-            self.mc.enable_subtitle(1)
+            self.set_text_track(self.EXTERNAL_SUBTITLE_TRACK_ID)
 
             print("✓ Untertitel aktiviert")
             return True
@@ -1191,13 +4344,7 @@ class ChromecastManager:
     def disable_subtitles(self):
         """Deaktiviert Untertitel für Chromecast"""
         if self.mc:
-            try:
-                self.mc.disable_subtitle()
-                print("✓ Untertitel deaktiviert")
-                return True
-            except Exception as e:
-                print(f"✗ Fehler beim Deaktivieren der Untertitel: {e}")
-                return False
+            return self.set_text_track(None)
         return False
 
     def set_audio_track(self, track_id):
@@ -1212,34 +4359,113 @@ class ChromecastManager:
 
         try:
             print(f"Wähle Chromecast Audio-Track {track_id}")
-            # Nutze die native Chromecast-Funktion zum Wechseln der Audio-Spur
-            self.mc.enable_subtitle(track_id)  # Trotz des Namens funktioniert es auch für Audio
+            # Aktive Untertitel-Spur beibehalten, sonst schaltet der Receiver sie ab
+            text_ids = [active_id for active_id in self._active_track_ids()
+                        if active_id in self._track_ids('TEXT')]
+            self._edit_active_tracks([track_id] + text_ids)
             print(f"✓ Audio-Track {track_id} ausgewählt")
             return True
         except Exception as e:
             print(f"✗ Fehler beim Wechseln der Audio-Spur: {e}")
             return False
 
+    def get_audio_tracks(self):
+        """Audio-Spuren, die der Receiver für das laufende Medium meldet
+
+        Returns: Liste von Track-Dicts in Stream-Reihenfolge (leer, wenn der
+                 Receiver keine Spuren meldet, z.B. bei HLS mit einer Spur)
+        """
+        if not self.mc or not self.mc.status:
+            return []
+        tracks = getattr(self.mc.status, 'subtitle_tracks', None) or []  # pychromecast: alle Spuren
+        return [track for track in tracks if track.get('type') == 'AUDIO']
+
+    def select_audio_track(self, index):
+        """Wählt die index-te Audio-Spur (wie im lokalen Audio-Menü)
+
+        Returns: False, wenn der Receiver diese Spur nicht kennt
+        """
+        tracks = self.get_audio_tracks()
+        if not 0 <= index < len(tracks):
+            return False
+        return self.set_audio_track(tracks[index]['trackId'])
+
+    def set_text_track(self, track_id):
+        """Aktiviert eine mitgeladene Untertitel-Spur (None schaltet Untertitel ab)
+
+        Die aktive Audio-Spur bleibt dabei ausgewählt.
+        """
+        if not self.mc:
+            print("✗ Kein aktiver Chromecast-Stream")
+            return False
+        try:
+            audio_ids = [active_id for active_id in self._active_track_ids()
+                         if active_id in self._track_ids('AUDIO')]
+            self._edit_active_tracks(audio_ids + ([track_id] if track_id is not None else []))
+            print("✓ Untertitel deaktiviert" if track_id is None else f"✓ Untertitel-Spur {track_id} aktiviert")
+            return True
+        except Exception as e:
+            print(f"✗ Fehler beim Wechseln der Untertitel-Spur: {e}")
+            return False
+
+    def _active_track_ids(self):
+        status = self.mc.status if self.mc else None
+        return list(getattr(status, 'current_subtitle_tracks', None) or [])
+
+    def _track_ids(self, track_type):
+        status = self.mc.status if self.mc else None
+        tracks = getattr(status, 'subtitle_tracks', None) or []
+        return {track.get('trackId') for track in tracks if track.get('type') == track_type}
+
+    def _edit_active_tracks(self, track_ids):
+        """Setzt die aktiven Spuren (Audio und Text gemeinsam, Cast: EDIT_TRACKS_INFO)
+
+        Keine oder eine Spur über die öffentlichen MediaController-Methoden;
+        für Audio und Text zusammen gibt es dort keine - dann dieselbe
+        Nachricht über send_message.
+        """
+        if not track_ids:
+            self.mc.disable_subtitle()
+        elif len(track_ids) == 1:
+            self.mc.enable_subtitle(track_ids[0])
+        else:
+            status = self.mc.status
+            if status is None or status.media_session_id is None:
+                raise RuntimeError("keine aktive Mediensitzung")
+            self.mc.send_message({'type': 'EDIT_TRACKS_INFO', 'activeTrackIds': track_ids,
+                                  'mediaSessionId': status.media_session_id},
+                                 inc_session_id=True)
+
+    DISCONNECTED_STATUS = MappingProxyType({
+        'connected': False,
+        'device_name': 'Nicht verbunden',
+        'app_name': 'N/A',
+        'player_state': 'IDLE',
+        'volume': 0.0,
+        'is_muted': False,
+        'current_time': 0.0,
+        'duration': 0.0,
+        'buffer_percent': 0,
+        'media_title': 'N/A',
+        'content_type': 'N/A',
+        'updated_at': 0.0,
+    })
+
     def get_extended_status(self):
         """Gibt erweiterte Chromecast-Status-Informationen zurück
 
+        Liest nur den zuletzt gemeldeten Snapshot - kein Netzwerkzugriff,
+        daher auch im Hauptthread unbedenklich.
+
         Returns:
-            dict: Status-Dictionary mit allen verfügbaren Informationen
+            Mapping (nur lesbar): Status mit allen verfügbaren Informationen
         """
+        return self._status_snapshot
+
+    def _build_status_snapshot(self):
+        """Erzeugt den Snapshot aus den von pychromecast zwischengespeicherten Status-Objekten"""
         if not self.selected_cast:
-            return {
-                'connected': False,
-                'device_name': 'Nicht verbunden',
-                'app_name': 'N/A',
-                'player_state': 'IDLE',
-                'volume': 0.0,
-                'is_muted': False,
-                'current_time': 0.0,
-                'duration': 0.0,
-                'buffer_percent': 0,
-                'media_title': 'N/A',
-                'content_type': 'N/A'
-            }
+            return self.DISCONNECTED_STATUS
 
         status = {
             'connected': True,
@@ -1270,7 +4496,7 @@ class ChromecastManager:
 
             # Berechne Buffer-Prozentsatz
             if media_status.duration and media_status.duration > 0:
-                status['buffer_percent'] = int((media_status.current_time / media_status.duration) * 100)
+                status['buffer_percent'] = int(((media_status.current_time or 0) / media_status.duration) * 100)
             else:
                 status['buffer_percent'] = 0
         else:
@@ -1283,7 +4509,9 @@ class ChromecastManager:
                 'content_type': 'N/A'
             })
 
-        return status
+        status['connection'] = self._connection_state
+        status['updated_at'] = time.monotonic()
+        return MappingProxyType(status)
 
     def discover_cast_groups(self):
         """Entdeckt Chromecast-Gruppen für Multi-Room-Audio
@@ -1343,6 +4571,7 @@ class ChromecastManager:
             if success:
                 print("✓ Erfolgreich mit Gruppe verbunden")
                 print("  Audio wird auf allen Geräten der Gruppe synchronisiert abgespielt")
+                print("  Es wird nur die Audio-Spur gestreamt (kein Video)")
                 return True
             else:
                 print("✗ Verbindung zur Gruppe fehlgeschlagen")
@@ -1385,10 +4614,26 @@ class ChromecastManager:
             return []
 
     def disconnect(self):
-        if self.selected_cast:
-            self.selected_cast.disconnect()
+        """Trennt das gewählte Gerät; andere Verbindungen im Pool bleiben offen"""
+        with self._selection_lock:
+            self._selection_generation += 1
+        self.stop_status_updates()
+        self._session_warm = False
+        cast = self.selected_cast
+        if cast:
             self.selected_cast = None
+            self.selected_service = None
+            self.selected_device_host = None
             self.mc = None
+            self._status_listeners.pop(str(cast.uuid), None)
+            self.pool.release(cast.uuid)
+        self.publish_status()
+
+    def shutdown(self):
+        """Beim Beenden: alle Verbindungen schließen und die Suche stoppen"""
+        self.disconnect()
+        self.pool.close_all()
+        self._status_listeners.clear()
 
         # Stoppe den ursprünglichen Discovery-Browser, der die ganze Zeit lief.
         if self._discovery_browser:
@@ -1482,6 +4727,19 @@ class PlaylistManager:
             return True
         return False
 
+    def get_upcoming(self, count, wrap=False):
+        """Gibt die Pfade der nächsten count Videos zurück (wrap: Playlist-Schleife)"""
+        upcoming = []
+        index = self.current_index
+        for _ in range(min(count, max(0, len(self.playlist) - 1))):
+            index += 1
+            if index >= len(self.playlist):
+                if not wrap:
+                    break
+                index = 0
+            upcoming.append(self.playlist[index]['path'])
+        return upcoming
+
     def has_next(self):
         """Prüft ob es ein nächstes Video gibt"""
         return self.current_index < len(self.playlist) - 1
@@ -1981,20 +5239,20 @@ class VideoPlayer(Gtk.Box):
                 return True
 
             # Verwende ffmpeg für schnellere und zuverlässigere Thumbnail-Extraktion
-            try:
-                import subprocess
-                # Extrahiere Frame bei 5 Sekunden
-                cmd = [
-                    'ffmpeg', '-y', '-ss', '5', '-i', video_path,
-                    '-vframes', '1', '-vf', f'scale={width}:{height}',
-                    thumbnail_path
-                ]
-                result = subprocess.run(cmd, capture_output=True, timeout=3)
+            if FFMPEG_CAPABILITIES.available:
+                try:
+                    # Extrahiere Frame bei 5 Sekunden
+                    cmd = [
+                        'ffmpeg', '-y', '-ss', '5', '-i', video_path,
+                        '-vframes', '1', '-vf', f'scale={width}:{height}',
+                        thumbnail_path
+                    ]
+                    result = subprocess.run(cmd, capture_output=True, timeout=3)
 
-                if result.returncode == 0 and os.path.exists(thumbnail_path):
-                    return True
-            except Exception as e:
-                print(f"ffmpeg Thumbnail-Extraktion fehlgeschlagen: {e}")
+                    if result.returncode == 0 and os.path.exists(thumbnail_path):
+                        return True
+                except Exception as e:
+                    print(f"ffmpeg Thumbnail-Extraktion fehlgeschlagen: {e}")
 
             # Fallback: Nutze GStreamer falls ffmpeg nicht verfügbar
             try:
@@ -2606,10 +5864,36 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
         # Recent Files Manager
         self.recent_files_manager = RecentFilesManager(max_items=10)
 
-        # Chromecast Manager, HTTP-Server und Video-Converter
+        # Chromecast Manager, Video-Converter und HTTP-Server
         self.cast_manager = ChromecastManager()
-        self.http_server = VideoHTTPServer()
-        self.video_converter = VideoConverter()
+        self.video_converter = VideoConverter(
+            cache_size_gb=self.config.get_setting("cache_size_gb", 10),
+            encoder_mode=self.config.get_setting("encoder_mode", "auto"),
+            software_codec=self.config.get_setting("software_codec", "libx264"),
+            software_preset=self.config.get_setting("software_preset", "veryfast"),
+        )
+        self.http_server = VideoHTTPServer(readahead=ReadAheadManager(
+            window_mb=self.config.get_setting("readahead_window_mb", 8),
+            keep_behind_mb=self.config.get_setting("readahead_keep_behind_mb", 16),
+            drop_behind=self.config.get_setting("readahead_drop_behind", True),
+            background_prefetch=self.config.get_setting("readahead_background", True),
+            enabled=self.config.get_setting("readahead_enabled", True),
+        ), on_file_served=self.video_converter.cache_manager.touch_path)
+        self._shown_progress = None
+        self.video_converter.progress_listeners.append(
+            lambda progress: GLib.idle_add(progress.add_listener, self.update_conversion_progress)
+        )
+        # Vorab-Konvertierung der nächsten Playlist-Einträge
+        self.conversion_queue = ConversionQueue(
+            self.video_converter, max_workers=self.config.get_setting("preconvert_workers", 1)
+        )
+        self.conversion_queue.options_provider = self._preconversion_options
+        self.bandwidth_manager = BandwidthManager()
+        self.cast_media_info = None
+        self.cast_text_tracks = []  # WebVTT-Spuren, die mit dem Medium geladen werden
+        self.cast_source_path = None  # Original der laufenden Chromecast-Wiedergabe
+        self._last_bandwidth_sample = 0.0
+        self._last_network_stalls = 0
         self.playlist_manager = PlaylistManager()
         self.current_video_path = None
 
@@ -2769,6 +6053,39 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
             self.update_playlist_ui()
             print(f"{len(last_playlist)} Video(s) aus letzter Sitzung geladen.")
 
+        # Zuletzt genutzten Chromecast schon im Hintergrund verbinden
+        self.preconnect_last_device()
+
+    def preconnect_last_device(self):
+        """Verbindet beim Start im Hintergrund mit dem zuletzt genutzten Chromecast
+
+        Startet die Gerätesuche; sobald das Gerät auftaucht, wird die
+        Verbindung aufgebaut, ohne in den Chromecast-Modus zu wechseln.
+        Eine manuelle Suche übernimmt den Such-Callback.
+        """
+        device_name = self.config.get_setting("chromecast_device")
+        if not device_name or not self.config.get_setting("cast_preconnect", True):
+            return
+        started = False
+
+        def on_devices_found(devices):
+            nonlocal started
+            if started or self.cast_manager.selected_cast:
+                return
+            service = next((device for device in devices if device.friendly_name == device_name), None)
+            if service is None:
+                return
+            started = True
+
+            def connect():
+                # Wählt der Nutzer währenddessen ein Gerät, gewinnt seine Wahl
+                if self.cast_manager.connect_to_chromecast(service, background=True):
+                    GLib.idle_add(self.status_label.set_text, f"Chromecast bereit: {device_name}")
+
+            threading.Thread(target=connect, daemon=True).start()
+
+        print(f"Verbinde im Hintergrund mit zuletzt genutztem Chromecast '{device_name}'...")
+        self.cast_manager.discover_chromecasts(on_devices_found)
 
     def setup_drop_css(self):
         """Fügt CSS für Drag-and-Drop visuelles Feedback hinzu"""
@@ -2969,6 +6286,13 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
         self.url_button.connect("clicked", self.on_open_url)
         header.pack_start(self.url_button)
 
+        # Cache Button
+        cache_button = Gtk.Button()
+        cache_button.set_icon_name("drive-harddisk-symbolic")
+        cache_button.set_tooltip_text("Konvertierungs-Cache")
+        cache_button.connect("clicked", self.on_show_cache_dialog)
+        header.pack_end(cache_button)
+
         # About Button
         about_button = Gtk.Button()
         about_button.set_icon_name("help-about-symbolic")
@@ -3230,6 +6554,12 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
         self.status_label.add_css_class("dim-label")
         chromecast_section.append(self.status_label)
 
+        # Fortschritt laufender Konvertierungen (FFmpegProgress)
+        self.conversion_progress_bar = Gtk.ProgressBar()
+        self.conversion_progress_bar.set_show_text(True)
+        self.conversion_progress_bar.set_visible(False)
+        chromecast_section.append(self.conversion_progress_bar)
+
         # Erweiterte Status-Anzeige (ausklappbar)
         self.chromecast_expander = Gtk.Expander()
         self.chromecast_expander.set_label("Erweiterte Informationen")
@@ -3277,6 +6607,14 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
         self.cc_buffer_label.add_css_class("caption")
         status_details_box.append(self.cc_buffer_label)
 
+        # Streaming-Server (Durchsatz, TTFB, Stalls)
+        self.cc_network_label = Gtk.Label(label="Netzwerk: -")
+        self.cc_network_label.set_xalign(0)
+        self.cc_network_label.add_css_class("caption")
+        self.cc_network_label.set_wrap(True)
+        self.cc_network_label.set_max_width_chars(30)
+        status_details_box.append(self.cc_network_label)
+
         # Group Members (if applicable)
         self.cc_group_label = Gtk.Label(label="")
         self.cc_group_label.set_xalign(0)
@@ -3456,7 +6794,6 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
         if self.play_mode == "local":
             return self.video_player.get_position()
         else:
-            self.cast_manager.update_status()
             return self.cast_manager.get_position()
 
     def get_current_duration(self):
@@ -4465,21 +7802,28 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
                     '-t', str(duration),
                     '-c', 'copy',  # Stream kopieren ohne Re-Encoding (schnell)
                     '-avoid_negative_ts', 'make_zero',
+                    '-progress', 'pipe:1',
+                    '-nostats',
                     str(output_path),
                     '-y'  # Überschreibe existierende Datei
                 ]
 
                 print(f"Exportiere Clip: {self.format_time(self.ab_loop_a)} - {self.format_time(self.ab_loop_b)}")
-                result = subprocess.run(cmd, capture_output=True, text=True)
-
-                if result.returncode == 0:
+                progress = FFmpegProgress("Exportiere Clip", duration)
+                progress.add_listener(lambda p: self.status_label.set_text(p.describe()))
+                GLib.idle_add(progress.add_listener, self.update_conversion_progress)
+                returncode, output = run_ffmpeg(cmd, progress)
+
+                if returncode is None:
+                    raise FileNotFoundError('ffmpeg')
+                if returncode == 0:
                     # Erfolg
                     GLib.idle_add(self.status_label.set_text, f"Clip gespeichert: {filename}")
                     GLib.idle_add(self._show_clip_export_success_dialog, str(output_path))
                     print(f"Clip erfolgreich exportiert: {output_path}")
                 else:
                     # Fehler
-                    error_msg = result.stderr if result.stderr else "Unbekannter Fehler"
+                    error_msg = output if output else "Unbekannter Fehler"
                     print(f"Fehler beim Exportieren: {error_msg}")
                     GLib.idle_add(self.status_label.set_text, "Clip-Export fehlgeschlagen")
 
@@ -4542,6 +7886,7 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
             elif state == "IDLE":
                 state_color = "⚪"
             self.cc_state_label.set_text(f"Status: {state_color} {state}")
+            self._sample_cast_bandwidth(state)
 
             # Media Info
             media_title = status['media_title']
@@ -4553,6 +7898,13 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
             buffer_percent = status['buffer_percent']
             self.cc_buffer_label.set_text(f"Fortschritt: {buffer_percent}%")
 
+            # Streaming-Server
+            net = self.http_server.stats.snapshot()
+            stalls = sum(net['stalls'].values())
+            self.cc_network_label.set_text(
+                f"Netzwerk: {net['throughput'] * 8 / 1_000_000:.1f} Mbit/s · "
+                f"TTFB {net['ttfb_avg'] * 1000:.0f} ms · Stalls {stalls}")
+
             # Group Members (falls vorhanden)
             members = self.cast_manager.get_group_members()
             if len(members) > 1:
@@ -4616,6 +7968,138 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
         dialog.connect("response", on_response)
         dialog.present(self)
 
+    def on_show_cache_dialog(self, _button):
+        """Zeigt den Konvertierungs-Cache: Einträge, Statistik, Pinnen, Löschen"""
+        cache = self.video_converter.cache_manager
+
+        content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
+        content_box.set_margin_top(12)
+        content_box.set_margin_bottom(12)
+        content_box.set_margin_start(12)
+        content_box.set_margin_end(12)
+
+        stats_label = Gtk.Label()
+        stats_label.set_xalign(0)
+        stats_label.set_wrap(True)
+        content_box.append(stats_label)
+
+        # Budget (cache_size_gb)
+        budget_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
+        budget_box.append(Gtk.Label(label="Maximale Größe (GB):"))
+        budget_spin = Gtk.SpinButton.new_with_range(1, 500, 1)
+        budget_spin.set_value(self.config.get_setting("cache_size_gb", 10))
+        budget_box.append(budget_spin)
+        content_box.append(budget_box)
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scrolled.set_min_content_height(300)
+        scrolled.set_min_content_width(480)
+        list_box = Gtk.ListBox()
+        list_box.set_selection_mode(Gtk.SelectionMode.NONE)
+        list_box.add_css_class("boxed-list")
+        scrolled.set_child(list_box)
+        content_box.append(scrolled)
+
+        def refresh():
+            stats = cache.get_stats()
+            lookups = stats['hits'] + stats['misses']
+            hit_rate = f"{stats['hits'] * 100 // lookups}%" if lookups else "-"
+            stats_label.set_text(
+                f"{stats['entries']} Einträge ({stats['pinned']} angepinnt) · "
+                f"{stats['total_bytes'] / 1024**3:.2f} von {stats['budget_bytes'] / 1024**3:.0f} GB\n"
+                f"Treffer: {stats['hits']} · Fehlgriffe: {stats['misses']} ({hit_rate}) · "
+                f"Verdrängt: {stats['evictions']} ({stats['bytes_evicted'] / 1024**3:.2f} GB)"
+            )
+
+            while (row := list_box.get_row_at_index(0)) is not None:
+                list_box.remove(row)
+
+            entries = cache.list_entries()
+            if not entries:
+                list_box.append(Gtk.Label(label="Cache ist leer"))
+            for entry in entries:
+                row_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
+                row_box.set_margin_top(6)
+                row_box.set_margin_bottom(6)
+                row_box.set_margin_start(6)
+                row_box.set_margin_end(6)
+
+                text_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+                text_box.set_hexpand(True)
+                title = Gtk.Label(label=Path(entry['source']).name if entry['plan'] != 'hls' else entry['source'])
+                title.set_xalign(0)
+                title.set_ellipsize(Pango.EllipsizeMode.END)
+                text_box.append(title)
+                last_used = datetime.datetime.fromtimestamp(entry['last_access']).strftime("%d.%m.%Y %H:%M")
+                details = Gtk.Label(label=f"{entry['size'] / 1024**2:.1f} MB · {entry['plan'] or '-'} · "
+                                          f"zuletzt {last_used}")
+                details.set_xalign(0)
+                details.add_css_class("caption")
+                details.add_css_class("dim-label")
+                text_box.append(details)
+                row_box.append(text_box)
+
+                if entry['plan'] != 'hls':
+                    pin_button = Gtk.ToggleButton()
+                    pin_button.set_icon_name("view-pin-symbolic")
+                    pin_button.set_tooltip_text("Anpinnen (nie automatisch löschen)")
+                    pin_button.set_active(entry['pinned'])
+                    pin_button.set_valign(Gtk.Align.CENTER)
+                    pin_button.connect("toggled", lambda b, name=entry['name']: (
+                        cache.set_pinned(name, b.get_active()), refresh()))
+                    row_box.append(pin_button)
+
+                delete_button = Gtk.Button()
+                delete_button.set_icon_name("user-trash-symbolic")
+                delete_button.set_tooltip_text("Aus dem Cache löschen")
+                delete_button.set_valign(Gtk.Align.CENTER)
+                delete_button.connect("clicked", on_delete, entry['name'])
+                row_box.append(delete_button)
+
+                list_box.append(row_box)
+
+        def on_delete(button, name):
+            # Große Dateien und HLS-Ordner zu löschen kann dauern - nicht im Hauptthread
+            button.set_sensitive(False)
+
+            def delete():
+                cache.remove_entry(name)
+                GLib.idle_add(refresh)
+
+            threading.Thread(target=delete, daemon=True).start()
+
+        def on_budget_changed(spin):
+            size_gb = int(spin.get_value())
+            self.config.set_setting("cache_size_gb", size_gb)
+            cache.set_budget(size_gb * 1024**3)
+            refresh()
+
+        budget_spin.connect("value-changed", on_budget_changed)
+        refresh()
+
+        dialog = Adw.AlertDialog.new("Konvertierungs-Cache", None)
+        dialog.set_extra_child(content_box)
+        dialog.add_response("clear", "Cache leeren")
+        dialog.add_response("close", "Schließen")
+        dialog.set_response_appearance("clear", Adw.ResponseAppearance.DESTRUCTIVE)
+        dialog.set_default_response("close")
+        dialog.set_close_response("close")
+
+        def on_response(d, response):
+            if response == "clear":
+                self.status_label.set_text("Leere Cache...")
+
+                def clear():
+                    removed = cache.clear()
+                    GLib.idle_add(self.status_label.set_text,
+                                  f"Cache geleert ({removed} Einträge, angepinnte bleiben erhalten)")
+
+                threading.Thread(target=clear, daemon=True).start()
+
+        dialog.connect("response", on_response)
+        dialog.present(self)
+
     def parse_time_string(self, time_str):
         """Konvertiert Zeitstring (MM:SS oder HH:MM:SS) zu Sekunden"""
         try:
@@ -5075,6 +8559,10 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
 
         def connect():
             success = self.cast_manager.connect_to_chromecast(service)
+            if success and self.config.get_setting("cast_warm_session", True):
+                # Media-Receiver schon jetzt starten; ein sofortiger Start wartet darauf
+                idle_minutes = self.config.get_setting("cast_session_idle_minutes", 10)
+                self.cast_manager.warm_session(idle_minutes * 60 if idle_minutes else None)
             GLib.idle_add(self.on_connected, success, service.friendly_name)
 
         thread = threading.Thread(target=connect, daemon=True)
@@ -5119,20 +8607,15 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
                     video_path = self.current_video_path
 
                     # Konvertierung falls nötig
-                    if video_path.lower().endswith(('.mkv', '.avi')):
-                        GLib.idle_add(self.status_label.set_text, "Konvertiere Video...")
-                        converted_path = self.video_converter.convert_to_mp4(video_path)
-                        if converted_path:
-                            video_path = converted_path
-
-                    video_url = self.http_server.get_video_url(video_path)
+                    video_path, video_url, content_type = self.prepare_cast_media(video_path)
                     if video_url:
-                        success = self.cast_manager.play_video(video_path, video_url)
+                        success = self.start_cast_playback(video_path, video_url, content_type)
                         if success:
                             # Springe zur gespeicherten Position falls vorhanden
                             if current_position and current_position > 0:
-                                import time
-                                time.sleep(2)  # Warte bis Streaming gestartet ist
+                                # Warte bis der Receiver Seeks annimmt
+                                self.cast_manager.wait_for_status(
+                                    lambda st: st['player_state'] == 'PLAYING' and st.get('supports_seek'), 5.0)
                                 self.cast_manager.seek(current_position)
 
                             GLib.idle_add(lambda: (
@@ -5157,6 +8640,278 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
             self.status_label.set_text(f"Verbindung fehlgeschlagen")
         return False
 
+    def prepare_cast_media(self, video_path, progress_callback=None):
+        """Bereitet eine Datei für Chromecast vor (Konvertierung + HTTP-URL)
+
+        Läuft im Streaming-Thread. Per ffprobe wird die minimale Konvertierung
+        bestimmt; wo nur Container oder Audio nicht passen, wird progressiv
+        remuxt, sodass die Wiedergabe nach den ersten Fragmenten startet.
+        Text-Untertitel werden als WebVTT-Spuren für play_video vorbereitet.
+        Returns: (Pfad für Chromecast, URL oder None bei Server-Fehler, MIME-Type oder None)
+        """
+        cast_path, video_url, content_type = self._prepare_cast_stream(video_path, progress_callback)
+        self.cast_source_path = video_path
+        self.cast_text_tracks = []
+        if video_url and not (content_type or '').startswith('audio/'):
+            self.cast_text_tracks = self.prepare_cast_text_tracks(video_path, video_url)
+        return cast_path, video_url, content_type
+
+    def prepare_cast_text_tracks(self, video_path, video_url):
+        """Cast-Track-Dicts für die bereits erzeugten WebVTT-Dateien einer Quelle
+
+        Fehlende Spuren (progressiver Remux läuft noch, fortgesetzte
+        Konvertierung, Direktwiedergabe, älterer Cache-Eintrag) entstehen im
+        Hintergrund; sind sie fertig, wird das Medium einmal mit allen
+        Spuren neu geladen.
+        """
+        sidecars = self.video_converter.get_subtitle_sidecars(video_path)
+        tracks = self.cast_tracks_for_sidecars(sidecars)
+        probe = self.video_converter.probe_media(video_path)
+        text_count = len(self.video_converter.text_subtitle_tracks(probe)) if probe else 0
+        if text_count > len(sidecars):
+            print(f"ℹ {text_count - len(sidecars)} Untertitel-Spur(en) folgen im Hintergrund")
+            threading.Thread(target=self._complete_cast_text_tracks,
+                             args=(video_path, video_url), daemon=True).start()
+        if tracks:
+            print(f"✓ {len(tracks)} Untertitel-Spur(en) für Chromecast bereit")
+        return tracks
+
+    def _complete_cast_text_tracks(self, video_path, video_url):
+        """Wartet auf die fehlenden WebVTT-Spuren und reicht sie an den Chromecast nach"""
+        sidecars = self.video_converter.complete_subtitle_sidecars(video_path)
+        if self.cast_source_path != video_path:
+            return
+        tracks = self.cast_tracks_for_sidecars(sidecars)
+        if len(tracks) <= len(self.cast_text_tracks):
+            return
+        # Noch nicht geladen: play_video nimmt die vollständige Liste mit
+        self.cast_text_tracks = tracks
+        self.cast_manager.add_text_tracks(video_url, tracks)
+
+    def cast_tracks_for_sidecars(self, sidecars):
+        """Wandelt get_subtitle_sidecars() in Cast-Track-Dicts (trackId 1000 + Index)"""
+        device_host = self.cast_manager.get_device_host()
+        tracks = []
+        for sidecar in sidecars:
+            url = self.http_server.get_media_url(sidecar['path'], device_host, content_type='text/vtt')
+            if not url:
+                continue
+            track = {
+                'trackId': 1000 + sidecar['index'],
+                'type': 'TEXT',
+                'trackContentId': url,
+                'trackContentType': 'text/vtt',
+                'subtype': 'SUBTITLES',
+                'name': sidecar['title'] or f"Spur {sidecar['index'] + 1}",
+            }
+            if sidecar['language']:
+                track['language'] = sidecar['language']
+            tracks.append(track)
+        return tracks
+
+    def _prepare_cast_stream(self, video_path, progress_callback=None):
+        """Konvertierung und HTTP-URL für prepare_cast_media"""
+        device_host = self.cast_manager.get_device_host()
+        self.cast_media_info = None
+        # Neuer Cast: HLS-Sitzung des vorherigen Mediums beenden
+        self.http_server.close_hls_sessions()
+        self.schedule_preconversion(current=video_path)
+        # Bitrate für Transkodierungen nach gemessener Bandbreite zum Gerät
+        rung = None
+        if self.config.get_setting("adaptive_bitrate", True):
+            rung = self.bandwidth_manager.select_rung(self.cast_manager.get_device_uuid())
+
+        # Lautsprecher und Gruppen zeigen kein Bild - nur die Audio-Spur senden
+        if self.config.get_setting("audio_only_for_speakers", True) and \
+                self.cast_manager.is_audio_only_device():
+            audio_index = max(0, self.video_player.get_current_audio_track())
+            print(f"ℹ Audio-Gerät erkannt, sende nur Audio-Spur {audio_index}")
+            GLib.idle_add(self.status_label.set_text, "Extrahiere Audio...")
+            audio_path = self.video_converter.extract_audio_for_cast(
+                video_path, audio_index, progress_callback=progress_callback
+            )
+            if audio_path:
+                audio_url = self.http_server.get_media_url(audio_path, device_host, content_type='audio/mp4')
+                return audio_path, audio_url, 'audio/mp4'
+            print("✗ Audio-Extraktion fehlgeschlagen, sende vollständige Datei...")
+
+        # Streams untersuchen und nur konvertieren, was der Chromecast nicht kann
+        plan = self.video_converter.plan_cast_conversion(
+            video_path,
+            profile=self.cast_manager.get_cast_profile(),
+            audio_index=max(0, self.video_player.get_current_audio_track())
+        )
+        # Was tatsächlich gesendet wird - für das Lernen aus Ladefehlern
+        if plan:
+            self.cast_media_info = {
+                'video_codec': plan['video_codec'] if plan['copy_video'] else 'h264',
+                'audio_codec': plan['audio_codec'] if plan['copy_audio'] else 'aac',
+                'audio_channels': plan['audio_channels'] if plan['copy_audio'] else 2,
+            }
+        if plan is None:
+            # Ohne ffprobe: Entscheidung wie bisher anhand der Endung
+            if video_path.lower().endswith(('.mkv', '.avi')):
+                plan = {'action': 'audio', 'mime_type': 'video/mp4', 'copy_video': True,
+                        'copy_audio': False, 'reasons': [f"Format {Path(video_path).suffix}"]}
+            else:
+                plan = {'action': 'passthrough', 'mime_type': None, 'copy_video': True,
+                        'copy_audio': True, 'reasons': []}
+
+        if plan['action'] == 'passthrough':
+            print(f"✓ Direkt abspielbar: {Path(video_path).name}")
+            video_url = self.http_server.get_video_url(video_path, device_host)
+            return video_path, video_url, plan['mime_type']
+
+        print(f"\n⚠ Konvertierung nötig ({plan['action']}): {', '.join(plan['reasons'])}")
+        GLib.idle_add(self.status_label.set_text, "Konvertiere Video...")
+
+        if plan['copy_video'] and self.config.get_setting("progressive_casting", True):
+            # Das Streaming gibt den Lauf nicht frei: die Konvertierung läuft bis
+            # zum Ende weiter und landet im Cache
+            progressive = self.video_converter.convert_to_mp4_progressive(
+                video_path,
+                progress_callback=progress_callback,
+                plan=plan
+            )
+            if progressive and progressive.wait_until_playable():
+                print(f"✓ Streame während der Konvertierung: {Path(progressive.path).name}")
+                GLib.idle_add(self.status_label.set_text, "Starte Streaming...")
+                video_url = self.http_server.get_media_url(
+                    progressive.path, device_host,
+                    content_type='video/mp4',
+                    progressive=progressive
+                )
+                return progressive.path, video_url, 'video/mp4'
+            print("ℹ Progressive Konvertierung nicht möglich, konvertiere vollständig...")
+
+        # Remux nicht möglich -> Re-Encoding nötig. Per HLS nur die Segmente
+        # kodieren, die tatsächlich angesehen werden.
+        if self.config.get_setting("hls_for_reencode", True):
+            session = self.video_converter.create_hls_session(video_path, rung=rung, plan=plan)
+            if session:
+                print(f"✓ Streame per HLS ({session.segment_count} Segmente, On-Demand-Kodierung)")
+                GLib.idle_add(self.status_label.set_text, "Starte HLS-Streaming...")
+                video_url = self.http_server.get_hls_url(session, device_host)
+                return video_path, video_url, HLSSession.CONTENT_TYPE
+
+        print("Starte automatische Konvertierung zu MP4...")
+        converted_path = self.video_converter.convert_to_mp4(
+            video_path,
+            progress_callback=progress_callback,
+            rung=rung,
+            plan=plan
+        )
+
+        if converted_path:
+            print(f"✓ Nutze konvertierte Datei: {converted_path}")
+            video_path = converted_path
+            GLib.idle_add(self.status_label.set_text, "Starte Streaming...")
+        else:
+            print("✗ Konvertierung fehlgeschlagen, versuche Original-Datei...")
+            GLib.idle_add(self.status_label.set_text, "Konvertierung fehlgeschlagen, versuche trotzdem...")
+            # Fahre mit Original-Datei fort (könnte trotzdem funktionieren)
+
+        return video_path, self.http_server.get_video_url(video_path, device_host), None
+
+    def start_cast_playback(self, video_path, video_url, content_type=None):
+        """Startet die Wiedergabe auf dem Chromecast und misst die Bandbreite
+
+        Läuft im Streaming-Thread. Beim Start füllt der Receiver seinen
+        Puffer so schnell es die Verbindung erlaubt - das dient als Messung.
+        """
+        success = self.cast_manager.play_video(video_path, video_url, content_type,
+                                               media_info=self.cast_media_info,
+                                               text_tracks=self.cast_text_tracks)
+        if success and self.config.get_setting("adaptive_bitrate", True):
+            device_uuid = self.cast_manager.get_device_uuid()
+            device_host = self.cast_manager.get_device_host()
+            timer = threading.Timer(6.0, self._record_bandwidth_probe, args=(device_uuid, device_host))
+            timer.daemon = True
+            timer.start()
+        if success:
+            self.schedule_preconversion(current=video_path)
+            # Alle Audio-Spuren wurden übernommen - die lokal gewählte aktivieren
+            audio_index = self.video_player.get_current_audio_track()
+            if audio_index > 0:
+                self.cast_manager.select_audio_track(audio_index)
+        return success
+
+    def update_conversion_progress(self, progress):
+        """Zeigt einen FFmpeg-Lauf im Fortschrittsbalken (Hauptthread)
+
+        Laufen mehrere Jobs (z.B. Vorab-Konvertierung), bleibt der Balken
+        beim zuerst angezeigten, bis dieser fertig ist.
+        """
+        shown = self._shown_progress
+        if shown is not None and shown is not progress and not shown.finished:
+            return
+        self._shown_progress = progress
+        if progress.finished:
+            self.conversion_progress_bar.set_visible(False)
+            self._shown_progress = None
+            return
+        fraction = progress.fraction
+        if fraction is None:
+            self.conversion_progress_bar.pulse()
+        else:
+            self.conversion_progress_bar.set_fraction(fraction)
+        self.conversion_progress_bar.set_text(progress.describe())
+        self.conversion_progress_bar.set_visible(True)
+
+    def schedule_preconversion(self, current=None):
+        """Reiht die nächsten Playlist-Einträge zur Vorab-Konvertierung ein
+
+        Bei Sprüngen in der Playlist werden Jobs außerhalb des neuen Fensters
+        abgebrochen; die gerade gestreamte Datei läuft immer weiter.
+        """
+        count = self.config.get_setting("preconvert_next", 2)
+        upcoming = []
+        if count > 0 and self.play_mode == "chromecast":
+            upcoming = [path for path in self.playlist_manager.get_upcoming(
+                            count, wrap=self.loop_mode == LoopMode.ALL)
+                        if os.path.isfile(path)]
+        self.conversion_queue.set_window(upcoming, keep=(current, self.playlist_manager.get_current_video()))
+
+    def _preconversion_options(self, video_path):
+        """Entscheidet im Worker-Thread, ob und wie eine Datei vorab konvertiert wird"""
+        profile = self.cast_manager.get_cast_profile()
+        if profile is None or (self.config.get_setting("audio_only_for_speakers", True)
+                               and self.cast_manager.is_audio_only_device()):
+            return None
+        plan = self.video_converter.plan_cast_conversion(video_path, profile=profile)
+        if plan is None or plan['action'] == 'passthrough':
+            return None
+        if not plan['copy_video'] and self.config.get_setting("hls_for_reencode", True):
+            # Re-Encoding läuft per HLS on demand - Vorab-Kodierung wäre verschwendet
+            return None
+        rung = None
+        if self.config.get_setting("adaptive_bitrate", True):
+            rung = self.bandwidth_manager.select_rung(self.cast_manager.get_device_uuid())
+        return {'plan': plan, 'rung': rung,
+                'progressive': self.config.get_setting("progressive_casting", True)}
+
+    def _record_bandwidth_probe(self, device_uuid, device_host):
+        """Wertet die ersten Sekunden einer Wiedergabe als Bandbreiten-Messung aus"""
+        throughput = self.http_server.stats.active_throughput(device_host, window=5.0)
+        if throughput:
+            self.bandwidth_manager.record_sample(device_uuid, throughput * 8, source='probe')
+
+    def _sample_cast_bandwidth(self, player_state):
+        """Misst den Durchsatz während BUFFERING (Receiver lädt so schnell er kann)"""
+        now = time.monotonic()
+        if player_state != 'BUFFERING' or now - self._last_bandwidth_sample < 5.0:
+            return
+        self._last_bandwidth_sample = now
+        if not self.config.get_setting("adaptive_bitrate", True):
+            return
+        throughput = self.http_server.stats.active_throughput(self.cast_manager.get_device_host())
+        network_stalls = self.http_server.stats.stall_count('network')
+        stalled = network_stalls > self._last_network_stalls
+        self._last_network_stalls = network_stalls
+        if throughput:
+            self.bandwidth_manager.record_sample(self.cast_manager.get_device_uuid(),
+                                                 throughput * 8, source='playback', limit=stalled)
+
     def _update_mode_label(self):
         """Aktualisiert das Modus-Label mit Farbe und Formatierung"""
         if self.play_mode == "chromecast":
@@ -5264,6 +9019,7 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
                         print(f"Chromecast-Position gespeichert: {self.format_time(chromecast_position)}")
 
                     self.cast_manager.stop()
+                    self.http_server.close_hls_sessions()
                     self.status_label.set_text("Chromecast gestoppt, Modus: Lokal")
                     # Erlaube wieder Standby
                     self.uninhibit_suspend()
@@ -5388,36 +9144,19 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
                     try:
                         video_path = self.current_video_path
 
-                        # Automatische Konvertierung für MKV und AVI
-                        if video_path.lower().endswith(('.mkv', '.avi')):
-                            print(f"\n⚠ Inkompatibles Format erkannt: {Path(video_path).suffix}")
-                            print("Starte automatische Konvertierung zu MP4...")
-                            GLib.idle_add(self.status_label.set_text, "Konvertiere Video...")
-
-                            def update_status(msg):
-                                self.status_label.set_text(msg)
-
-                            converted_path = self.video_converter.convert_to_mp4(
-                                video_path,
-                                progress_callback=update_status
-                            )
+                        def update_status(msg):
+                            self.status_label.set_text(msg)
 
-                            if converted_path:
-                                print(f"✓ Nutze konvertierte Datei: {converted_path}")
-                                video_path = converted_path
-                                GLib.idle_add(self.status_label.set_text, "Starte Streaming...")
-                            else:
-                                print("✗ Konvertierung fehlgeschlagen, versuche Original-Datei...")
-                                GLib.idle_add(self.status_label.set_text, "Konvertierung fehlgeschlagen, versuche trotzdem...")
-                                # Fahre mit Original-Datei fort (könnte trotzdem funktionieren)
-
-                        # Hole HTTP-URL für Video
-                        video_url = self.http_server.get_video_url(video_path)
+                        # Automatische Konvertierung und HTTP-URL für Video
+                        video_path, video_url, content_type = self.prepare_cast_media(
+                            video_path,
+                            progress_callback=update_status
+                        )
 
                         if video_url:
                             print(f"Streaming URL: {video_url}")
                             # Starte Chromecast-Wiedergabe
-                            success = self.cast_manager.play_video(video_path, video_url)
+                            success = self.start_cast_playback(video_path, video_url, content_type)
 
                             if success:
                                 def update_ui_after_streaming():
@@ -5497,6 +9236,7 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
             self.video_player.stop()
         else:
             self.cast_manager.stop()
+            self.http_server.close_hls_sessions()
             self.status_label.set_text("Gestoppt")
             # Bei Stop Standby wieder erlauben
             self.uninhibit_suspend()
@@ -5745,7 +9485,7 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
             # Video-Name
             label = Gtk.Label(label=video_path['display'])
             label.set_xalign(0)
-            label.set_ellipsize(3)  # PANGO_ELLIPSIZE_END
+            label.set_ellipsize(Pango.EllipsizeMode.END)
             label.set_hexpand(True)
             entry_box.append(label)
 
@@ -5946,15 +9686,9 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
                     video_path = filepath
 
                     # Konvertierung falls nötig
-                    if video_path.lower().endswith(('.mkv', '.avi')):
-                        GLib.idle_add(self.status_label.set_text, "Konvertiere Video...")
-                        converted_path = self.video_converter.convert_to_mp4(video_path)
-                        if converted_path:
-                            video_path = converted_path
-
-                    video_url = self.http_server.get_video_url(video_path)
+                    video_path, video_url, content_type = self.prepare_cast_media(video_path)
                     if video_url:
-                        success = self.cast_manager.play_video(video_path, video_url)
+                        success = self.start_cast_playback(video_path, video_url, content_type)
                         if success:
                             def update_ui_streaming_started():
                                 self.status_label.set_text(f"Streamt: {filename}")
@@ -5991,6 +9725,7 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
             self.video_player.stop()
         else:
             self.cast_manager.stop()
+            self.http_server.close_hls_sessions()
             self.status_label.set_text("Gestoppt")
             # Bei Stop Standby wieder erlauben
             self.uninhibit_suspend()
@@ -6419,12 +10154,43 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
         index = param.get_int32()
         self.video_player.set_subtitle_track(index)
         print(f"Untertitel-Spur auf {index} gesetzt.")
+        if self.play_mode == "chromecast":
+            threading.Thread(target=self._set_cast_subtitle, args=(index,), daemon=True).start()
+
+    def _set_cast_subtitle(self, index):
+        """Schaltet die Untertitel auf dem Chromecast um (Hintergrund-Thread)"""
+        if index < 0:
+            self.cast_manager.disable_subtitles()
+            return
+        track_id = 1000 + index
+        if any(track['trackId'] == track_id for track in self.cast_manager.text_tracks):
+            self.cast_manager.set_text_track(track_id)
+            return
+        # Erst nach dem Laden fertig geworden (Hintergrund-Extraktion) - Medium neu laden
+        sidecar = next((sidecar for sidecar in self.video_converter.get_subtitle_sidecars(self.cast_source_path)
+                        if sidecar['index'] == index), None) if self.cast_source_path else None
+        if sidecar:
+            url = self.http_server.get_media_url(sidecar['path'], self.cast_manager.get_device_host(),
+                                                 content_type='text/vtt')
+            self.cast_manager.enable_subtitles(url, sidecar['language'] or 'und',
+                                               sidecar['title'] or f"Spur {index + 1}")
+            return
+        GLib.idle_add(self.status_label.set_text,
+                      "Untertitel auf dem Chromecast nicht verfügbar (Bild-Untertitel oder noch in Arbeit)")
 
     def on_set_audio(self, action, param):
         """Wird aufgerufen, wenn eine Audio-Spur aus dem Menü ausgewählt wird."""
         index = param.get_int32()
         self.video_player.set_audio_track(index)
         print(f"Audio-Spur auf {index} gesetzt.")
+        if self.play_mode == "chromecast":
+            threading.Thread(target=self._set_cast_audio, args=(index,), daemon=True).start()
+
+    def _set_cast_audio(self, index):
+        """Wechselt die Audio-Spur auf dem Chromecast (Hintergrund-Thread)"""
+        if not self.cast_manager.select_audio_track(index):
+            GLib.idle_add(self.status_label.set_text,
+                          "Audio-Spur auf dem Chromecast nicht verfügbar")
 
     def on_goto_chapter(self, action, param):
         """Wird aufgerufen, wenn ein Kapitel aus dem Menü ausgewählt wird."""
@@ -6695,7 +10461,7 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
             if self.cast_manager.selected_cast:
                 print("Stoppe Chromecast-Wiedergabe...")
                 self.cast_manager.stop()
-                self.cast_manager.disconnect()
+            self.cast_manager.shutdown()
         except Exception as e:
             print(f"Fehler beim Trennen von Chromecast: {e}")
 
@@ -6703,10 +10469,14 @@ class VideoPlayerWindow(Adw.ApplicationWindow):
         try:
             if self.http_server.server:
                 print("Stoppe HTTP-Server...")
-                self.http_server.stop_server()
+            self.http_server.shutdown()
         except Exception as e:
             print(f"Fehler beim Stoppen des HTTP-Servers: {e}")
 
+        # Stoppe Vorab-Konvertierung und Cache-Bereinigung
+        self.conversion_queue.shutdown()
+        self.video_converter.cache_manager.stop()
+
         # Stoppe Thumbnail-Worker-Thread
         try:
             if hasattr(self, 'thumbnail_thread_running') and self.thumbnail_thread_running: